@@ -1,43 +1,113 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI, Request
 from fastapi.responses import HTMLResponse, JSONResponse
-from fastapi.templating import Jinja2Templates
 from fastapi.staticfiles import StaticFiles
+from fastapi.templating import Jinja2Templates
+
 try:
-    from VEZEPyGame.app.routers import public, ws  # type: ignore
-    from VEZEPyGame.services.matchmaking.api import router as mm_router  # type: ignore
-    from VEZEPyGame.services.leaderboards.api import router as lb_router  # type: ignore
-    from VEZEPyGame.services.telemetry.api import router as tel_router  # type: ignore
-    from VEZEPyGame.services.inventory.api import router as inv_router  # type: ignore
-    from VEZEPyGame.services.ml.api import router as ml_router  # type: ignore
-    from VEZEPyGame.services.email.api import router as mail_router  # type: ignore
-    from VEZEPyGame.services.maps.api import router as maps_router  # type: ignore
-    from VEZEPyGame.services.social.api import router as social_router  # type: ignore
-    from VEZEPyGame.services.time.api import router as time_router  # type: ignore
-    from VEZEPyGame.services.timevmaps.api import router as timevmaps_router  # type: ignore
-    from VEZEPyGame.services.commerce.api import router as commerce_router  # type: ignore
-    from VEZEPyGame.services.progress.api import router as progress_router  # type: ignore
+    from VEZEPyGame.app.routers import public, ws
+    from VEZEPyGame.services import redis_pool
+    from VEZEPyGame.services.commerce.api import router as commerce_router
+    from VEZEPyGame.services.email.api import router as mail_router
+    from VEZEPyGame.services.inventory.api import router as inv_router
+    from VEZEPyGame.services.leaderboards import api as lb_api
+    from VEZEPyGame.services.leaderboards.api import router as lb_router
+    from VEZEPyGame.services.maps import api as maps_api
+    from VEZEPyGame.services.maps.api import router as maps_router
+    from VEZEPyGame.services.matchmaking import api as mm_api
+    from VEZEPyGame.services.matchmaking.api import router as mm_router
+    from VEZEPyGame.services.ml import api as ml_api
+    from VEZEPyGame.services.ml.api import router as ml_router
+    from VEZEPyGame.services.progress import api as progress_api
+    from VEZEPyGame.services.progress.api import router as progress_router
+    from VEZEPyGame.services.social.api import router as social_router
+    from VEZEPyGame.services.telemetry import api as tel_api
+    from VEZEPyGame.services.telemetry.api import router as tel_router
+    from VEZEPyGame.services.time.api import router as time_router
+    from VEZEPyGame.services.timevmaps.api import router as timevmaps_router
+    from VEZEPyGame.services.world import api as world_api
+    from VEZEPyGame.services.world.api import router as world_router
 except Exception:
     # Fallback for Docker image where packages are top-level modules
-    from app.routers import public, ws
-    from services.matchmaking.api import router as mm_router
-    from services.leaderboards.api import router as lb_router
-    from services.telemetry.api import router as tel_router
-    from services.inventory.api import router as inv_router
-    from services.ml.api import router as ml_router
-    from services.email.api import router as mail_router
-    from services.maps.api import router as maps_router
-    from services.social.api import router as social_router
-    from services.time.api import router as time_router
-    from services.timevmaps.api import router as timevmaps_router
-    from services.commerce.api import router as commerce_router
-    from services.progress.api import router as progress_router
+    from app.routers import public, ws  # type: ignore[no-redef]
+    from services import redis_pool  # type: ignore[no-redef]
+    from services.commerce.api import router as commerce_router  # type: ignore[no-redef]
+    from services.email.api import router as mail_router  # type: ignore[no-redef]
+    from services.inventory.api import router as inv_router  # type: ignore[no-redef]
+    from services.leaderboards import api as lb_api  # type: ignore[no-redef]
+    from services.leaderboards.api import router as lb_router  # type: ignore[no-redef]
+    from services.maps import api as maps_api  # type: ignore[no-redef]
+    from services.maps.api import router as maps_router  # type: ignore[no-redef]
+    from services.matchmaking import api as mm_api  # type: ignore[no-redef]
+    from services.matchmaking.api import router as mm_router  # type: ignore[no-redef]
+    from services.ml import api as ml_api  # type: ignore[no-redef]
+    from services.ml.api import router as ml_router  # type: ignore[no-redef]
+    from services.progress import api as progress_api  # type: ignore[no-redef]
+    from services.progress.api import router as progress_router  # type: ignore[no-redef]
+    from services.social.api import router as social_router  # type: ignore[no-redef]
+    from services.telemetry import api as tel_api  # type: ignore[no-redef]
+    from services.telemetry.api import router as tel_router  # type: ignore[no-redef]
+    from services.time.api import router as time_router  # type: ignore[no-redef]
+    from services.timevmaps.api import router as timevmaps_router  # type: ignore[no-redef]
+    from services.world import api as world_api  # type: ignore[no-redef]
+    from services.world.api import router as world_router  # type: ignore[no-redef]
+import asyncio
+import os
+import time
 from pathlib import Path
-from services.registry_cache import snapshot_status
-from services.registry_cache import snapshot_status, list_services
+
 import httpx
-import os, time
+from services.metrics import metrics_response
+from services.registry_cache import list_services, snapshot_status
 
-app = FastAPI(title="VEZEPyGame")
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    await ml_api.REGISTRY.warm()
+    # Load the world graph before serving, not on the first route request.
+    await asyncio.to_thread(maps_api.planner)
+    tasks: list[asyncio.Task] = []
+    tasks.append(asyncio.create_task(ws.BUS.run()))
+    if os.getenv("MM_BATCH_ENABLED", "1") in {"1", "true", "True"}:
+        tasks.append(asyncio.create_task(mm_api.MATCHER.run(ws.broadcast)))
+    if os.getenv("TEL_CONSUMER_ENABLED", "1") in {"1", "true", "True"}:
+        tasks.append(asyncio.create_task(tel_api.CONSUMER.run()))
+    score_buffer = lb_api.score_buffer()
+    if score_buffer is not None:
+        tasks.append(asyncio.create_task(score_buffer.run()))
+    bots = ml_api.bot_detection()
+    if bots is not None:
+        detector, bot_consumer = bots
+        tasks += [asyncio.create_task(bot_consumer.run()), asyncio.create_task(detector.run())]
+    tel_sink = tel_api.sink()
+    if tel_sink is not None:
+        tasks.append(asyncio.create_task(tel_sink.run()))
+    progress_wb = await progress_api.write_behind()
+    if progress_wb is not None:
+        tasks.append(asyncio.create_task(progress_wb.run()))
+    world_loop = world_api.tick_loop()
+    if world_loop is not None:
+        ws.BUS.frame_listeners.append(world_loop.on_frame)
+        tasks.append(asyncio.create_task(world_loop.run(ws.broadcast_many)))
+    try:
+        yield
+    finally:
+        for t in tasks:
+            t.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        if score_buffer is not None:
+            await score_buffer.flush()
+        if tel_sink is not None:
+            await tel_sink.flush()
+        if progress_wb is not None:
+            await progress_wb.flush()
+        ws.BROADCASTER.close()
+        ml_api.REGISTRY.close()
+        await redis_pool.close_pool()
+
+
+app = FastAPI(title="VEZEPyGame", lifespan=lifespan)
 BASE_DIR = Path(__file__).resolve().parent
 TEMPLATES_DIR = BASE_DIR / "ui" / "templates"
 STATIC_DIR = BASE_DIR / "ui" / "static"
@@ -61,6 +131,7 @@ app.include_router(time_router, prefix="/time", tags=["time"])
 app.include_router(timevmaps_router, prefix="/timevmaps", tags=["timevmaps"])
 app.include_router(commerce_router, prefix="/commerce", tags=["commerce"])
 app.include_router(progress_router, prefix="/progress", tags=["progress"])
+app.include_router(world_router, prefix="/world", tags=["world"])
 
 # Asset version for cache-busting
 ASSET_V = os.getenv("GAME_ASSET_V") or str(int(time.time()))
@@ -70,27 +141,43 @@ ASSET_V = os.getenv("GAME_ASSET_V") or str(int(time.time()))
 def index(request: Request):
     return templates.TemplateResponse(request, "ui.html", {"asset_v": ASSET_V})
 
+
 @app.get("/ui", response_class=HTMLResponse)
 def ui_home(request: Request):
     return templates.TemplateResponse(request, "ui.html", {"asset_v": ASSET_V})
 
+
 @app.get("/leaderboards", response_class=HTMLResponse)
 def ui_leaderboards(request: Request):
     return templates.TemplateResponse(request, "leaderboards.html", {"asset_v": ASSET_V})
 
+
 @app.get("/inventory", response_class=HTMLResponse)
 def ui_inventory(request: Request):
     return templates.TemplateResponse(request, "inventory.html", {"asset_v": ASSET_V})
 
+
 @app.get("/health")
 def health():
     return {"status": "ok"}
 
 
+@app.get("/metrics")
+def metrics():
+    redis_pool.pool_stats()  # refresh pool gauges before the scrape
+    return metrics_response()
+
+
+@app.get("/metrics/redis")
+def metrics_redis():
+    return redis_pool.pool_stats()
+
+
 @app.get("/registry/health")
 async def registry_health():
     return {"services": await snapshot_status()}
 
+
 @app.get("/registry/services")
 async def registry_services():
     return {"services": list_services()}
@@ -108,7 +195,7 @@ async def news_trends():
         try:
             async with httpx.AsyncClient(timeout=5) as client:
                 r = await client.get(url)
-                if r.status_code == 200:
+                if r.status_code == httpx.codes.OK:
                     return JSONResponse(r.json())
         except Exception:
             continue
@@ -1,38 +1,106 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException
-from typing import Any, Dict
+import os
+from typing import Any
+
+from fastapi import APIRouter, HTTPException, WebSocket, WebSocketDisconnect
+
+try:
+    from VEZEPyGame.services.realtime import inputs
+    from VEZEPyGame.services.realtime.broadcaster import Broadcaster
+    from VEZEPyGame.services.realtime.bus import EventBus
+    from VEZEPyGame.services.redis_pool import get_redis
+except Exception:
+    from services.realtime import inputs  # type: ignore[no-redef]
+    from services.realtime.broadcaster import Broadcaster  # type: ignore[no-redef]
+    from services.realtime.bus import EventBus  # type: ignore[no-redef]
+    from services.redis_pool import get_redis  # type: ignore[no-redef]
 
 router = APIRouter()
-clients: set[WebSocket] = set()
+
+# Each client gets a bounded send queue; a client that falls WS_QUEUE_SIZE events behind
+# is handled by WS_SLOW_POLICY (drop_oldest | drop_newest | disconnect).
+BROADCASTER = Broadcaster(
+    queue_size=int(os.getenv("WS_QUEUE_SIZE", "256")),
+    policy=os.getenv("WS_SLOW_POLICY", "drop_oldest"),
+)
+# WS_BUS=redis relays broadcasts through Redis pub/sub so every worker's sockets get them.
+BUS = EventBus(
+    BROADCASTER,
+    get_redis() if os.getenv("WS_BUS", "memory") == "redis" else None,
+    prefix=os.getenv("WS_BUS_PREFIX", "game:events"),
+)
+
+
+def _subprotocol(ws: WebSocket) -> str | None:
+    offered = ws.scope.get("subprotocols") or []
+    for name in (inputs.SUBPROTOCOL, "json"):
+        if name in offered:
+            return name
+    return None
 
 
 @router.websocket("/events")
-async def events(ws: WebSocket):
-    await ws.accept()
-    clients.add(ws)
+async def events(ws: WebSocket, match_id: str | None = None):
+    """Game event stream; with ``?match_id=`` the socket also gets that match's events.
+
+    Clients offering the ``veze.input.v1`` subprotocol receive input events as binary relay
+    frames, everyone else as JSON. Binary messages a client sends are input frames (see
+    ``services/realtime/inputs.py``), relayed to its match (or everyone) like ``POST /inputs``.
+    """
+    subprotocol = _subprotocol(ws)
+    await ws.accept(subprotocol=subprotocol)
+    client = BROADCASTER.connect(
+        ws, rooms=[match_id] if match_id else (), binary=subprotocol == inputs.SUBPROTOCOL
+    )
+    state = inputs.InputState()
     try:
         while True:
-            await ws.receive_text()
+            msg = await ws.receive()
+            if msg["type"] == "websocket.disconnect":
+                break
+            frame = msg.get("bytes")
+            if frame is None:
+                continue
+            try:
+                relay = inputs.relay(frame, state, client.id)
+            except inputs.InputError:
+                await ws.close(code=1007)
+                break
+            if relay is not None:
+                await BUS.publish_frame(relay, match_id)
     except WebSocketDisconnect:
-        clients.discard(ws)
+        pass
+    finally:
+        BROADCASTER.disconnect(client)
+
+
+async def broadcast(event: dict, room: str | None = None):
+    """Send ``event`` to every client (or to match ``room``) on every worker; never waits
+    on a slow socket."""
+    await BUS.publish(event, room)
+
+
+async def broadcast_many(events: list[tuple[dict | str, str | None]]):
+    """``broadcast`` for a batch of ``(event, room)`` pairs, in one bus round-trip."""
+    await BUS.publish_many(events)
 
 
-async def broadcast(event: dict):
-    for c in list(clients):
-        try:
-            await c.send_json(event)
-        except Exception:
-            clients.discard(c)
+@router.get("/events/stats")
+async def events_stats():
+    """Connected clients, drops, the deepest per-client send queues and bus counters."""
+    return {**BROADCASTER.stats(), "bus": BUS.stats()}
 
 
 @router.post("/inputs")
-async def post_inputs(payload: Dict[str, Any]):
-    """Accept external input events and broadcast to all connected game clients.
-    Expected shape: {"type":"input", "press":["w","shift"], "release":["q"], "impulse": {"e": true}}
+async def post_inputs(payload: dict[str, Any]):
+    """Accept external input events and broadcast them to the game clients of the match.
+    Expected shape: {"type":"input", "match_id":"m1", "press":["w","shift"], "release":["q"], "impulse": {"e": true}}
+    Without "match_id" the event goes to every connected client.
     """
     if not isinstance(payload, dict):
         raise HTTPException(status_code=400, detail="invalid payload")
+    match_id = payload.get("match_id")
     try:
-        await broadcast(payload)
+        await broadcast(payload, str(match_id) if match_id is not None else None)
         return {"ok": True}
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise HTTPException(status_code=500, detail=str(e)) from e
@@ -48,10 +48,26 @@
   (function connectInputsWS(){
     try{
       const proto = location.protocol==='https:'?'wss':'ws';
-      const url = `${proto}://${location.host}/events`;
-      const ws = new WebSocket(url);
+      // ?match_id= on the page joins that match's input room on the server.
+      const matchId = new URLSearchParams(location.search).get('match_id');
+      const url = `${proto}://${location.host}/events` + (matchId ? `?match_id=${encodeURIComponent(matchId)}` : '');
+      // Binary input frames when the server speaks veze.input.v1, JSON otherwise.
+      const ws = new WebSocket(url, ['veze.input.v1', 'json']);
+      ws.binaryType = 'arraybuffer';
+      // Bit order of the key masks in services/realtime/inputs.py.
+      const KEYS = ['w','a','s','d','shift',' ','q','e','f','j','k','arrowup','arrowdown','arrowleft','arrowright'];
       ws.onmessage = (ev)=>{
         try{
+          if(ev.data instanceof ArrayBuffer){
+            // Relay frame: u32 sender, u16 seq, u16 mask, u16 changed, u16 impulse (little-endian)
+            const v = new DataView(ev.data);
+            const mask = v.getUint16(6, true), changed = v.getUint16(8, true), imp = v.getUint16(10, true);
+            KEYS.forEach((k,i)=>{
+              if(changed & (1<<i)) keys[k] = !!(mask & (1<<i));
+              if(imp & (1<<i)) impulses[k] = true;
+            });
+            return;
+          }
           const data = JSON.parse(ev.data);
           if(data && data.type === 'input'){
             (data.press||[]).forEach(k=> keys[String(k).toLowerCase()] = true);
@@ -0,0 +1,85 @@
+"""Area-of-interest fan-out against sending every entity to every client.
+
+1k player clients and 9k NPCs (10k entities) share one 5000x5000 room; each tick the
+world steps and either every client gets the room's whole delta or each player gets the
+fragments of the grid cells around it. Reports CPU per tick and bytes per tick.
+
+Run from the repository root:  python VEZEPyGame/benchmarks/bench_interest.py
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from VEZEPyGame.services.realtime import inputs
+from VEZEPyGame.services.world.interest import InterestGrid
+from VEZEPyGame.services.world.state import NPC, World
+
+
+def build(clients: int, entities: int) -> World:
+    world = World(width=5000, height=5000, seed=5)
+    world.spawn("arena", NPC, count=entities - clients)
+    keys = [("w",), ("d",), ("s", "a"), ()]
+    for c in range(clients):
+        frame = inputs.relay(
+            inputs.encode(1, inputs.mask_of(keys[c % 4])), inputs.InputState(), sender=c
+        )
+        assert frame is not None
+        world.on_frame(frame, "arena")
+    return world
+
+
+def naive(world: World, clients: int, ticks: int, dt: float) -> tuple[float, float]:
+    world.deltas()
+    cpu, sent = 0.0, 0
+    for _ in range(ticks):
+        world.step(dt)
+        t0 = perf_counter()
+        texts = [json.dumps(e, separators=(",", ":")) for _, e in world.deltas()]
+        cpu += perf_counter() - t0
+        sent += clients * sum(len(t) for t in texts)  # one copy per socket
+    return cpu / ticks, sent / ticks
+
+
+def aoi(
+    world: World, ticks: int, dt: float, cell: float, radius: int
+) -> tuple[float, float, list[int]]:
+    grid = InterestGrid(world, cell=cell, radius=radius)
+    grid.messages()
+    cpu, sent, sizes = 0.0, 0, []
+    for _ in range(ticks):
+        world.step(dt)
+        t0 = perf_counter()
+        out = grid.messages()
+        cpu += perf_counter() - t0
+        sizes += [len(t) for _, t in out]
+        sent += sum(len(t) for _, t in out)
+    return cpu / ticks, sent / ticks, sizes
+
+
+def main(clients: int = 1_000, entities: int = 10_000, ticks: int = 50, hz: float = 20.0):
+    print(
+        f"{clients} clients, {entities} entities, {ticks} ticks at {hz:g} Hz (CPU excludes the simulation step)"
+    )
+    print(f"{'path':<26} {'CPU ms/tick':>12} {'MB/tick':>9} {'MB/s':>8} {'KB/client/tick':>15}")
+    cpu, sent = naive(build(clients, entities), clients, ticks, 1 / hz)
+    print(
+        f"{'every entity to everyone':<26} {cpu * 1e3:>12.2f} {sent / 1e6:>9.2f} {sent * hz / 1e6:>8.1f} {sent / clients / 1e3:>15.2f}"
+    )
+    for cell, radius in ((250, 1), (500, 1)):
+        cpu, sent, sizes = aoi(build(clients, entities), ticks, 1 / hz, cell, radius)
+        name = f"AOI cell={cell} r={radius}"
+        print(
+            f"{name:<26} {cpu * 1e3:>12.2f} {sent / 1e6:>9.2f} {sent * hz / 1e6:>8.1f} {np.mean(sizes) / 1e3:>15.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Leaderboard operations on one sorted set against sharded boards: bulk submit, an
+uncached top-100 page, 100 exact ranks, an around-me window and the largest key.
+
+Run from the repository root:  python VEZEPyGame/benchmarks/bench_leaderboards.py
+Set BENCH_REDIS=1 to use REDIS_URL; otherwise fakeredis runs in process, so timings show
+the relative command cost of each layout rather than real Redis latency.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+from pathlib import Path
+from time import perf_counter
+
+import fakeredis
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from VEZEPyGame.services.leaderboards.repo import LeaderboardRepo, ShardedLeaderboardRepo
+from VEZEPyGame.services.redis_pool import get_redis
+
+
+def _client():
+    return get_redis() if os.getenv("BENCH_REDIS") == "1" else fakeredis.FakeAsyncRedis()
+
+
+async def _ms(op, *args, repeat: int = 5) -> float:
+    started = perf_counter()
+    for _ in range(repeat):
+        await op(*args)
+    return (perf_counter() - started) / repeat * 1000
+
+
+async def main(members: int = 200_000):
+    rng = np.random.default_rng(7)
+    # Integer scores, so the board has plenty of ties.
+    scores = {f"u{i}": float(s) for i, s in enumerate(rng.integers(0, 50_000, members).tolist())}
+    probe = list(scores)[:: members // 100][:100]
+    print(f"{members:,} members, season bench, mode story")
+    print(
+        f"{'shards':>6} {'submit s':>9} {'top100 ms':>10} {'ranks ms':>9} {'around ms':>10} {'largest key':>12}"
+    )
+    for shards in (1, 8, 32):
+        client = _client()
+        await client.delete(
+            *[f"lb:bench:story{s}" for s in ["", *(f":{n}" for n in range(shards))]]
+        )
+        repo = (
+            LeaderboardRepo(client, top_n=0)
+            if shards == 1
+            else ShardedLeaderboardRepo(client, shards, top_n=0)
+        )
+        key = repo.key("bench", "story")
+        items = list(scores.items())
+        started = perf_counter()
+        for i in range(0, members, 10_000):
+            await repo.submit_many({key: dict(items[i : i + 10_000])})
+        submit_s = perf_counter() - started
+        top = await _ms(repo.page, "bench", "story", 0, 100)
+        ranks = await _ms(repo.ranks, "bench", "story", probe)
+        around = await _ms(repo.around, "bench", "story", probe[50], 10)
+        keys = repo.shard_keys(key) if isinstance(repo, ShardedLeaderboardRepo) else [key]
+        largest = max([await client.zcard(k) for k in keys])
+        print(
+            f"{shards:>6} {submit_s:>9.2f} {top:>10.1f} {ranks:>9.1f} {around:>10.1f} {largest:>12,}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
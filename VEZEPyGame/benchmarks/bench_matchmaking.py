@@ -0,0 +1,89 @@
+"""Match throughput of the bucketed MatchQueue against the previous linear-scan queue.
+
+Run from the repository root:  python VEZEPyGame/benchmarks/bench_matchmaking.py
+"""
+
+from __future__ import annotations
+
+import random
+import sys
+from heapq import heappop, heappush
+from pathlib import Path
+from time import perf_counter, time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from VEZEPyGame.services.matchmaking.queue import MatchQueue, Ticket
+
+MODES = ["story", "boss-rush", "endless"]
+REGIONS = ["us", "eu", "ap"]
+
+
+class LinearQueue:
+    """The original heap + linear partner scan, kept here as the baseline."""
+
+    def __init__(self):
+        self._q: list[Ticket] = []
+
+    def enqueue(self, t: Ticket):
+        heappush(self._q, t)
+
+    def try_match(self, max_delta: int = 50) -> list[Ticket] | None:
+        if len(self._q) < 2:
+            return None
+        a = heappop(self._q)
+        window = max_delta + int((time() - a.enqueued_at) / 5) * 25
+        idx = next(
+            (
+                i
+                for i, t in enumerate(self._q)
+                if abs(t.mmr - a.mmr) <= window and t.mode == a.mode and t.region == a.region
+            ),
+            -1,
+        )
+        if idx == -1:
+            heappush(self._q, a)
+            return None
+        b = self._q.pop(idx)
+        return [a, b]
+
+
+def _tickets(n: int, seed: int = 7) -> list[Ticket]:
+    rnd = random.Random(seed)
+    now = time()
+    return [
+        Ticket(
+            now - rnd.random() * 30,
+            f"u{i}",
+            int(rnd.gauss(1500, 300)),
+            rnd.choice(REGIONS),
+            rnd.choice(MODES),
+        )
+        for i in range(n)
+    ]
+
+
+def bench(queue_cls, n: int, matches: int) -> float:
+    q = queue_cls()
+    for t in _tickets(n):
+        q.enqueue(t)
+    formed = 0
+    start = perf_counter()
+    for _ in range(matches):
+        if q.try_match() is not None:
+            formed += 1
+    elapsed = perf_counter() - start
+    return formed / elapsed if elapsed else float("inf")
+
+
+def main():
+    matches = 1000
+    print(f"{'queued':>8} {'bucketed matches/s':>20} {'linear matches/s':>18}")
+    for n in (1_000, 10_000, 100_000):
+        fast = bench(MatchQueue, n, matches)
+        slow = bench(LinearQueue, n, matches)
+        print(f"{n:>8} {fast:>20,.0f} {slow:>18,.0f}")
+
+
+if __name__ == "__main__":
+    main()
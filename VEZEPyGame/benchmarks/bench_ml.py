@@ -0,0 +1,97 @@
+"""Latency and throughput of /ml/detect_bot: one request per user, the same requests
+micro-batched, and the /detect_bot/batch endpoint.
+
+Through ASGI the per-request HTTP cost dominates these cheap formulas, so the in-process
+rows (scoring calls without HTTP) show what coalescing saves on the scoring path itself.
+
+Run from the repository root:  python VEZEPyGame/benchmarks/bench_ml.py
+"""
+
+from __future__ import annotations
+
+import asyncio
+import sys
+from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import httpx
+from fastapi import FastAPI
+
+from VEZEPyGame.services.ml import api as ml
+from VEZEPyGame.services.ml.scoring import as_matrix
+
+
+def _signals(n: int, width: int = 16, seed: int = 5) -> list[list[float]]:
+    return np.random.default_rng(seed).uniform(0, 120, (n, width)).round(2).tolist()
+
+
+async def _singles(
+    http: httpx.AsyncClient, rows: list[list[float]], concurrency: int
+) -> tuple[float, np.ndarray]:
+    latencies: list[float] = []
+    it = iter(rows)
+
+    async def worker():
+        for row in it:
+            t0 = perf_counter()
+            r = await http.post("/ml/detect_bot", json={"signals": row})
+            r.raise_for_status()
+            latencies.append(perf_counter() - t0)
+
+    t0 = perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return perf_counter() - t0, np.asarray(latencies)
+
+
+def _report(mode: str, n: int, dt: float, lat: np.ndarray | None = None):
+    tail = ""
+    if lat is not None and len(lat):
+        p50, p99 = np.percentile(lat * 1e3, [50, 99])
+        tail = f"  p50 {p50:6.2f} ms  p99 {p99:6.2f} ms"
+    print(f"{mode:<26} n={n:>6}  {n / dt:>10.0f} scores/s{tail}")
+
+
+async def main(n: int = 5_000, concurrency: int = 256):
+    app = FastAPI()
+    app.include_router(ml.router, prefix="/ml")
+    rows = _signals(n)
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://bench"
+    ) as http:
+        wait = ml.MICROBATCH_WAIT_MS
+        ml.MICROBATCH_WAIT_MS = 0
+        dt, lat = await _singles(http, rows, concurrency)
+        _report("single", n, dt, lat)
+        ml.MICROBATCH_WAIT_MS = wait or 2.0
+        ml.BOT_BATCHER.max_wait_s = ml.MICROBATCH_WAIT_MS / 1000.0
+        dt, lat = await _singles(http, rows, concurrency)
+        _report(f"micro-batched ({ml.MICROBATCH_WAIT_MS:g} ms)", n, dt, lat)
+        for size in (1_000, 10_000, 100_000):
+            body = {"signals": _signals(size)}
+            t0 = perf_counter()
+            r = await http.post("/ml/detect_bot/batch", json=body)
+            r.raise_for_status()
+            _report("batch endpoint", size, perf_counter() - t0)
+    t0 = perf_counter()
+    for row in rows:
+        await ml._bots([row])
+    _report("in-process single", n, perf_counter() - t0)
+    # Full batches run at once instead of waiting out the window.
+    ml.BOT_BATCHER.max_batch = concurrency
+    t0 = perf_counter()
+    for i in range(0, n, concurrency):
+        await asyncio.gather(*(ml.BOT_BATCHER.submit(row) for row in rows[i : i + concurrency]))
+    _report("in-process micro-batched", n, perf_counter() - t0)
+    for size in (10_000, 1_000_000):
+        m, lengths = as_matrix(_signals(size))
+        t0 = perf_counter()
+        await ml.REGISTRY.predict("bot", m, lengths)
+        _report("registry.predict (matrix)", size, perf_counter() - t0)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
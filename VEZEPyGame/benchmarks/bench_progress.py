@@ -0,0 +1,93 @@
+"""Bytes written and latency per progress save: the old full-JSON blob, a full hash save and
+a one-quest delta (PATCH), with JSON or msgpack quest encoding.
+
+Run from the repository root:  python VEZEPyGame/benchmarks/bench_progress.py
+Set BENCH_REDIS=1 to write to REDIS_URL; otherwise the in-memory store is timed and the
+blob path only serializes.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import os
+import sys
+from pathlib import Path
+from time import perf_counter
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from VEZEPyGame.services.progress.store import Codec, ProgressStore, msgpack
+from VEZEPyGame.services.redis_pool import get_redis
+
+
+def _client():
+    return get_redis() if os.getenv("BENCH_REDIS") == "1" else None
+
+
+def _record(user_id: str, quests: int) -> dict:
+    return {
+        "user_id": user_id,
+        "xp": 12345.0,
+        "level": 17,
+        "quests": [
+            {"id": i, "have": float(i % 7), "need": 10.0, "done": False, "rewarded": False}
+            for i in range(quests)
+        ],
+    }
+
+
+async def _time(n: int, op, *args) -> tuple[float, int]:
+    written = 0
+    t0 = perf_counter()
+    for i in range(n):
+        written = await op(*args, i)
+    return (perf_counter() - t0) / n * 1e6, written
+
+
+async def main(n: int = 2_000, quests: int = 20, users: int = 100):
+    client = _client()
+    rec = _record("bench", quests)
+    print(f"{quests} quests per record, {n} saves each over {users} users")
+    print(f"{'path':<28} {'bytes/save':>10} {'us/save':>10}")
+
+    async def blob(i: int) -> int:
+        body = json.dumps({**rec, "user_id": f"bench:{i % users}"})
+        if client is not None:
+            await client.set(f"game:progress:bench:{i % users}", body)
+        return len(body)
+
+    us, written = await _time(n, blob)
+    print(f"{'full JSON blob (old)':<28} {written:>10} {us:>10.1f}")
+
+    async def full(store: ProgressStore, i: int) -> int:
+        return await store.save(f"bench:{i % users}", rec["xp"], rec["level"], rec["quests"])
+
+    async def delta(store: ProgressStore, i: int) -> int:
+        return await store.patch(
+            f"bench:{i % users}", quests=[{"id": i % quests, "have": float(i % 10)}]
+        )
+
+    async def xp(store: ProgressStore, i: int) -> int:
+        return await store.patch(f"bench:{i % users}", xp_delta=5.0)
+
+    codecs = ["json"] + (["msgpack"] if msgpack is not None else [])
+    for name in codecs:
+        store = ProgressStore(client, Codec(name))
+        for label, op in (
+            (f"hash save ({name})", full),
+            (f"PATCH one quest ({name})", delta),
+            (f"PATCH xp_delta ({name})", xp),
+        ):
+            us, written = await _time(n, op, store)
+            print(f"{label:<28} {written:>10} {us:>10.1f}")
+    if msgpack is None:
+        print("(msgpack not installed: pip install msgpack to compare)")
+    if client is not None:
+        for i in range(users):
+            await client.delete(f"game:progress:bench:{i}", f"prog:bench:{i}", f"prog:bench:{i}:q")
+        await client.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,67 @@
+"""Throughput of the batched Elo path against per-match ``elo_update`` calls.
+
+Run from the repository root:  python VEZEPyGame/benchmarks/bench_ratings.py
+Set BENCH_REDIS=1 to persist through REDIS_URL instead of the in-memory fallback.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import sys
+from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from VEZEPyGame.services.matchmaking.mmr import (
+    DEFAULT_MMR,
+    RatingStore,
+    apply_results,
+    elo_update,
+    index_players,
+)
+from VEZEPyGame.services.redis_pool import get_redis
+
+
+def _batch(n: int, players: int, seed: int = 3) -> tuple[list[str], list[str], np.ndarray]:
+    rnd = np.random.default_rng(seed)
+    a = rnd.integers(0, players, n)
+    b = (a + rnd.integers(1, players, n)) % players
+    return [f"u{i}" for i in a], [f"u{i}" for i in b], rnd.integers(0, 2, n).astype(np.float64)
+
+
+def _client():
+    return get_redis() if os.getenv("BENCH_REDIS") == "1" else None
+
+
+async def main():
+    store = RatingStore(_client(), prefix="bench:mmr:")
+    print(
+        f"{'results':>8} {'compute/s':>12} {'end-to-end/s':>13} {'per-match python/s':>19}  backend"
+    )
+    for n in (10_000, 100_000, 1_000_000):
+        a_ids, b_ids, score = _batch(n, players=n)
+        players, a_idx, b_idx = index_players(a_ids, b_ids)
+        ratings = np.full(len(players), DEFAULT_MMR)
+        start = perf_counter()
+        apply_results(ratings, a_idx, b_idx, score, 32.0)
+        compute = n / (perf_counter() - start)
+
+        start = perf_counter()
+        _, backend = await store.apply("bench", a_ids, b_ids, score, 32.0)
+        e2e = n / (perf_counter() - start)
+
+        table = dict.fromkeys(players, DEFAULT_MMR)
+        sample = min(n, 100_000)
+        start = perf_counter()
+        for u, v, s in zip(a_ids[:sample], b_ids[:sample], score[:sample], strict=True):
+            table[u], table[v] = elo_update(table[u], table[v], 32.0, bool(s))
+        py = sample / (perf_counter() - start)
+        print(f"{n:>8} {compute:>12,.0f} {e2e:>13,.0f} {py:>19,.0f}  {backend}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,63 @@
+"""Build and query cost of the ALT landmark index for maps routing.
+
+Run from the repository root:  python VEZEPyGame/benchmarks/bench_route_index.py
+Uses the jittered warp grids of bench_routes.py. Reports the offline build time and file
+size, the time a worker takes to map the file, and uncached route latency with the plain
+geometric A* heuristic against the landmark heuristic.
+"""
+
+from __future__ import annotations
+
+import sys
+import tempfile
+from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from bench_routes import grid  # this directory is sys.path[0] when run as a script
+
+from VEZEPyGame.services.maps.landmarks import RoutingIndex
+from VEZEPyGame.services.maps.planner import RoutePlanner
+
+
+def _queries(planner: RoutePlanner, pairs) -> tuple[np.ndarray, float]:
+    times, settled = [], []
+    for s, t in pairs:
+        started = perf_counter()
+        _, _, k = planner.search(s, t)
+        times.append(perf_counter() - started)
+        settled.append(k)
+    return np.asarray(times) * 1000, float(np.mean(settled))
+
+
+def main(queries: int = 30, landmarks: int = 16, active: int = 4):
+    print(f"{landmarks} landmarks ({active} active per query), {queries} random pairs per graph")
+    print(
+        f"{'nodes':>8} {'build s':>8} {'MB':>6} {'open ms':>8} | {'A* p50':>8} {'p99':>8} {'settled':>8} | "
+        f"{'ALT p50':>8} {'p99':>8} {'settled':>8}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        for side in (200, 320):
+            graph = grid(side)
+            path = Path(tmp) / f"grid{side}.alt"
+            started = perf_counter()
+            RoutingIndex.build(graph, landmarks).save(path)
+            build_s = perf_counter() - started
+            started = perf_counter()
+            index = RoutingIndex.open(path, graph)
+            open_ms = (perf_counter() - started) * 1000
+            pairs = np.random.default_rng(side).integers(0, graph.nodes, (queries, 2)).tolist()
+            a_t, a_k = _queries(RoutePlanner(graph), pairs)
+            l_t, l_k = _queries(RoutePlanner(graph, index=index, active=active), pairs)
+            print(
+                f"{graph.nodes:>8} {build_s:>8.1f} {path.stat().st_size / 1e6:>6.1f} {open_ms:>8.1f} | "
+                f"{np.percentile(a_t, 50):>8.1f} {np.percentile(a_t, 99):>8.1f} {a_k:>8.0f} | "
+                f"{np.percentile(l_t, 50):>8.1f} {np.percentile(l_t, 99):>8.1f} {l_k:>8.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Route latency of the maps planner on large world graphs: A* against plain Dijkstra on
+uncached pairs, and the cost of a cached answer.
+
+Run from the repository root:  python VEZEPyGame/benchmarks/bench_routes.py
+Graphs are jittered grids (4-neighbour roads costing 1-1.5x their length) with a few
+dozen warp gates, from 10k to ~100k nodes.
+"""
+
+from __future__ import annotations
+
+import sys
+from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from VEZEPyGame.services.maps.graph import ROAD, WARP, Graph
+from VEZEPyGame.services.maps.planner import RoutePlanner
+
+
+def grid(side: int, warps: int = 32, seed: int = 5) -> Graph:
+    rng = np.random.default_rng(seed)
+    n = side * side
+    ids = np.arange(n).reshape(side, side)
+    xy = np.stack(np.meshgrid(np.arange(side), np.arange(side)), axis=-1).reshape(n, 2) * 10.0
+    xy += rng.uniform(-3, 3, xy.shape)
+    a = np.r_[ids[:, :-1].ravel(), ids[:-1, :].ravel()]
+    b = np.r_[ids[:, 1:].ravel(), ids[1:, :].ravel()]
+    ends = rng.integers(0, n, (warps, 2))
+    src = np.r_[a, b, ends[:, 0], ends[:, 1]]
+    dst = np.r_[b, a, ends[:, 1], ends[:, 0]]
+    road = np.hypot(*(xy[a] - xy[b]).T) * rng.uniform(1.0, 1.5, len(a))
+    weights = np.r_[road, road, np.full(2 * warps, 50.0)]
+    kinds = np.r_[np.full(2 * len(a), ROAD), np.full(2 * warps, WARP)]
+    return Graph([f"n{i}" for i in range(n)], xy, src, dst, weights, kinds=kinds)
+
+
+def _ms(samples) -> str:
+    s = np.asarray(samples) * 1000
+    return f"{np.percentile(s, 50):>8.1f} {np.percentile(s, 99):>8.1f}"
+
+
+def main(queries: int = 30):
+    print(f"{queries} random origin/destination pairs per graph")
+    print(
+        f"{'nodes':>8} {'MB':>6} {'load ms':>8} | {'A* p50':>8} {'p99':>8} {'settled':>8} | "
+        f"{'Dijk p50':>8} {'p99':>8} {'settled':>8} | {'cached us':>9}"
+    )
+    for side in (100, 200, 320):
+        started = perf_counter()
+        graph = grid(side)
+        planner = RoutePlanner(graph)
+        load_ms = (perf_counter() - started) * 1000
+        pairs = np.random.default_rng(side).integers(0, graph.nodes, (queries, 2)).tolist()
+        results = {}
+        for heuristic in (True, False):
+            times, settled = [], []
+            for s, t in pairs:
+                t0 = perf_counter()
+                _, _, k = planner.search(s, t, heuristic)
+                times.append(perf_counter() - t0)
+                settled.append(k)
+            results[heuristic] = (times, int(np.mean(settled)))
+        for s, t in pairs:
+            planner.route(graph.names[s], graph.names[t])
+        t0 = perf_counter()
+        for _ in range(10):
+            for s, t in pairs:
+                planner.route(graph.names[s], graph.names[t])
+        cached_us = (perf_counter() - t0) / (10 * len(pairs)) * 1e6
+        (a_t, a_k), (d_t, d_k) = results[True], results[False]
+        print(
+            f"{graph.nodes:>8} {graph.nbytes() / 1e6:>6.1f} {load_ms:>8.0f} | {_ms(a_t)} {a_k:>8} | "
+            f"{_ms(d_t)} {d_k:>8} | {cached_us:>9.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Match-formation latency per team size, and vectorized vs. pure-Python team balancing.
+
+Run from the repository root:  python VEZEPyGame/benchmarks/bench_teams.py
+"""
+
+from __future__ import annotations
+
+import random
+import sys
+from itertools import combinations
+from pathlib import Path
+from time import perf_counter, time
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from VEZEPyGame.services.matchmaking.queue import MatchQueue, Ticket
+from VEZEPyGame.services.matchmaking.teams import balance
+
+
+def balance_python(mmrs: list[int]) -> tuple[list[int], list[int]]:
+    """Reference: exhaustive split search in plain Python for a single match."""
+    total = sum(mmrs)
+    n = len(mmrs) // 2
+    best = min(
+        ((0, *rest) for rest in combinations(range(1, len(mmrs)), n - 1)),
+        key=lambda a: abs(2 * sum(mmrs[i] for i in a) - total),
+    )
+    return list(best), [i for i in range(len(mmrs)) if i not in best]
+
+
+def bench_formation(n: int, queued: int = 20_000) -> tuple[int, float]:
+    rnd = random.Random(n)
+    q = MatchQueue()
+    now = time()
+    mode = f"{n}v{n}" if n > 1 else "duel"
+    for i in range(queued):
+        q.enqueue(Ticket(now - rnd.random() * 20, f"u{i}", int(rnd.gauss(1500, 300)), "eu", mode))
+    start = perf_counter()
+    groups = q.match_all()
+    return len(groups), perf_counter() - start
+
+
+def bench_balance(n: int, matches: int = 2_000) -> tuple[float, float]:
+    rnd = np.random.default_rng(n)
+    mmrs = rnd.normal(1500, 300, size=(matches, 2 * n)).astype(int)
+    start = perf_counter()
+    balance(mmrs)
+    vec = perf_counter() - start
+    rows = mmrs.tolist()
+    start = perf_counter()
+    for row in rows:
+        balance_python(row)
+    py = perf_counter() - start
+    return vec / matches, py / matches
+
+
+def main():
+    print(
+        f"{'team':>5} {'matches':>8} {'sweep ms':>9} {'us/match':>9} {'balance us (numpy)':>19} {'balance us (python)':>20}"
+    )
+    for n in (1, 2, 3, 5):
+        formed, elapsed = bench_formation(n)
+        vec, py = bench_balance(n) if n > 1 else (0.0, 0.0)
+        per_match = elapsed / formed * 1e6 if formed else float("nan")
+        print(
+            f"{n}v{n:<3} {formed:>8} {elapsed * 1000:>9.1f} {per_match:>9.2f} {vec * 1e6:>19.2f} {py * 1e6:>20.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
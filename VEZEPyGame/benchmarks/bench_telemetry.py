@@ -0,0 +1,115 @@
+"""Events/sec accepted by one worker through POST /telemetry/bulk, then /bulk against the
+raw-body /telemetry/ingest (NDJSON, columnar, gzip) at 1k and 10k events per request.
+
+Run from the repository root:  python VEZEPyGame/benchmarks/bench_telemetry.py
+Set BENCH_REDIS=1 to XADD into REDIS_URL; otherwise the stream has no client and
+only decoding plus HTTP overhead is measured.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+import json
+import os
+import sys
+from pathlib import Path
+from time import perf_counter, time
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+import httpx
+from fastapi import FastAPI
+
+from VEZEPyGame.services.redis_pool import get_redis
+from VEZEPyGame.services.telemetry import api as tel
+from VEZEPyGame.services.telemetry.stream import TelemetryStream
+
+
+def _client():
+    return get_redis() if os.getenv("BENCH_REDIS") == "1" else None
+
+
+def _events(n: int) -> list[dict]:
+    now = time()
+    return [
+        {
+            "event": "frame",
+            "ts": now + i * 1e-3,
+            "user_id": f"u{i % 500}",
+            "payload": {"value": 16.0 + i % 7},
+        }
+        for i in range(n)
+    ]
+
+
+def _bodies(events: list[dict]) -> dict[str, tuple[str, bytes, dict]]:
+    rows = json.dumps(events).encode()
+    ndjson = b"\n".join(json.dumps(e).encode() for e in events)
+    columns = json.dumps(
+        {
+            "event": "frame",
+            "ts": [e["ts"] for e in events],
+            "user_id": [e["user_id"] for e in events],
+            "payload": [e["payload"] for e in events],
+        }
+    ).encode()
+    return {
+        "bulk (Event models)": ("/telemetry/bulk", rows, {"content-type": "application/json"}),
+        "ingest ndjson": ("/telemetry/ingest", ndjson, {"content-type": "application/x-ndjson"}),
+        "ingest ndjson+gzip": (
+            "/telemetry/ingest",
+            gzip.compress(ndjson, 1),
+            {"content-type": "application/x-ndjson", "content-encoding": "gzip"},
+        ),
+        "ingest columnar": ("/telemetry/ingest", columns, {"content-type": "application/json"}),
+    }
+
+
+async def compare(http: httpx.AsyncClient, sizes=(1_000, 10_000), rounds: int = 20):
+    print("\nendpoint               events/req   bytes/req   ms/request    events/s")
+    for size in sizes:
+        for name, (path, body, headers) in _bodies(_events(size)).items():
+            t0 = perf_counter()
+            for _ in range(rounds):
+                r = await http.post(path, content=body, headers=headers)
+                r.raise_for_status()
+            dt = (perf_counter() - t0) / rounds
+            print(f"{name:<22} {size:>10} {len(body):>11} {dt * 1e3:>12.2f} {size / dt:>11.0f}")
+
+
+async def _worker(http: httpx.AsyncClient, body: list[dict], n: int):
+    for _ in range(n):
+        r = await http.post("/telemetry/bulk", json=body)
+        r.raise_for_status()
+
+
+async def main(total: int = 200_000, batch_sizes=(100, 1000, 5000), concurrency: int = 8):
+    tel.STREAM = TelemetryStream(_client(), stream="bench:telemetry", maxlen=total)
+    tel.MAX_LAG = 1 << 62
+    app = FastAPI()
+    app.include_router(tel.router, prefix="/telemetry")
+    async with httpx.AsyncClient(
+        transport=httpx.ASGITransport(app=app), base_url="http://bench"
+    ) as http:
+        for size in batch_sizes:
+            body = _events(size)
+            requests = total // size
+
+            t0 = perf_counter()
+            await asyncio.gather(
+                *(_worker(http, body, requests // concurrency) for _ in range(concurrency))
+            )
+            dt = perf_counter() - t0
+            sent = (requests // concurrency) * concurrency * size
+            print(
+                f"batch={size:>5}  events={sent:>7}  {sent / dt:>10.0f} events/s  {dt * 1e3 / (sent / size):.2f} ms/request"
+            )
+        await compare(http)
+    if tel.STREAM._r is not None:
+        await tel.STREAM._r.delete("bench:telemetry")
+        await tel.STREAM._r.aclose()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
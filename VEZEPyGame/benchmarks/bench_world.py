@@ -0,0 +1,70 @@
+"""Cost of one authoritative world tick (vectorized step + per-room snapshot deltas) at
+growing entity counts, against the 20 and 60 Hz budgets of one core.
+
+Run from the repository root:  python VEZEPyGame/benchmarks/bench_world.py
+Entities are wandering NPCs plus 10% input-driven players, spread over 20 rooms.
+"""
+
+from __future__ import annotations
+
+import json
+import sys
+from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from VEZEPyGame.services.realtime import inputs
+from VEZEPyGame.services.world.state import NPC, World
+
+ROOMS = 20
+
+
+def build(entities: int) -> World:
+    world = World(width=2000, height=2000, seed=3)
+    players = entities // 10
+    for r in range(ROOMS):
+        world.spawn(f"m{r}", NPC, count=(entities - players) // ROOMS)
+    keys = [("w",), ("d", "shift"), ("s", "a"), ()]
+    for p in range(players):
+        frame = inputs.relay(
+            inputs.encode(1, inputs.mask_of(keys[p % 4])), inputs.InputState(), sender=p
+        )
+        assert frame is not None
+        world.on_frame(frame, f"m{p % ROOMS}")
+    world.deltas()
+    return world
+
+
+def main(ticks: int = 200, hz: float = 20.0):
+    print(f"{ticks} ticks of dt=1/{hz:g}s, {ROOMS} rooms")
+    print(
+        f"{'entities':>9} {'step ms':>8} {'deltas ms':>10} {'encode ms':>10} {'tick p99 ms':>12} {'KB/tick':>8} {'max Hz':>8}"
+    )
+    for n in (1_000, 5_000, 10_000, 50_000):
+        world = build(n)
+        step, delta, enc, total, size = [], [], [], [], 0
+        for _ in range(ticks):
+            t0 = perf_counter()
+            world.step(1 / hz)
+            t1 = perf_counter()
+            events = world.deltas()
+            t2 = perf_counter()
+            # What the loop publishes: one JSON message per room.
+            size += sum(len(json.dumps(e, separators=(",", ":"))) for _, e in events)
+            t3 = perf_counter()
+            step.append(t1 - t0)
+            delta.append(t2 - t1)
+            enc.append(t3 - t2)
+            total.append(t3 - t0)
+        mean = float(np.mean(total))
+        print(
+            f"{n:>9} {np.mean(step) * 1e3:>8.3f} {np.mean(delta) * 1e3:>10.3f} {np.mean(enc) * 1e3:>10.3f}"
+            f" {np.percentile(total, 99) * 1e3:>12.3f} {size / ticks / 1024:>8.1f} {1 / mean:>8.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
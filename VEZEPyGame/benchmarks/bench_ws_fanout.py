@@ -0,0 +1,119 @@
+"""Fan-out of game events to thousands of simulated WebSocket clients: the old sequential
+``send_json`` loop against the queued broadcaster, with a share of slow clients.
+
+Run from the repository root:  python VEZEPyGame/benchmarks/bench_ws_fanout.py
+Each simulated socket yields to the event loop per send; slow ones sleep ``SLOW_MS``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import sys
+from pathlib import Path
+from time import perf_counter
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from VEZEPyGame.services.realtime.broadcaster import Broadcaster
+
+SLOW_MS = 50
+
+
+class SimSocket:
+    def __init__(self, slow: bool):
+        self.delay = SLOW_MS / 1000 if slow else 0.0
+        self.received = 0
+        self.bytes = 0
+
+    async def _send(self, n: int):
+        await asyncio.sleep(self.delay)
+        self.received += 1
+        self.bytes += n
+
+    async def send_json(self, event: dict):
+        await self._send(len(json.dumps(event)))
+
+    async def send_text(self, msg: str):
+        await self._send(len(msg))
+
+    async def send_bytes(self, msg: bytes):
+        await self._send(len(msg))
+
+    async def close(self, code: int = 1000):
+        pass
+
+
+def _event(i: int) -> dict:
+    return {
+        "type": "input",
+        "seq": i,
+        "press": ["w", "shift"],
+        "release": ["q"],
+        "impulse": {"e": True},
+    }
+
+
+async def legacy(sockets: list[SimSocket], events: int) -> float:
+    """Publisher-side seconds per event of the old loop (it waits on every socket)."""
+    t0 = perf_counter()
+    for i in range(events):
+        for s in sockets:
+            await s.send_json(_event(i))
+    return (perf_counter() - t0) / events
+
+
+async def queued(
+    sockets: list[SimSocket], events: int, policy: str, queue_size: int
+) -> tuple[float, float, dict]:
+    b = Broadcaster(queue_size=queue_size, policy=policy)
+    for s in sockets:
+        b.connect(s)
+    publish = 0.0
+    t0 = perf_counter()
+    for i in range(events):
+        t = perf_counter()
+        b.publish(_event(i))
+        publish += perf_counter() - t
+        await asyncio.sleep(0)
+    fast = [s for s in sockets if not s.delay]
+    while any(s.received < events for s in fast):
+        await asyncio.sleep(0.001)
+    delivered = perf_counter() - t0
+    stats = b.stats(top=1)
+    b.close()
+    return publish / events, delivered, stats
+
+
+async def main(events: int = 100):
+    print(f"{events} events per run, {SLOW_MS} ms per send on slow clients")
+    print(
+        f"{'clients':>8} {'slow':>5} {'path':<22} {'publish us/event':>17} {'fast clients done s':>20} {'dropped':>8} {'max depth':>10}"
+    )
+    for clients, slow_share in ((1_000, 0.0), (5_000, 0.0), (5_000, 0.01)):
+        n_slow = int(clients * slow_share)
+        if not n_slow:
+            sockets = [SimSocket(False) for _ in range(clients)]
+            per = await legacy(sockets, events)
+            print(
+                f"{clients:>8} {n_slow:>5} {'sequential (old)':<22} {per * 1e6:>17.1f} {per * events:>20.3f} {'-':>8} {'-':>10}"
+            )
+        else:
+            # Each slow socket holds the old loop for SLOW_MS per event; estimate instead of waiting.
+            est = SLOW_MS / 1000 * n_slow
+            print(
+                f"{clients:>8} {n_slow:>5} {'sequential (old, est.)':<22} {est * 1e6:>17.0f} {est * events:>20.1f} {'-':>8} {'-':>10}"
+            )
+        for policy in ("drop_oldest", "disconnect"):
+            sockets = [SimSocket(i < n_slow) for i in range(clients)]
+            per, done, stats = await queued(sockets, events, policy, queue_size=32)
+            depth = stats["deepest"][0]["depth"] if stats["deepest"] else 0
+            print(
+                f"{clients:>8} {n_slow:>5} {'queued ' + policy:<22} {per * 1e6:>17.1f} {done:>20.3f} {stats['dropped'] + stats['cut_off']:>8} {depth:>10}"
+            )
+            if not n_slow:
+                break
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
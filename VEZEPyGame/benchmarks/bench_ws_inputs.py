@@ -0,0 +1,137 @@
+"""Input relay over the Game WebSocket: JSON events against binary delta frames.
+
+Replays a 60 Hz key stream from one sender to a match room and reports uplink and
+downlink bytes/sec and the relay latency (frame received -> queued and written to every
+subscriber's socket) of each path.
+
+Run from the repository root:  python VEZEPyGame/benchmarks/bench_ws_inputs.py
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import random
+import sys
+from pathlib import Path
+from time import perf_counter
+from typing import Any
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[2]))
+
+from VEZEPyGame.services.realtime import inputs
+from VEZEPyGame.services.realtime.broadcaster import Broadcaster
+
+HZ = 60
+# Per frame: chance a movement key flips, and chance of a one-shot impulse key.
+KEY_CHANGE_P = 0.15
+IMPULSE_P = 0.03
+
+
+class SimSocket:
+    def __init__(self):
+        self.received = 0
+        self.bytes = 0
+        self.last_at = 0.0
+
+    async def send_text(self, msg: str):
+        self.received += 1
+        self.bytes += len(msg.encode())
+        self.last_at = perf_counter()
+
+    async def send_bytes(self, msg: bytes):
+        self.received += 1
+        self.bytes += len(msg)
+        self.last_at = perf_counter()
+
+
+def key_stream(frames: int, seed: int = 7) -> list[tuple[int, int]]:
+    """(mask, impulse) per frame: held movement keys changing every few frames."""
+    rng = random.Random(seed)
+    mask, out = 0, []
+    for _ in range(frames):
+        if rng.random() < KEY_CHANGE_P:
+            mask ^= 1 << rng.randrange(6)
+        impulse = 1 << rng.choice((6, 7, 8, 9, 10)) if rng.random() < IMPULSE_P else 0
+        out.append((mask, impulse))
+    return out
+
+
+def _pct(xs: list[float], p: float) -> float:
+    xs = sorted(xs)
+    return xs[min(len(xs) - 1, int(p * len(xs)))]
+
+
+async def _deliver(subs: list[SimSocket], n: int):
+    while any(s.received < n for s in subs):
+        await asyncio.sleep(0)
+
+
+async def run_json(stream, subscribers: int):
+    b = Broadcaster(queue_size=1024)
+    subs = [SimSocket() for _ in range(subscribers)]
+    for s in subs:
+        b.connect(s, rooms=["m1"])
+    # What a JSON sender posts today: press/release lists since the previous frame.
+    prev, uplink = 0, []
+    for mask, impulse in stream:
+        changed = prev ^ mask
+        event: dict[str, Any] = {
+            "type": "input",
+            "match_id": "m1",
+            "press": list(inputs.keys_of(changed & mask)),
+            "release": list(inputs.keys_of(changed & prev)),
+        }
+        if impulse:
+            event["impulse"] = {k: True for k in inputs.keys_of(impulse)}
+        uplink.append(json.dumps(event))
+        prev = mask
+    latency = []
+    for i, text in enumerate(uplink):
+        t0 = perf_counter()
+        b.publish(json.loads(text), "m1")
+        await _deliver(subs, i + 1)
+        latency.append(max(s.last_at for s in subs) - t0)
+    b.close()
+    return sum(len(t) for t in uplink), subs[0].bytes, latency
+
+
+async def run_binary(stream, subscribers: int, json_share: float):
+    b = Broadcaster(queue_size=1024)
+    subs = [SimSocket() for _ in range(subscribers)]
+    n_json = int(subscribers * json_share)
+    for i, s in enumerate(subs):
+        b.connect(s, rooms=["m1"], binary=i >= n_json)
+    uplink, prev = [], None
+    for seq, (mask, impulse) in enumerate(stream):
+        uplink.append(inputs.encode(seq, mask, prev, impulse))
+        prev = mask
+    state = inputs.InputState()
+    latency = []
+    for i, frame in enumerate(uplink):
+        t0 = perf_counter()
+        relay = inputs.relay(frame, state, sender=1)
+        assert relay is not None  # sequence numbers only go up here
+        b.publish_frame(relay, inputs.relay_json, "m1")
+        await _deliver(subs, i + 1)
+        latency.append(max(s.last_at for s in subs) - t0)
+    b.close()
+    return sum(len(f) for f in uplink), subs[-1].bytes, latency
+
+
+async def main(frames: int = 3_000, subscribers: int = 10):
+    stream = key_stream(frames)
+    seconds = frames / HZ
+    print(f"{frames} frames at {HZ} Hz from one sender to {subscribers} subscribers in one match")
+    print(f"{'path':<30} {'up B/s':>8} {'down B/s/client':>16} {'relay p50 us':>13} {'p99 us':>8}")
+    rows = [("JSON (current)", await run_json(stream, subscribers))]
+    rows.append(("binary, all binary clients", await run_binary(stream, subscribers, 0.0)))
+    rows.append(("binary, 20% JSON clients", await run_binary(stream, subscribers, 0.2)))
+    for name, (up, down, latency) in rows:
+        print(
+            f"{name:<30} {up / seconds:>8.0f} {down / seconds:>16.0f} {_pct(latency, 0.5) * 1e6:>13.1f} {_pct(latency, 0.99) * 1e6:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
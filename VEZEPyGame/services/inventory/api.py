@@ -1,27 +1,21 @@
-from fastapi import APIRouter
-from pydantic import BaseModel
-from typing import Dict, List
 import os
 
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel
+
+from ..redis_pool import get_redis
+from .store import InventoryStore
+
 router = APIRouter()
 
-try:
-    import redis.asyncio as redis  # type: ignore
-except Exception:
-    redis = None  # type: ignore
+_store: InventoryStore | None = None
 
 
-async def _redis():
-    if redis is None:
-        class Dummy:
-            async def hgetall(self, *_args, **_kwargs):
-                return {}
-            async def hincrby(self, *_args, **_kwargs):
-                return 0
-            async def hset(self, *_args, **_kwargs):
-                return 0
-        return Dummy()
-    return redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+async def _inventory() -> InventoryStore:
+    global _store
+    if _store is None:
+        _store = InventoryStore(get_redis(), bulk_chunk=int(os.getenv("INV_BULK_CHUNK", "1000")))
+    return _store
 
 
 class AddItem(BaseModel):
@@ -30,8 +24,27 @@ class AddItem(BaseModel):
     qty: int = 1
 
 
-def _normalize_items(raw: Dict) -> List[dict]:
-    items: List[dict] = []
+class Grant(BaseModel):
+    user_id: str
+    sku: str
+    qty: int = 1
+
+
+class SkuQty(BaseModel):
+    sku: str
+    qty: int = 1
+
+
+class BulkGrant(BaseModel):
+    """Either explicit ``grants`` or every ``items`` entry to every one of ``user_ids``."""
+
+    grants: list[Grant] = []
+    user_ids: list[str] = []
+    items: list[SkuQty] = []
+
+
+def _normalize_items(raw: dict) -> list[dict]:
+    items: list[dict] = []
     for k, v in (raw or {}).items():
         sku = k.decode() if hasattr(k, "decode") else k
         try:
@@ -43,28 +56,37 @@ def _normalize_items(raw: Dict) -> List[dict]:
     return items
 
 
+@router.post("/bulk")
+async def bulk_grant(req: BulkGrant, store: InventoryStore = Depends(_inventory)):
+    """Grant many SKUs to many users at once (e.g. season rewards)."""
+    grants: dict[str, dict[str, int]] = {}
+    for g in req.grants:
+        per_user = grants.setdefault(g.user_id, {})
+        per_user[g.sku] = per_user.get(g.sku, 0) + max(1, g.qty)
+    for user_id in req.user_ids:
+        per_user = grants.setdefault(user_id, {})
+        for it in req.items:
+            per_user[it.sku] = per_user.get(it.sku, 0) + max(1, it.qty)
+    if not any(grants.values()):
+        raise HTTPException(400, "no grants")
+    batches = await store.grant_many(grants)
+    return {
+        "ok": True,
+        "users": len(grants),
+        "grants": sum(len(v) for v in grants.values()),
+        "batches": batches,
+    }
+
+
 @router.get("/{user_id}")
-async def get_inventory(user_id: str):
-    key = f"inv:{user_id}"
-    rr = await _redis()
-    raw = await rr.hgetall(key)
-    if not raw:
-        await rr.hset(key, mapping={"starter_pack": 1})
-        raw = await rr.hgetall(key)
-    items = _normalize_items(raw)
+async def get_inventory(user_id: str, store: InventoryStore = Depends(_inventory)):
+    items = _normalize_items(await store.get(user_id))
     return {"user_id": user_id, "items": items}
 
 
 @router.post("/{user_id}")
-async def add_item(user_id: str, item: AddItem):
-    key = f"inv:{user_id}"
+async def add_item(user_id: str, item: AddItem, store: InventoryStore = Depends(_inventory)):
     sku = item.sku or item.name or "mystery"
     qty = max(1, int(item.qty))
-    rr = await _redis()
-    raw = await rr.hgetall(key)
-    if not raw:
-        await rr.hset(key, mapping={"starter_pack": 1})
-    await rr.hincrby(key, sku, qty)
-    raw2 = await rr.hgetall(key)
-    items = _normalize_items(raw2)
+    items = _normalize_items(await store.grant(user_id, [(sku, qty)]))
     return {"ok": True, "user_id": user_id, "items": items}
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from collections.abc import Iterable
+
+STARTER_PACK = ("starter_pack", 1)
+
+# Seed the starter pack on first touch, apply increments, optionally return the hash.
+# KEYS[1] = inv:{user_id}; ARGV = return_items(0|1), starter_sku, starter_qty, sku1, qty1, ...
+_GRANT = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+  redis.call('HSET', KEYS[1], ARGV[2], ARGV[3])
+end
+for i = 4, #ARGV, 2 do
+  redis.call('HINCRBY', KEYS[1], ARGV[i], ARGV[i + 1])
+end
+if ARGV[1] == '1' then
+  return redis.call('HGETALL', KEYS[1])
+end
+return 1
+"""
+
+
+def _key(user_id: str) -> str:
+    return f"inv:{user_id}"
+
+
+def _as_dict(flat) -> dict:
+    return dict(zip(flat[::2], flat[1::2], strict=True))
+
+
+class InventoryStore:
+    """Inventory hashes ``inv:{user_id}``; every read or write is a single round-trip.
+
+    Without a Redis client (redis-py missing) inventories live in process memory.
+    """
+
+    def __init__(self, client=None, bulk_chunk: int = 1000):
+        self._r = client
+        self.bulk_chunk = bulk_chunk
+        self._mem: dict[str, dict[str, int]] = {}
+        self._grant = client.register_script(_GRANT) if client is not None else None
+
+    def _mem_grant(self, user_id: str, items: Iterable[tuple[str, int]]) -> dict[str, int]:
+        inv = self._mem.setdefault(user_id, {STARTER_PACK[0]: STARTER_PACK[1]})
+        for sku, qty in items:
+            inv[sku] = inv.get(sku, 0) + qty
+        return inv
+
+    async def get(self, user_id: str) -> dict:
+        return await self.grant(user_id, [])
+
+    async def grant(self, user_id: str, items: list[tuple[str, int]]) -> dict:
+        """Apply ``items`` to one user's inventory and return the resulting hash."""
+        if self._grant is None:
+            return dict(self._mem_grant(user_id, items))
+        args: list = ["1", *STARTER_PACK]
+        for sku, qty in items:
+            args += [sku, qty]
+        return _as_dict(await self._grant(keys=[_key(user_id)], args=args))
+
+    async def grant_many(self, grants: dict[str, dict[str, int]]) -> int:
+        """Apply ``{user_id: {sku: qty}}`` with one pipelined script call per user.
+
+        Commands go out in pipelines of ``bulk_chunk``; returns the number of pipelines sent.
+        """
+        if self._grant is None:
+            for user_id, items in grants.items():
+                self._mem_grant(user_id, items.items())
+            return 0
+        users = list(grants.items())
+        batches = 0
+        for i in range(0, len(users), self.bulk_chunk):
+            async with self._r.pipeline(transaction=False) as pipe:
+                for user_id, items in users[i : i + self.bulk_chunk]:
+                    args: list = ["0", *STARTER_PACK]
+                    for sku, qty in items.items():
+                        args += [sku, qty]
+                    await self._grant(keys=[_key(user_id)], args=args, client=pipe)
+                await pipe.execute()
+            batches += 1
+        return batches
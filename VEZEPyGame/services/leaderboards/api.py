@@ -1,27 +1,52 @@
-from fastapi import APIRouter
-from pydantic import BaseModel
 import os
 
-try:
-    import redis.asyncio as redis  # type: ignore
-except Exception:
-    redis = None  # type: ignore
+from fastapi import APIRouter, Depends, HTTPException
+from pydantic import BaseModel
 
+from ..redis_pool import get_redis
+from .buffer import BufferFull, ScoreBuffer
+from .repo import LeaderboardRepo, ShardedLeaderboardRepo
 
 router = APIRouter()
 
+_repo: LeaderboardRepo | None = None
+_buffer: ScoreBuffer | None = None
+
+
+def repo() -> LeaderboardRepo:
+    """Single sorted set per board by default; LB_SHARDS>1 spreads each board over N keys."""
+    global _repo
+    if _repo is None:
+        shards = int(os.getenv("LB_SHARDS", "1"))
+        top_n = int(os.getenv("LB_CACHE_TOP_N", "100"))
+        ttl = float(os.getenv("LB_CACHE_TTL_S", "2.0"))
+        if shards > 1:
+            _repo = ShardedLeaderboardRepo(get_redis(), shards=shards, top_n=top_n, cache_ttl_s=ttl)
+        else:
+            _repo = LeaderboardRepo(get_redis(), top_n=top_n, cache_ttl_s=ttl)
+    return _repo
+
+
+def score_buffer() -> ScoreBuffer | None:
+    """The write-coalescing buffer when LB_BUFFERED=1; its flush loop runs from the app lifespan."""
+    global _buffer
+    if _buffer is None and os.getenv("LB_BUFFERED", "0") in {"1", "true", "True"}:
+        _buffer = ScoreBuffer(
+            repo(),
+            policy=os.getenv("LB_SUBMIT_POLICY", "last"),
+            flush_interval_s=float(os.getenv("LB_FLUSH_INTERVAL_S", "0.25")),
+            max_pending=int(os.getenv("LB_MAX_PENDING", "50000")),
+            max_buffered=int(os.getenv("LB_MAX_BUFFERED", "0")) or None,
+        )
+    return _buffer
 
-async def _redis():
-    if redis is None:
-        class Dummy:
-            async def zadd(self, *_args, **_kwargs):
-                return 0
 
-            async def zrevrange(self, *_args, **_kwargs):
-                return []
+async def _leaderboards() -> LeaderboardRepo:
+    return repo()
 
-        return Dummy()
-    return redis.from_url(os.getenv("REDIS_URL", "redis://localhost:6379/0"))
+
+def _shed(e: BufferFull) -> HTTPException:
+    return HTTPException(503, str(e), headers={"Retry-After": "1"})
 
 
 class SubmitReq(BaseModel):
@@ -31,20 +56,111 @@ class SubmitReq(BaseModel):
     mode: str
 
 
+class RanksReq(BaseModel):
+    user_ids: list[str]
+
+
 @router.post("/submit")
-async def submit(r: SubmitReq):
-    key = f"lb:{r.season}:{r.mode}"
-    rr = await _redis()
-    await rr.zadd(key, {r.user_id: r.score})
-    return {"ok": True}
+async def submit(r: SubmitReq, repo: LeaderboardRepo = Depends(_leaderboards)):
+    buf = score_buffer()
+    if buf is None:
+        await repo.submit(r.season, r.mode, r.user_id, r.score)
+        return {"ok": True}
+    try:
+        if buf.add(r.season, r.mode, r.user_id, r.score):
+            buf.flush_soon()
+    except BufferFull as e:
+        raise _shed(e) from e
+    return {"ok": True, "buffered": True}
+
+
+@router.post("/submit/bulk")
+async def submit_bulk(items: list[SubmitReq], repo: LeaderboardRepo = Depends(_leaderboards)):
+    buf = score_buffer()
+    if buf is None:
+        boards: dict[str, dict[str, float]] = {}
+        for r in items:
+            boards.setdefault(repo.key(r.season, r.mode), {})[r.user_id] = r.score
+        await repo.submit_many(boards)
+        return {"ok": True, "accepted": len(items)}
+    # On 503 the items before the refused one are already buffered; resubmitting them
+    # is harmless, since a user keeps one score per board under every policy.
+    due = False
+    try:
+        for r in items:
+            due = buf.add(r.season, r.mode, r.user_id, r.score)
+    except BufferFull as e:
+        raise _shed(e) from e
+    finally:
+        if due:
+            buf.flush_soon()
+    return {"ok": True, "accepted": len(items), "buffered": True}
+
+
+@router.get("/buffer")
+async def buffer_stats():
+    buf = score_buffer()
+    if buf is None:
+        return {"enabled": False}
+    return {
+        "enabled": True,
+        "policy": buf.policy,
+        "pending": buf.pending,
+        "max_buffered": buf.max_buffered,
+        "interval_s": buf.flush_interval_s,
+        "last_flush": buf.last,
+    }
 
 
 @router.get("/{season}/{mode}")
-async def get_board(season: str, mode: str, limit: int = 100, offset: int = 0):
-    rr = await _redis()
-    key = f"lb:{season}:{mode}"
-    items = await rr.zrevrange(key, offset, offset + limit - 1, withscores=True)
-    return [{"user_id": u.decode() if hasattr(u, "decode") else u, "score": s} for u, s in items]
+async def get_board(
+    season: str,
+    mode: str,
+    limit: int = 100,
+    offset: int = 0,
+    repo: LeaderboardRepo = Depends(_leaderboards),
+):
+    items = await repo.page(season, mode, offset, limit)
+    return [{"user_id": u, "score": s} for u, s in items]
+
+
+@router.get("/{season}/{mode}/rank/{user_id}")
+async def get_rank(
+    season: str, mode: str, user_id: str, repo: LeaderboardRepo = Depends(_leaderboards)
+):
+    [(rank, score)] = await repo.ranks(season, mode, [user_id])
+    if rank is None:
+        raise HTTPException(404, "user not on leaderboard")
+    return {"user_id": user_id, "rank": rank, "score": score}
+
+
+@router.post("/{season}/{mode}/ranks")
+async def get_ranks(
+    season: str, mode: str, r: RanksReq, repo: LeaderboardRepo = Depends(_leaderboards)
+):
+    ranks = await repo.ranks(season, mode, r.user_ids)
+    return [
+        {"user_id": u, "rank": rank, "score": score}
+        for u, (rank, score) in zip(r.user_ids, ranks, strict=True)
+    ]
+
+
+@router.get("/{season}/{mode}/around/{user_id}")
+async def get_around(
+    season: str,
+    mode: str,
+    user_id: str,
+    radius: int = 5,
+    repo: LeaderboardRepo = Depends(_leaderboards),
+):
+    rank, entries = await repo.around(season, mode, user_id, max(0, min(radius, 50)))
+    if rank is None:
+        raise HTTPException(404, "user not on leaderboard")
+    return {
+        "user_id": user_id,
+        "rank": rank,
+        "entries": [{"rank": n, "user_id": u, "score": s} for n, u, s in entries],
+    }
 
 
 @router.get("/seasons")
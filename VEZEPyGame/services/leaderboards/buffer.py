@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import asyncio
+from time import monotonic, perf_counter
+
+from loguru import logger
+
+from ..metrics import get_or_create_counter, get_or_create_histogram
+from .repo import LeaderboardRepo
+
+FLUSH_SECONDS = get_or_create_histogram(
+    "veze_game_lb_flush_seconds",
+    "Latency of one buffered leaderboard flush",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+FLUSH_BATCH = get_or_create_histogram(
+    "veze_game_lb_flush_batch_size",
+    "Coalesced scores written by one buffered leaderboard flush",
+    buckets=(1, 10, 50, 100, 500, 1000, 5000, 10000, 50000),
+)
+
+SHED_SCORES = get_or_create_counter(
+    "veze_game_lb_shed_total", "Leaderboard scores refused because the submit buffer was full"
+)
+
+POLICIES = ("gt", "lt", "last")
+
+
+class BufferFull(RuntimeError):
+    """The buffer holds ``max_buffered`` scores (flushes keep failing); the score was not taken."""
+
+
+class ScoreBuffer:
+    """Coalesces leaderboard submissions in memory and flushes them on an interval.
+
+    Within a window each user keeps one score per board: the highest ("gt"), lowest
+    ("lt") or most recent ("last"). A flush writes one ZADD per board (GT/LT flags for
+    the matching policy) in a single pipeline, so Redis sees the same rule across windows.
+
+    Reaching ``max_pending`` starts a background flush (``flush_soon``). While Redis is
+    down the buffer keeps coalescing scores of users already in it, but refuses new ones
+    with ``BufferFull`` once it holds ``max_buffered``.
+    """
+
+    def __init__(
+        self,
+        repo: LeaderboardRepo,
+        policy: str = "last",
+        flush_interval_s: float = 0.25,
+        max_pending: int = 50_000,
+        max_buffered: int | None = None,
+    ):
+        if policy not in POLICIES:
+            raise ValueError(f"policy must be one of {POLICIES}")
+        self.repo = repo
+        self.policy = policy
+        self.flush_interval_s = flush_interval_s
+        self.max_pending = max_pending
+        self.max_buffered = max_buffered or 10 * max_pending
+        self._pending: dict[str, dict[str, float]] = {}
+        self._size = 0
+        self._early: asyncio.Task | None = None
+        # After a failed flush, early flushes wait for the next interval instead of retrying per request.
+        self._retry_at = 0.0
+        self.last: dict = {"flushes": 0, "boards": 0, "scores": 0, "flush_ms": 0.0}
+
+    @property
+    def pending(self) -> int:
+        return self._size
+
+    def _merge(self, key: str, user_id: str, score: float):
+        board = self._pending.setdefault(key, {})
+        old = board.get(user_id)
+        if old is None:
+            self._size += 1
+        elif (self.policy == "gt" and score <= old) or (self.policy == "lt" and score >= old):
+            return
+        board[user_id] = score
+
+    def add(self, season: str, mode: str, user_id: str, score: float) -> bool:
+        """Buffer one score; returns True once ``max_pending`` is reached and a flush is due.
+
+        Raises ``BufferFull`` instead when the buffer cannot take another user's score."""
+        key = self.repo.key(season, mode)
+        if self._size >= self.max_buffered and user_id not in self._pending.get(key, ()):
+            SHED_SCORES.inc()
+            raise BufferFull(f"{self._size} scores buffered; leaderboard store unavailable")
+        self._merge(key, user_id, score)
+        return self._size >= self.max_pending
+
+    async def flush(self) -> int:
+        if not self._pending:
+            return 0
+        batch, size = self._pending, self._size
+        self._pending, self._size = {}, 0
+        started = perf_counter()
+        try:
+            boards = await self.repo.submit_many(batch, self.policy)
+        except Exception:
+            # Put the window back (newer buffered scores win per policy) and retry next tick.
+            pending = self._pending
+            self._pending, self._size = batch, size
+            for key, scores in pending.items():
+                for user_id, score in scores.items():
+                    self._merge(key, user_id, score)
+            raise
+        elapsed = perf_counter() - started
+        FLUSH_SECONDS.observe(elapsed)
+        FLUSH_BATCH.observe(size)
+        self.last = {
+            "flushes": self.last["flushes"] + 1,
+            "boards": boards,
+            "scores": size,
+            "flush_ms": elapsed * 1000,
+        }
+        return size
+
+    def flush_soon(self):
+        """Flush in the background, unless a flush started this way is still running or the
+        last one failed less than ``flush_interval_s`` ago."""
+        if (self._early is None or self._early.done()) and monotonic() >= self._retry_at:
+            self._early = asyncio.create_task(self._flush_logged())
+
+    async def _flush_logged(self):
+        try:
+            await self.flush()
+        except Exception:
+            self._retry_at = monotonic() + self.flush_interval_s
+            logger.exception("leaderboard flush failed")
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval_s)
+            await self._flush_logged()
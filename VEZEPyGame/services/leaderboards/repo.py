@@ -0,0 +1,291 @@
+from __future__ import annotations
+
+import heapq
+import zlib
+from collections.abc import Sequence
+from time import monotonic
+from typing import Any
+
+Entry = tuple[str, float]
+
+# Ranks follow standard competition ranking everywhere: 1 + the number of strictly higher
+# scores, so tied members share a rank.
+
+# Rank of each member in ARGV (false when absent) and its score, in one round-trip.
+_RANKS = """
+local out = {}
+for i = 1, #ARGV do
+  local s = redis.call('ZSCORE', KEYS[1], ARGV[i])
+  if s then
+    out[#out + 1] = redis.call('ZCOUNT', KEYS[1], '(' .. s, '+inf') + 1
+    out[#out + 1] = s
+  else
+    out[#out + 1] = false
+    out[#out + 1] = false
+  end
+end
+return out
+"""
+
+# One round-trip "around me": the window of entries around the member and their ranks.
+_AROUND = """
+local r = redis.call('ZREVRANK', KEYS[1], ARGV[1])
+if not r then return false end
+local start = math.max(0, r - tonumber(ARGV[2]))
+local flat = redis.call('ZREVRANGE', KEYS[1], start, r + tonumber(ARGV[2]), 'WITHSCORES')
+local ranks = {redis.call('ZCOUNT', KEYS[1], '(' .. flat[2], '+inf') + 1}
+for i = 2, #flat / 2 do
+  ranks[i] = flat[2 * i] == flat[2 * i - 2] and ranks[i - 1] or start + i
+end
+return {r - start + 1, ranks, flat}
+"""
+
+
+def _s(v: Any) -> str:
+    return v.decode() if hasattr(v, "decode") else v
+
+
+def _pairs(flat: Sequence) -> list[Entry]:
+    return [(_s(flat[i]), float(flat[i + 1])) for i in range(0, len(flat), 2)]
+
+
+def _pairs_ws(items) -> list[Entry]:
+    return [(_s(u), float(s)) for u, s in items]
+
+
+class TopCache:
+    """Short-TTL in-process cache of each board's top entries.
+
+    ``invalidate`` clears this worker's copy on submit; other workers catch up within ``ttl_s``.
+    """
+
+    def __init__(self, ttl_s: float = 2.0):
+        self.ttl_s = ttl_s
+        self._data: dict[str, tuple[float, list[Entry]]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str) -> list[Entry] | None:
+        hit = self._data.get(key)
+        if hit is None or hit[0] < monotonic():
+            self.misses += 1
+            return None
+        self.hits += 1
+        return hit[1]
+
+    def put(self, key: str, entries: list[Entry]):
+        self._data[key] = (monotonic() + self.ttl_s, entries)
+
+    def invalidate(self, key: str):
+        self._data.pop(key, None)
+
+
+class LeaderboardRepo:
+    """Redis sorted-set leaderboards ``lb:{season}:{mode}``; ranks are 1-based and tied
+    scores share a rank.
+
+    Without a Redis client (redis-py missing) writes are dropped and reads are empty.
+    """
+
+    def __init__(self, client=None, top_n: int = 100, cache_ttl_s: float = 2.0):
+        self._r = client
+        self.top_n = top_n
+        self.cache = TopCache(cache_ttl_s)
+        self._around = client.register_script(_AROUND) if client is not None else None
+        self._ranks = client.register_script(_RANKS) if client is not None else None
+
+    @staticmethod
+    def key(season: str, mode: str) -> str:
+        return f"lb:{season}:{mode}"
+
+    async def submit(self, season: str, mode: str, user_id: str, score: float):
+        key = self.key(season, mode)
+        if self._r is not None:
+            await self._r.zadd(key, {user_id: score})
+        self.cache.invalidate(key)
+
+    async def submit_many(self, boards: dict[str, dict[str, float]], policy: str = "last") -> int:
+        """Write ``{key: {user_id: score}}`` with one ZADD per key in a single pipeline.
+
+        ``policy`` "gt"/"lt" only moves a stored score up/down (ZADD GT/LT); "last" overwrites.
+        """
+        boards = {k: v for k, v in boards.items() if v}
+        if self._r is not None and boards:
+            async with self._r.pipeline(transaction=False) as pipe:
+                for key, scores in boards.items():
+                    pipe.zadd(key, scores, gt=policy == "gt", lt=policy == "lt")
+                await pipe.execute()
+        for key in boards:
+            self.cache.invalidate(key)
+        return len(boards)
+
+    async def page(self, season: str, mode: str, offset: int = 0, limit: int = 100) -> list[Entry]:
+        if self._r is None or limit <= 0:
+            return []
+        key = self.key(season, mode)
+        if offset + limit <= self.top_n:
+            top = self.cache.get(key)
+            if top is None:
+                top = _pairs_ws(await self._r.zrevrange(key, 0, self.top_n - 1, withscores=True))
+                self.cache.put(key, top)
+            return top[offset : offset + limit]
+        return _pairs_ws(await self._r.zrevrange(key, offset, offset + limit - 1, withscores=True))
+
+    async def ranks(
+        self, season: str, mode: str, user_ids: Sequence[str]
+    ) -> list[tuple[int | None, float | None]]:
+        """(rank, score) per user in one pipelined round-trip; (None, None) when absent."""
+        if self._ranks is None or not user_ids:
+            return [(None, None)] * len(user_ids)
+        res = await self._ranks(keys=[self.key(season, mode)], args=list(user_ids))
+        return [
+            (None, None) if r is None else (int(r), float(s))
+            for r, s in zip(res[::2], res[1::2], strict=True)
+        ]
+
+    async def around(
+        self, season: str, mode: str, user_id: str, radius: int = 5
+    ) -> tuple[int | None, list[tuple[int, str, float]]]:
+        if self._around is None:
+            return None, []
+        res = await self._around(keys=[self.key(season, mode)], args=[user_id, radius])
+        if not res:
+            return None, []
+        me, ranks, flat = int(res[0]), res[1], res[2]
+        return int(ranks[me - 1]), [
+            (int(r), u, s) for r, (u, s) in zip(ranks, _pairs(flat), strict=True)
+        ]
+
+
+class ShardedLeaderboardRepo(LeaderboardRepo):
+    """Leaderboards split across ``shards`` sorted sets ``lb:{season}:{mode}:{n}`` by user hash.
+
+    Keeps the ``LeaderboardRepo`` API. Pages merge each shard's top ``offset + limit``;
+    a global rank is 1 + the number of members with a strictly higher score, counted with
+    one ZCOUNT per shard, so it is exact and matches the unsharded ranks.
+    """
+
+    def __init__(self, client=None, shards: int = 8, top_n: int = 100, cache_ttl_s: float = 2.0):
+        super().__init__(client, top_n=top_n, cache_ttl_s=cache_ttl_s)
+        self.shards = shards
+
+    def shard_keys(self, key: str) -> list[str]:
+        return [f"{key}:{n}" for n in range(self.shards)]
+
+    def shard_key(self, key: str, user_id: str) -> str:
+        return f"{key}:{zlib.crc32(user_id.encode()) % self.shards}"
+
+    async def submit(self, season: str, mode: str, user_id: str, score: float):
+        key = self.key(season, mode)
+        if self._r is not None:
+            await self._r.zadd(self.shard_key(key, user_id), {user_id: score})
+        self.cache.invalidate(key)
+
+    async def submit_many(self, boards: dict[str, dict[str, float]], policy: str = "last") -> int:
+        sharded: dict[str, dict[str, float]] = {}
+        for key, scores in boards.items():
+            for user_id, score in scores.items():
+                sharded.setdefault(self.shard_key(key, user_id), {})[user_id] = score
+        await super().submit_many(sharded, policy)
+        for key in boards:
+            self.cache.invalidate(key)
+        return len([b for b in boards.values() if b])
+
+    async def _top(self, key: str, n: int) -> list[Entry]:
+        async with self._r.pipeline(transaction=False) as pipe:
+            for sk in self.shard_keys(key):
+                pipe.zrevrange(sk, 0, n - 1, withscores=True)
+            per_shard = await pipe.execute()
+        merged = heapq.merge(*(_pairs_ws(items) for items in per_shard), key=lambda e: -e[1])
+        return list(merged)[:n]
+
+    async def page(self, season: str, mode: str, offset: int = 0, limit: int = 100) -> list[Entry]:
+        if self._r is None or limit <= 0:
+            return []
+        key = self.key(season, mode)
+        if offset + limit <= self.top_n:
+            top = self.cache.get(key)
+            if top is None:
+                top = await self._top(key, self.top_n)
+                self.cache.put(key, top)
+            return top[offset : offset + limit]
+        return (await self._top(key, offset + limit))[offset:]
+
+    async def _scores(self, key: str, user_ids: Sequence[str]) -> list[float | None]:
+        async with self._r.pipeline(transaction=False) as pipe:
+            for u in user_ids:
+                pipe.zscore(self.shard_key(key, u), u)
+            return [None if s is None else float(s) for s in await pipe.execute()]
+
+    async def ranks(
+        self, season: str, mode: str, user_ids: Sequence[str]
+    ) -> list[tuple[int | None, float | None]]:
+        if self._r is None or not user_ids:
+            return [(None, None)] * len(user_ids)
+        key = self.key(season, mode)
+        scores = await self._scores(key, user_ids)
+        present = [s for s in scores if s is not None]
+        async with self._r.pipeline(transaction=False) as pipe:
+            for s in present:
+                for sk in self.shard_keys(key):
+                    pipe.zcount(sk, f"({s}", "+inf")
+            counts = await pipe.execute()
+        out: list[tuple[int | None, float | None]] = []
+        i = 0
+        for score in scores:
+            if score is None:
+                out.append((None, None))
+            else:
+                out.append((1 + sum(counts[i : i + self.shards]), score))
+                i += self.shards
+        return out
+
+    async def around(
+        self, season: str, mode: str, user_id: str, radius: int = 5
+    ) -> tuple[int | None, list[tuple[int, str, float]]]:
+        if self._r is None:
+            return None, []
+        key = self.key(season, mode)
+        [score] = await self._scores(key, [user_id])
+        if score is None:
+            return None, []
+        shard_keys = self.shard_keys(key)
+        async with self._r.pipeline(transaction=False) as pipe:
+            for sk in shard_keys:
+                pipe.zcount(sk, f"({score}", "+inf")
+            for sk in shard_keys:
+                pipe.zrangebyscore(sk, f"({score}", "+inf", start=0, num=radius, withscores=True)
+            for sk in shard_keys:
+                pipe.zrevrangebyscore(sk, score, "-inf", start=0, num=radius + 1, withscores=True)
+            res = await pipe.execute()
+        n = self.shards
+        higher = sum(res[:n])
+        rank = 1 + higher
+        above = heapq.nsmallest(
+            radius, (e for items in res[n : 2 * n] for e in _pairs_ws(items)), key=lambda e: e[1]
+        )
+        # The lowest `radius + 1` scores <= the user's, the user included unless cut off by ties.
+        at_or_below = heapq.nlargest(
+            radius + 1, (e for items in res[2 * n :] for e in _pairs_ws(items)), key=lambda e: e[1]
+        )
+        entries: list[tuple[int, str, float]] = []
+        if above:
+            # Every score between the user's and the top of `above` is in `above`, but the
+            # top score's ties may not all be: count the members strictly above it.
+            top = above[-1][1]
+            async with self._r.pipeline(transaction=False) as pipe:
+                for sk in shard_keys:
+                    pipe.zcount(sk, f"({top}", "+inf")
+                over_top = sum(await pipe.execute())
+            for u, s in reversed(above):
+                r = 1 + over_top if s == top else 1 + higher - sum(1 for _, a in above if a <= s)
+                entries.append((r, u, s))
+        entries.append((rank, user_id, score))
+        # A lower score is only listed once all of the user's ties are, so the list counts
+        # every member between it and the user.
+        entries += [
+            (rank + sum(1 for _, b in at_or_below if b > s) if s < score else rank, u, s)
+            for u, s in at_or_below
+            if u != user_id
+        ][:radius]
+        return rank, entries
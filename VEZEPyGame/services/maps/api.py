@@ -1,7 +1,49 @@
-from fastapi import APIRouter
+import asyncio
+import math
+import os
+from pathlib import Path
+
+from fastapi import APIRouter, HTTPException
+from loguru import logger
+
+from .graph import Graph
+from .landmarks import RoutingIndex
+from .planner import RoutePlanner
 
 router = APIRouter()
 
+DEFAULT_GRAPH = Path(__file__).resolve().parent / "data" / "world.json"
+
+_planner: RoutePlanner | None = None
+
+
+def _index(graph: Graph, graph_path: Path) -> RoutingIndex | None:
+    """The landmark index at MAPS_INDEX (default: the graph file with suffix .alt), mapped
+    read-only so every worker shares one copy through the page cache."""
+    path = Path(os.getenv("MAPS_INDEX") or graph_path.with_suffix(".alt"))
+    if not path.exists():
+        return None
+    try:
+        return RoutingIndex.open(path, graph)
+    except Exception:
+        logger.exception(f"routing index {path} not usable; routing without it")
+        return None
+
+
+def planner() -> RoutePlanner:
+    """Route planner over MAPS_GRAPH (default: the bundled sample world), loaded once."""
+    global _planner
+    if _planner is None:
+        path = Path(os.getenv("MAPS_GRAPH") or DEFAULT_GRAPH)
+        graph = Graph.load(path)
+        _planner = RoutePlanner(
+            graph,
+            cache_size=int(os.getenv("MAPS_ROUTE_CACHE", "4096")),
+            index=_index(graph, path),
+            active=int(os.getenv("MAPS_ACTIVE_LANDMARKS", "4")),
+        )
+    return _planner
+
 
 @router.get("/health")
 async def health():
@@ -10,5 +52,21 @@ async def health():
 
 @router.get("/routes")
 async def routes(origin: str, dest: str):
-    # Placeholder: stub for metaverse map routing
-    return {"origin": origin, "dest": dest, "path": [origin, "warp-gate", dest]}
+    p = planner()
+    if origin not in p.graph.index or dest not in p.graph.index:
+        missing = origin if origin not in p.graph.index else dest
+        raise HTTPException(404, f"unknown node {missing!r}")
+    found = p.lookup(origin, dest)
+    if found is None:
+        # A long search would stall every other request on the event loop.
+        found = await asyncio.to_thread(p.route, origin, dest)
+    cost, path = found
+    if math.isinf(cost):
+        raise HTTPException(404, f"no route from {origin!r} to {dest!r}")
+    return {"origin": origin, "dest": dest, "path": list(path), "cost": round(cost, 3)}
+
+
+@router.get("/stats")
+async def stats():
+    """Graph size, search counts and route cache usage."""
+    return planner().stats()
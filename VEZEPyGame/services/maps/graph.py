@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import json
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Any
+
+import numpy as np
+
+ROAD, WARP = 0, 1
+
+
+class Graph:
+    """A directed, weighted world graph in CSR form.
+
+    The edges leaving node ``u`` are ``indices[indptr[u]:indptr[u + 1]]`` with ``weights``
+    and ``kinds`` (ROAD or WARP) alongside. Nodes carry 2-D coordinates for the A*
+    heuristic; ``names`` maps indices back to the ids used in the world file.
+    """
+
+    def __init__(
+        self,
+        names: Sequence[str],
+        xy: np.ndarray,
+        src: np.ndarray,
+        dst: np.ndarray,
+        weights: np.ndarray,
+        *,
+        kinds: np.ndarray | None = None,
+    ):
+        n = len(names)
+        self.names: list[str] = list(names)
+        self.index: dict[str, int] = {name: i for i, name in enumerate(self.names)}
+        if len(self.index) != n:
+            raise ValueError("duplicate node ids")
+        self.xy = np.asarray(xy, dtype=np.float64).reshape(n, 2)
+        src = np.asarray(src, dtype=np.int64)
+        order = np.argsort(src, kind="stable")
+        self.indptr = np.zeros(n + 1, dtype=np.int64)
+        np.cumsum(np.bincount(src, minlength=n), out=self.indptr[1:])
+        self.indices = np.asarray(dst, dtype=np.int32)[order]
+        self.weights = np.asarray(weights, dtype=np.float64)[order]
+        self.kinds = (
+            np.zeros(len(src), dtype=np.uint8)
+            if kinds is None
+            else np.asarray(kinds, dtype=np.uint8)
+        )[order]
+        if len(self.weights) and self.weights.min() < 0:
+            raise ValueError("edge weights must be non-negative")
+
+    @property
+    def nodes(self) -> int:
+        return len(self.names)
+
+    @property
+    def edges(self) -> int:
+        return len(self.indices)
+
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in (self.xy, self.indptr, self.indices, self.weights, self.kinds))
+
+    def edge_sources(self) -> np.ndarray:
+        return np.repeat(np.arange(self.nodes, dtype=np.int64), np.diff(self.indptr))
+
+    @classmethod
+    def from_dict(cls, world: dict[str, Any]) -> Graph:
+        """Build from ``{"nodes": [{"id", "x", "y"}], "edges": [...], "warps": [...]}``.
+
+        Edges are ``{"from", "to", "weight"?, "oneway"?}``; the weight defaults to the
+        straight-line length. Warps are ``{"from", "to", "cost", "oneway"?}`` and cost the
+        same whatever the distance. Both are two-way unless ``oneway`` is true.
+        """
+        nodes = world.get("nodes") or []
+        names = [str(n["id"]) for n in nodes]
+        index = {name: i for i, name in enumerate(names)}
+        xy = np.array(
+            [(float(n.get("x", 0.0)), float(n.get("y", 0.0))) for n in nodes], dtype=np.float64
+        ).reshape(-1, 2)
+        src: list[int] = []
+        dst: list[int] = []
+        weights: list[float] = []
+        kinds: list[int] = []
+
+        def add(e: dict[str, Any], kind: int):
+            try:
+                u, v = index[str(e["from"])], index[str(e["to"])]
+            except KeyError as missing:
+                raise ValueError(f"edge refers to unknown node {missing}") from None
+            if kind == WARP:
+                w = float(e["cost"])
+            else:
+                w = (
+                    float(e["weight"])
+                    if e.get("weight") is not None
+                    else float(np.hypot(*(xy[u] - xy[v])))
+                )
+            pairs = [(u, v)] if e.get("oneway") else [(u, v), (v, u)]
+            for a, b in pairs:
+                src.append(a)
+                dst.append(b)
+                weights.append(w)
+                kinds.append(kind)
+
+        for e in world.get("edges") or []:
+            add(e, ROAD)
+        for e in world.get("warps") or []:
+            add(e, WARP)
+        return cls(
+            names,
+            xy,
+            np.array(src, dtype=np.int64),
+            np.array(dst, dtype=np.int64),
+            np.array(weights),
+            kinds=np.array(kinds),
+        )
+
+    @classmethod
+    def load(cls, path: str | Path) -> Graph:
+        return cls.from_dict(json.loads(Path(path).read_text()))
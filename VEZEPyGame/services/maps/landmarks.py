@@ -0,0 +1,178 @@
+"""ALT routing index: exact distances to and from a few landmark nodes, precomputed
+offline and memory-mapped read-only by every worker.
+
+Build it next to the world file before deploying a new graph:
+
+    python -m VEZEPyGame.services.maps.landmarks build world.json -o world.alt
+
+By the triangle inequality ``d(L, t) - d(L, v)`` and ``d(v, L) - d(t, L)`` are lower
+bounds on ``d(v, t)`` for any landmark ``L``; ``RoutePlanner`` uses the best of them as
+its A* heuristic, which stays admissible and consistent across warps.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+import struct
+from collections.abc import Sequence
+from pathlib import Path
+from time import perf_counter
+
+import numpy as np
+
+from .graph import Graph
+
+MAGIC = b"VEZEALT1"
+# magic, nodes, landmarks, graph fingerprint; then int32 landmark ids padded to 8 bytes,
+# then float64 distances shaped (2, landmarks, nodes): [0] from each landmark, [1] to it.
+HEADER = struct.Struct("<8sIIQ")
+
+
+def fingerprint(graph: Graph) -> int:
+    """64-bit digest of the graph's topology and weights; an index only opens on its graph."""
+    h = hashlib.blake2b(digest_size=8)
+    for a in (graph.indptr, graph.indices, graph.weights):
+        h.update(np.ascontiguousarray(a).tobytes())
+    return int.from_bytes(h.digest(), "little")
+
+
+def _matrices(graph: Graph):
+    """Forward and reverse adjacency as SciPy CSR, keeping the cheapest of parallel edges."""
+    from scipy.sparse import csr_matrix  # noqa: PLC0415 - SciPy loads for offline builds only
+
+    src, dst, w = graph.edge_sources(), graph.indices.astype(np.int64), graph.weights
+    order = np.lexsort((w, dst, src))
+    src, dst, w = src[order], dst[order], w[order]
+    first = np.r_[True, (src[1:] != src[:-1]) | (dst[1:] != dst[:-1])]
+    src, dst, w = src[first], dst[first], w[first]
+    n = graph.nodes
+    return csr_matrix((w, (src, dst)), shape=(n, n)), csr_matrix((w, (dst, src)), shape=(n, n))
+
+
+class RoutingIndex:
+    """Landmark ids and their distance table, either freshly built or mapped from a file."""
+
+    def __init__(
+        self,
+        landmarks: np.ndarray,
+        dist: np.ndarray,
+        graph_fingerprint: int,
+        path: Path | None = None,
+    ):
+        self.landmarks = np.asarray(landmarks, dtype=np.int32)
+        self.dist = dist
+        self.fingerprint = graph_fingerprint
+        self.path = path
+
+    @property
+    def nodes(self) -> int:
+        return self.dist.shape[2]
+
+    @property
+    def nbytes(self) -> int:
+        return self.dist.nbytes
+
+    @classmethod
+    def build(cls, graph: Graph, landmarks: int = 16, seed: int = 0) -> RoutingIndex:
+        """Pick ``landmarks`` nodes by farthest-point selection and run Dijkstra to and from each.
+
+        Needs SciPy (installed with scikit-learn); only this offline step does.
+        """
+        from scipy.sparse.csgraph import dijkstra  # noqa: PLC0415
+
+        forward, reverse = _matrices(graph)
+        k = min(landmarks, graph.nodes)
+        dist = np.empty((2, k, graph.nodes), dtype=np.float64)
+        chosen: list[int] = []
+        # Distance to the nearest chosen landmark, either way round.
+        near = np.full(graph.nodes, np.inf)
+        start = int(np.random.default_rng(seed).integers(graph.nodes)) if graph.nodes else 0
+        for i in range(k):
+            if i == 0:
+                # Start from the node farthest from a random one: somewhere on the rim.
+                d = dijkstra(forward, indices=start)
+                lm = _farthest(d, chosen)
+            else:
+                lm = _farthest(near, chosen)
+            chosen.append(lm)
+            dist[0, i] = dijkstra(forward, indices=lm)
+            dist[1, i] = dijkstra(reverse, indices=lm)
+            np.minimum(near, np.minimum(dist[0, i], dist[1, i]), out=near)
+        return cls(np.array(chosen, dtype=np.int32), dist, fingerprint(graph))
+
+    def save(self, path: str | Path):
+        """Write the index; replaces ``path`` atomically, so workers mapping the old file keep it."""
+        path = Path(path)
+        k = len(self.landmarks)
+        ids = self.landmarks.astype("<i4").tobytes()
+        tmp = path.with_name(path.name + ".tmp")
+        with open(tmp, "wb") as f:
+            f.write(HEADER.pack(MAGIC, self.nodes, k, self.fingerprint))
+            f.write(ids + b"\0" * (-len(ids) % 8))
+            f.write(np.ascontiguousarray(self.dist, dtype="<f8").tobytes())
+        os.replace(tmp, path)
+
+    @classmethod
+    def open(cls, path: str | Path, graph: Graph) -> RoutingIndex:
+        """Map ``path`` read-only; ValueError when it is not an index of ``graph``."""
+        path = Path(path)
+        with open(path, "rb") as f:
+            magic, nodes, k, graph_fingerprint = HEADER.unpack(f.read(HEADER.size))
+            if magic != MAGIC:
+                raise ValueError(f"{path} is not a routing index")
+            landmarks = np.frombuffer(f.read(4 * k), dtype="<i4")
+        if nodes != graph.nodes or graph_fingerprint != fingerprint(graph):
+            raise ValueError(f"{path} was built for a different world graph")
+        offset = HEADER.size + 4 * k + (-4 * k % 8)
+        dist = np.memmap(path, dtype="<f8", mode="r", offset=offset, shape=(2, k, nodes))
+        return cls(landmarks, dist, graph_fingerprint, path)
+
+    def best(self, source: int, target: int, count: int) -> list[int]:
+        """The ``count`` landmarks giving the tightest bound on ``d(source, target)``."""
+        with np.errstate(invalid="ignore"):
+            bound = np.fmax(
+                self.dist[0, :, target] - self.dist[0, :, source],
+                self.dist[1, :, source] - self.dist[1, :, target],
+            )
+        return np.argsort(-np.nan_to_num(bound, nan=-np.inf), kind="stable")[:count].tolist()
+
+    def stats(self) -> dict:
+        return {
+            "landmarks": len(self.landmarks),
+            "bytes": self.nbytes,
+            "path": str(self.path) if self.path else None,
+        }
+
+
+def _farthest(d: np.ndarray, chosen: Sequence[int]) -> int:
+    """Farthest node not yet chosen; nodes unreachable so far come first."""
+    d = d.copy()
+    d[list(chosen)] = -1.0
+    unreached = np.flatnonzero(np.isinf(d))
+    return int(unreached[0]) if len(unreached) else int(np.argmax(d))
+
+
+def main(argv: Sequence[str] | None = None):
+    parser = argparse.ArgumentParser(prog="python -m VEZEPyGame.services.maps.landmarks")
+    sub = parser.add_subparsers(dest="cmd", required=True)
+    b = sub.add_parser("build", help="precompute the landmark index of a world graph file")
+    b.add_argument("graph", type=Path)
+    b.add_argument("-o", "--out", type=Path, help="output path (default: GRAPH with suffix .alt)")
+    b.add_argument("-k", "--landmarks", type=int, default=16)
+    b.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    started = perf_counter()
+    graph = Graph.load(args.graph)
+    index = RoutingIndex.build(graph, args.landmarks, args.seed)
+    out = args.out or args.graph.with_suffix(".alt")
+    index.save(out)
+    print(
+        f"{out}: {len(index.landmarks)} landmarks over {graph.nodes} nodes, "
+        f"{index.nbytes / 1e6:.1f} MB, built in {perf_counter() - started:.1f}s"
+    )
+
+
+if __name__ == "__main__":
+    main()
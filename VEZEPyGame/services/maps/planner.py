@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import heapq
+import math
+import threading
+from collections import OrderedDict
+from collections.abc import Callable
+from time import perf_counter
+from typing import Any
+
+import numpy as np
+
+from ..metrics import get_or_create_histogram
+from .graph import ROAD, WARP, Graph
+from .landmarks import RoutingIndex
+
+SEARCH_SECONDS = get_or_create_histogram(
+    "veze_game_maps_search_seconds",
+    "Latency of one uncached route search",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+
+Route = tuple[float, tuple[str, ...]]
+Heuristic = Callable[[int], float]
+
+
+def _zero(v: int) -> float:
+    return 0.0
+
+
+class RoutePlanner:
+    """Shortest routes on a ``Graph`` with A*, caching recent origin/destination pairs.
+
+    The heuristic is the straight-line distance scaled by the cheapest road cost per unit
+    of length. When warps exist it is capped by the distance to the nearest warp entrance
+    plus the cheapest warp, so it stays admissible and consistent and A* returns the same
+    routes as Dijkstra.
+
+    With a landmark ``index`` (see ``landmarks``) the heuristic is instead the best ALT
+    bound over the ``active`` landmarks that bound the query's endpoints tightest.
+    """
+
+    def __init__(
+        self,
+        graph: Graph,
+        cache_size: int = 4096,
+        index: RoutingIndex | None = None,
+        active: int = 4,
+    ):
+        self.graph = graph
+        self.index = index
+        self.active = active
+        # Per-landmark rows of the (possibly memory-mapped) table, read without copying.
+        self._from = [index.dist[0, i].data for i in range(len(index.landmarks))] if index else []
+        self._to = [index.dist[1, i].data for i in range(len(index.landmarks))] if index else []
+        g = graph
+        # Search loops index memoryviews: Python ints/floats without copying the arrays.
+        self._indptr = g.indptr.data
+        self._indices = g.indices.data
+        self._weights = g.weights.data
+        self._x = np.ascontiguousarray(g.xy[:, 0]).data
+        self._y = np.ascontiguousarray(g.xy[:, 1]).data
+        src = g.edge_sources()
+        road = g.kinds == ROAD
+        lengths = np.hypot(*(g.xy[src[road]] - g.xy[g.indices[road]]).T)
+        ok = lengths > 0
+        self.alpha = float(np.min(g.weights[road][ok] / lengths[ok])) if ok.any() else 0.0
+        warp = g.kinds == WARP
+        self.warp_min = float(g.weights[warp].min()) if warp.any() else math.inf
+        self._near_warp: memoryview | None = None
+        if warp.any():
+            entries = np.unique(src[warp])
+            near = np.full(g.nodes, np.inf)
+            for chunk in np.array_split(entries, max(1, len(entries) // 64)):
+                d = np.hypot(
+                    g.xy[:, None, 0] - g.xy[chunk, 0], g.xy[:, None, 1] - g.xy[chunk, 1]
+                ).min(axis=1)
+                np.minimum(near, d, out=near)
+            self._near_warp = (near * self.alpha + self.warp_min).data
+        self.cache_size = cache_size
+        self._cache: OrderedDict[tuple[str, str], Route] = OrderedDict()
+        self._lock = threading.Lock()  # searches run on worker threads
+        self.hits = 0
+        self.searches = 0
+        self.settled = 0
+
+    def _landmark_heuristic(self, index: RoutingIndex, source: int, target: int) -> Heuristic:
+        rows = [
+            (self._from[i], self._from[i][target], self._to[i], self._to[i][target])
+            for i in index.best(source, target, self.active)
+        ]
+
+        def h(v: int) -> float:
+            # inf - inf is nan and compares False: that landmark gives no bound for v.
+            best = 0.0
+            for f, ft, t, tt in rows:
+                x = ft - f[v]
+                best = max(best, x)
+                x = t[v] - tt
+                best = max(best, x)
+            return best
+
+        return h
+
+    def _heuristic(self, target: int) -> Heuristic:
+        a = self.alpha
+        tx, ty = self._x[target], self._y[target]
+        xs, ys, near = self._x, self._y, self._near_warp
+        hypot = math.hypot
+        if not a:
+            return _zero
+        if near is None:
+            return lambda v: a * hypot(xs[v] - tx, ys[v] - ty)
+        return lambda v: min(a * hypot(xs[v] - tx, ys[v] - ty), near[v])
+
+    def search(
+        self, source: int, target: int, heuristic: bool = True
+    ) -> tuple[float, list[int], int]:
+        """``(cost, node path, nodes settled)``; cost is ``inf`` and the path empty when
+        ``target`` is unreachable. ``heuristic=False`` runs plain Dijkstra."""
+        indptr, indices, weights = self._indptr, self._indices, self._weights
+        h: Heuristic
+        if not heuristic:
+            h = _zero
+        elif self.index is not None:
+            h = self._landmark_heuristic(self.index, source, target)
+        else:
+            h = self._heuristic(target)
+        dist: dict[int, float] = {source: 0.0}
+        prev: dict[int, int] = {}
+        heap: list[tuple[float, float, int]] = [(h(source), 0.0, source)]
+        push, pop = heapq.heappush, heapq.heappop
+        settled = 0
+        while heap:
+            _, d, u = pop(heap)
+            if d > dist[u]:
+                continue
+            settled += 1
+            if u == target:
+                break
+            for e in range(indptr[u], indptr[u + 1]):
+                v = indices[e]
+                nd = d + weights[e]
+                if nd < dist.get(v, math.inf):
+                    dist[v] = nd
+                    prev[v] = u
+                    push(heap, (nd + h(v), nd, v))
+        if target not in dist:
+            return math.inf, [], settled
+        path = [target]
+        while path[-1] != source:
+            path.append(prev[path[-1]])
+        path.reverse()
+        return dist[target], path, settled
+
+    def lookup(self, origin: str, dest: str) -> Route | None:
+        """The cached route, if any, marked as recently used."""
+        with self._lock:
+            hit = self._cache.get((origin, dest))
+            if hit is not None:
+                self._cache.move_to_end((origin, dest))
+                self.hits += 1
+            return hit
+
+    def route(self, origin: str, dest: str) -> Route:
+        """``(cost, node ids)``, cost ``inf`` when unreachable; KeyError for unknown nodes."""
+        hit = self.lookup(origin, dest)
+        if hit is not None:
+            return hit
+        g = self.graph
+        started = perf_counter()
+        cost, path, settled = self.search(g.index[origin], g.index[dest])
+        SEARCH_SECONDS.observe(perf_counter() - started)
+        found: Route = (cost, tuple(g.names[i] for i in path))
+        with self._lock:
+            self.searches += 1
+            self.settled += settled
+            self._cache[(origin, dest)] = found
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return found
+
+    def stats(self) -> dict[str, Any]:
+        g = self.graph
+        return {
+            "nodes": g.nodes,
+            "edges": g.edges,
+            "warps": int((g.kinds == WARP).sum()),
+            "graph_bytes": g.nbytes(),
+            "index": self.index.stats() if self.index is not None else None,
+            "searches": self.searches,
+            "mean_settled": self.settled / self.searches if self.searches else 0.0,
+            "cache": {"hits": self.hits, "size": len(self._cache), "max": self.cache_size},
+        }
@@ -1,60 +1,31 @@
-from fastapi import APIRouter
-from pydantic import BaseModel
-from dataclasses import dataclass
+import os
 from time import time
-from heapq import heappush, heappop
-
 
-def elo_update(r_a: float, r_b: float, k: float, a_won: bool) -> tuple[float, float]:
-    ea = 1 / (1 + 10 ** ((r_b - r_a) / 400))
-    sa = 1.0 if a_won else 0.0
-    sb = 1.0 - sa
-    r_a2 = r_a + k * (sa - ea)
-    r_b2 = r_b + k * (sb - (1 - ea))
-    return r_a2, r_b2
+import numpy as np
+from fastapi import APIRouter, HTTPException
+from pydantic import BaseModel
 
+from ..leaderboards import api as lb_api
+from ..redis_pool import get_redis
+from .matcher import BatchMatcher, match_payload, maybe_await
+from .mmr import RatingStore, elo_update  # noqa: F401  (elo_update re-exported)
+from .queue import MatchQueue, Ticket
+from .redis_queue import RedisMatchQueue
 
-@dataclass(order=True)
-class Ticket:
-    enqueued_at: float
-    user_id: str
-    mmr: int
-    region: str
-    mode: str
+router = APIRouter()
 
 
-class MatchQueue:
-    def __init__(self):
-        self._q: list[Ticket] = []
-
-    def enqueue(self, t: Ticket):
-        heappush(self._q, t)
-
-    def dequeue(self, user_id: str):
-        for i, t in enumerate(self._q):
-            if t.user_id == user_id:
-                self._q.pop(i)
-                return True
-        return False
-
-    def try_match(self, max_delta: int = 50) -> list[Ticket] | None:
-        if len(self._q) < 2:
-            return None
-        a = heappop(self._q)
-        window = max_delta + int((time() - a.enqueued_at) / 5) * 25
-        idx = next(
-            (i for i, t in enumerate(self._q) if abs(t.mmr - a.mmr) <= window and t.mode == a.mode and t.region == a.region),
-            -1,
-        )
-        if idx == -1:
-            heappush(self._q, a)
-            return None
-        b = self._q.pop(idx)
-        return [a, b]
+def _make_queue():
+    """In-process queue by default; MM_QUEUE_BACKEND=redis shares one queue across workers."""
+    if os.getenv("MM_QUEUE_BACKEND", "memory") == "redis":
+        return RedisMatchQueue(get_redis(), prefix=os.getenv("MM_REDIS_PREFIX", "mm:"))
+    return MatchQueue()
 
 
-router = APIRouter()
-QUEUE = MatchQueue()
+QUEUE = _make_queue()
+RATINGS = RatingStore(get_redis(), leaderboards=lb_api.repo())
+# Background sweep started from the app lifespan; see app.main.
+MATCHER = BatchMatcher(QUEUE, tick_s=float(os.getenv("MM_TICK_S", "1.0")))
 
 
 class EnqueueReq(BaseModel):
@@ -65,8 +36,8 @@ class EnqueueReq(BaseModel):
 
 
 @router.post("/enqueue")
-def enqueue(r: EnqueueReq):
-    QUEUE.enqueue(Ticket(time(), r.user_id, r.mmr, r.region, r.mode))
+async def enqueue(r: EnqueueReq):
+    await maybe_await(QUEUE.enqueue(Ticket(time(), r.user_id, r.mmr, r.region, r.mode)))
     return {"queued": True}
 
 
@@ -75,18 +46,64 @@ class DequeueReq(BaseModel):
 
 
 @router.post("/dequeue")
-def dequeue(r: DequeueReq):
-    return {"removed": QUEUE.dequeue(r.user_id)}
+async def dequeue(r: DequeueReq):
+    return {"removed": await maybe_await(QUEUE.dequeue(r.user_id))}
 
 
 @router.post("/match")
-def make_match():
-    pair = QUEUE.try_match()
+async def make_match():
+    pair = await maybe_await(QUEUE.try_match())
     if not pair:
         return {"found": False}
+    return match_payload(pair)
+
+
+@router.get("/stats")
+async def stats():
+    depth = await maybe_await(QUEUE.depth())
+    return {"queued": sum(depth.values()), "tick_s": MATCHER.tick_s, "last_tick": MATCHER.last}
+
+
+class MatchResult(BaseModel):
+    a: str
+    b: str
+    a_won: bool = False
+    draw: bool = False
+
+
+class ResultsBatch(BaseModel):
+    mode: str
+    season: str | None = None
+    k: float = 32.0
+    results: list[MatchResult]
+
+
+@router.post("/results")
+async def submit_results(r: ResultsBatch):
+    """Apply a batch of match outcomes to stored MMR, queued tickets and (with season) the leaderboard."""
+    if not r.results:
+        raise HTTPException(400, "results required")
+    same = next((i for i, m in enumerate(r.results) if m.a == m.b), None)
+    if same is not None:
+        raise HTTPException(400, f"a and b must differ (result {same})")
+    a_ids = [m.a for m in r.results]
+    b_ids = [m.b for m in r.results]
+    score_a = np.fromiter(
+        (0.5 if m.draw else float(m.a_won) for m in r.results),
+        dtype=np.float64,
+        count=len(r.results),
+    )
+    ratings, persisted = await RATINGS.apply(r.mode, a_ids, b_ids, score_a, r.k, season=r.season)
+    requeued = await maybe_await(QUEUE.update_mmr(ratings, r.mode))
     return {
-        "found": True,
-        "players": [t.user_id for t in pair],
-        "teams": {"A": pair[0].user_id, "B": pair[1].user_id},
-        "match_id": int(time() * 1000),
+        "applied": len(r.results),
+        "players": len(ratings),
+        "requeued": requeued,
+        "persisted": persisted,
     }
+
+
+@router.get("/mmr/{mode}/{user_id}")
+async def get_mmr(mode: str, user_id: str):
+    ratings, _ = await RATINGS.get_many(mode, [user_id])
+    return {"user_id": user_id, "mode": mode, "mmr": float(ratings[0])}
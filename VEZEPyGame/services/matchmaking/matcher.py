@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import asyncio
+import inspect
+from collections.abc import Awaitable, Callable
+from itertools import count
+from time import perf_counter, time
+from typing import Any
+
+from loguru import logger
+
+from ..metrics import get_or_create_gauge, get_or_create_histogram
+from .queue import Ticket
+
+Publish = Callable[[dict], Awaitable[Any]]
+
+TICK_SECONDS = get_or_create_histogram(
+    "veze_game_mm_tick_seconds",
+    "Wall time of one batch matchmaking sweep",
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+MATCHES_PER_TICK = get_or_create_histogram(
+    "veze_game_mm_matches_per_tick",
+    "Matches formed by one batch matchmaking sweep",
+    buckets=(0, 1, 5, 10, 50, 100, 500, 1000, 5000, 10000),
+)
+QUEUE_DEPTH = get_or_create_gauge(
+    "veze_game_mm_queue_depth", "Queued matchmaking tickets per mode:region", ["partition"]
+)
+
+_match_ids = count(int(time() * 1000))
+
+
+async def maybe_await(result):
+    """Let callers drive the in-memory ``MatchQueue`` and the async ``RedisMatchQueue`` alike."""
+    return await result if inspect.isawaitable(result) else result
+
+
+def match_payload(group: list[Ticket]) -> dict:
+    """Shape a formed match the way ``POST /matchmaking/match`` returns it.
+
+    Duels keep the single-id ``teams`` shape; team modes list the members of each side.
+    """
+    half = len(group) // 2
+    if half > 1:
+        teams: dict = {
+            "A": [t.user_id for t in group[:half]],
+            "B": [t.user_id for t in group[half:]],
+        }
+    else:
+        teams = {"A": group[0].user_id, "B": group[1].user_id}
+    return {
+        "found": True,
+        "players": [t.user_id for t in group],
+        "teams": teams,
+        "match_id": next(_match_ids),
+    }
+
+
+class BatchMatcher:
+    """Runs ``MatchQueue.match_all`` every ``tick_s`` seconds and publishes each match."""
+
+    def __init__(self, queue, tick_s: float = 1.0, max_delta: int = 50):
+        self.queue = queue
+        self.tick_s = tick_s
+        self.max_delta = max_delta
+        self.last: dict[str, Any] = {"ticks": 0, "tick_ms": 0.0, "matches": 0, "depth": {}}
+        self._partitions: set[str] = set()
+
+    async def tick(self) -> list[list[Ticket]]:
+        started = perf_counter()
+        groups = await maybe_await(self.queue.match_all(self.max_delta))
+        elapsed = perf_counter() - started
+        depth = await maybe_await(self.queue.depth())
+        TICK_SECONDS.observe(elapsed)
+        MATCHES_PER_TICK.observe(len(groups))
+        for p in self._partitions - depth.keys():
+            QUEUE_DEPTH.labels(partition=p).set(0)
+        for p, n in depth.items():
+            QUEUE_DEPTH.labels(partition=p).set(n)
+        self._partitions = set(depth)
+        self.last = {
+            "ticks": self.last["ticks"] + 1,
+            "tick_ms": elapsed * 1000,
+            "matches": len(groups),
+            "depth": depth,
+        }
+        return groups
+
+    async def run(self, publish: Publish):
+        while True:
+            started = perf_counter()
+            try:
+                for group in await self.tick():
+                    await publish({"type": "match", **match_payload(group)})
+            except Exception:
+                logger.exception("batch matchmaking tick failed")
+            await asyncio.sleep(max(0.0, self.tick_s - (perf_counter() - started)))
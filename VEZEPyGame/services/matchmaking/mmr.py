@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+from collections.abc import Iterable, Sequence
+
+import numpy as np
+
+from ..leaderboards.repo import LeaderboardRepo
+
+DEFAULT_MMR = 1500.0
+
+
+def elo_update(r_a: float, r_b: float, k: float, a_won: bool) -> tuple[float, float]:
+    ea = 1 / (1 + 10 ** ((r_b - r_a) / 400))
+    sa = 1.0 if a_won else 0.0
+    sb = 1.0 - sa
+    r_a2 = r_a + k * (sa - ea)
+    r_b2 = r_b + k * (sb - (1 - ea))
+    return r_a2, r_b2
+
+
+def apply_results(
+    ratings: np.ndarray, a_idx: np.ndarray, b_idx: np.ndarray, score_a: np.ndarray, k: float
+) -> np.ndarray:
+    """Elo over a batch of matches as one rating period.
+
+    Every match's expected score comes from the pre-batch ratings and each player's deltas
+    are summed, so a player in several matches of the batch gets all of them without the
+    batch being replayed sequentially. For a single match this equals ``elo_update``.
+    """
+    ea = 1.0 / (1.0 + 10.0 ** ((ratings[b_idx] - ratings[a_idx]) / 400.0))
+    delta = k * (score_a - ea)
+    n = len(ratings)
+    return (
+        ratings
+        + np.bincount(a_idx, weights=delta, minlength=n)
+        - np.bincount(b_idx, weights=delta, minlength=n)
+    )
+
+
+def index_players(
+    a_ids: Sequence[str], b_ids: Sequence[str]
+) -> tuple[list[str], np.ndarray, np.ndarray]:
+    """Map both sides of a batch onto one list of distinct players plus per-side indices."""
+    players = list(dict.fromkeys([*a_ids, *b_ids]))
+    pos = {u: i for i, u in enumerate(players)}
+    a_idx = np.fromiter((pos[u] for u in a_ids), dtype=np.intp, count=len(a_ids))
+    b_idx = np.fromiter((pos[u] for u in b_ids), dtype=np.intp, count=len(b_ids))
+    return players, a_idx, b_idx
+
+
+def _ratings(raw: Iterable) -> np.ndarray:
+    return np.array([DEFAULT_MMR if v is None else float(v) for v in raw], dtype=np.float64)
+
+
+class RatingStore:
+    """Per-mode MMR persisted in the Redis hash ``{prefix}{mode}``, in-memory if Redis is unavailable.
+
+    With ``season`` set, new ratings are also submitted to the ``{season}``/``{mode}``
+    board of ``leaderboards`` (so its sharding and top cache apply).
+    """
+
+    def __init__(
+        self, client=None, prefix: str = "mm:mmr:", leaderboards: LeaderboardRepo | None = None
+    ):
+        self._r = client
+        self.prefix = prefix
+        self.leaderboards = leaderboards
+        self._mem: dict[str, dict[str, float]] = {}
+
+    async def get_many(self, mode: str, user_ids: Sequence[str]) -> tuple[np.ndarray, str]:
+        if self._r is not None and user_ids:
+            try:
+                return _ratings(await self._r.hmget(self.prefix + mode, list(user_ids))), "redis"
+            except Exception:
+                pass
+        mem = self._mem.get(mode, {})
+        return _ratings(mem.get(u) for u in user_ids), "memory"
+
+    async def put_many(
+        self, mode: str, ratings: dict[str, float], season: str | None = None
+    ) -> str:
+        if self._r is not None and ratings:
+            try:
+                await self._r.hset(self.prefix + mode, mapping=ratings)
+                if season and self.leaderboards is not None:
+                    await self.leaderboards.submit_many(
+                        {self.leaderboards.key(season, mode): ratings}
+                    )
+                return "redis"
+            except Exception:
+                pass
+        self._mem.setdefault(mode, {}).update(ratings)
+        return "memory"
+
+    async def apply(
+        self,
+        mode: str,
+        a_ids: Sequence[str],
+        b_ids: Sequence[str],
+        score_a: np.ndarray,
+        k: float,
+        *,
+        season: str | None = None,
+    ) -> tuple[dict[str, float], str]:
+        players, a_idx, b_idx = index_players(a_ids, b_ids)
+        before, _ = await self.get_many(mode, players)
+        after = np.round(apply_results(before, a_idx, b_idx, score_a, k), 2)
+        ratings = dict(zip(players, after.tolist(), strict=True))
+        return ratings, await self.put_many(mode, ratings, season)
@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+from bisect import bisect_left, insort
+from dataclasses import dataclass
+from heapq import heappop, heappush
+from itertools import count
+from time import time
+
+import numpy as np
+
+from .teams import balance, team_size
+
+# Search window grows by WIDEN_STEP MMR for every WIDEN_EVERY_S seconds a ticket has waited.
+WIDEN_EVERY_S = 5
+WIDEN_STEP = 25
+# The wait-order heap is rebuilt once it holds this many entries and is mostly stale.
+COMPACT_MIN = 64
+
+
+@dataclass(order=True)
+class Ticket:
+    enqueued_at: float
+    user_id: str
+    mmr: int
+    region: str
+    mode: str
+
+
+def search_window(t: Ticket, max_delta: int, now: float) -> int:
+    return max_delta + int((now - t.enqueued_at) / WIDEN_EVERY_S) * WIDEN_STEP
+
+
+def balance_groups(groups: list[list[Ticket]]) -> list[list[Ticket]]:
+    """Reorder same-sized groups so the first half is team A and the second half team B."""
+    if not groups or len(groups[0]) == 2:
+        return groups
+    order = balance(np.array([[t.mmr for t in g] for g in groups]))
+    return [[g[j] for j in row] for g, row in zip(groups, order.tolist(), strict=True)]
+
+
+def _key(t: Ticket) -> tuple[int, float, str]:
+    return (t.mmr, t.enqueued_at, t.user_id)
+
+
+class _Bucket:
+    """Tickets of one (mode, region), kept sorted by MMR for bisect lookups."""
+
+    __slots__ = ("keys",)
+
+    def __init__(self):
+        self.keys: list[tuple[int, float, str]] = []
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def add(self, t: Ticket):
+        insort(self.keys, _key(t))
+
+    def remove(self, t: Ticket):
+        k = _key(t)
+        i = bisect_left(self.keys, k)
+        if i < len(self.keys) and self.keys[i] == k:
+            del self.keys[i]
+
+    def nearest(self, t: Ticket, k: int, window: int) -> list[str] | None:
+        """Return the ``k`` user_ids closest in MMR to ``t`` (excluding it), all within ``window``."""
+        keys = self.keys
+        i = bisect_left(keys, _key(t))
+        lo, hi = i - 1, i + 1
+        picked: list[str] = []
+        # Walk outwards from t's own slot, always taking the closer neighbour next.
+        while len(picked) < k:
+            d_lo = t.mmr - keys[lo][0] if lo >= 0 else None
+            d_hi = keys[hi][0] - t.mmr if hi < len(keys) else None
+            if d_lo is not None and (d_hi is None or d_lo <= d_hi):
+                delta, uid, lo = d_lo, keys[lo][2], lo - 1
+            elif d_hi is not None:
+                delta, uid, hi = d_hi, keys[hi][2], hi + 1
+            else:
+                return None
+            if delta > window:
+                return None
+            picked.append(uid)
+        return picked
+
+    def sweep(self, size: int, max_delta: int, now: float) -> list[list[str]]:
+        """Greedily group ``size`` MMR-adjacent tickets whose spread fits the most patient one's window."""
+        keys = self.keys
+        groups: list[list[str]] = []
+        keep: list[tuple[int, float, str]] = []
+        i = 0
+        while i + size <= len(keys):
+            grp = keys[i : i + size]
+            oldest = min(k[1] for k in grp)
+            window = max_delta + int((now - oldest) / WIDEN_EVERY_S) * WIDEN_STEP
+            if grp[-1][0] - grp[0][0] <= window:
+                groups.append([k[2] for k in grp])
+                i += size
+            else:
+                keep.append(keys[i])
+                i += 1
+        keep.extend(keys[i:])
+        self.keys = keep
+        return groups
+
+
+class MatchQueue:
+    """Matchmaking queue partitioned by (mode, region).
+
+    Each partition is an MMR-sorted list, so finding a partner is a bisect plus a look at
+    the neighbouring slots instead of a scan over every queued ticket. Oldest-first order
+    comes from a heap with lazy deletion; cancellation goes through the ``user_id`` index.
+    A user holds at most one ticket; enqueueing again replaces the previous one.
+    """
+
+    def __init__(self):
+        self._by_id: dict[str, Ticket] = {}
+        self._buckets: dict[tuple[str, str], _Bucket] = {}
+        self._order: list[tuple[float, int, Ticket]] = []
+        self._seq = count()
+
+    def __len__(self) -> int:
+        return len(self._by_id)
+
+    def __contains__(self, user_id: str) -> bool:
+        return user_id in self._by_id
+
+    def get(self, user_id: str) -> Ticket | None:
+        return self._by_id.get(user_id)
+
+    def depth(self) -> dict[str, int]:
+        """Queued tickets per ``mode:region`` partition."""
+        return {f"{m}:{r}": len(b) for (m, r), b in self._buckets.items() if len(b)}
+
+    def enqueue(self, t: Ticket):
+        self.dequeue(t.user_id)
+        self._by_id[t.user_id] = t
+        self._buckets.setdefault((t.mode, t.region), _Bucket()).add(t)
+        heappush(self._order, (t.enqueued_at, next(self._seq), t))
+
+    def dequeue(self, user_id: str) -> bool:
+        t = self._by_id.pop(user_id, None)
+        if t is None:
+            return False
+        self._buckets[(t.mode, t.region)].remove(t)
+        self._compact()
+        return True
+
+    def update_mmr(self, ratings: dict[str, float], mode: str) -> int:
+        """Re-score queued ``mode`` tickets of rated players, keeping their place in the wait order.
+
+        Ratings are per mode, so a ticket queued for another mode keeps its MMR.
+        """
+        updated = 0
+        for uid in ratings.keys() & self._by_id.keys():
+            t = self._by_id[uid]
+            mmr = round(ratings[uid])
+            if t.mode == mode and mmr != t.mmr:
+                self._buckets[(t.mode, t.region)].remove(t)
+                t.mmr = mmr
+                self._buckets[(t.mode, t.region)].add(t)
+                updated += 1
+        return updated
+
+    def _compact(self):
+        # Heap entries of removed tickets are skipped lazily in _oldest(); rebuild once mostly stale.
+        if len(self._order) > COMPACT_MIN and len(self._order) > 2 * len(self._by_id):
+            self._order = [e for e in self._order if self._by_id.get(e[2].user_id) is e[2]]
+            self._order.sort()
+
+    def _oldest(self) -> Ticket | None:
+        while self._order:
+            t = self._order[0][2]
+            if self._by_id.get(t.user_id) is t:
+                return t
+            heappop(self._order)
+        return None
+
+    def try_match(self, max_delta: int = 50) -> list[Ticket] | None:
+        """Match the longest-waiting ticket with the closest-MMR tickets in its partition.
+
+        Duel modes return ``[a, b]``; team modes (``"2v2"``, ``"5v5"``) return 2N tickets
+        with team A in the first half and team B in the second.
+        """
+        if len(self._by_id) < 2:
+            return None
+        a = self._oldest()
+        if a is None:
+            return None
+        bucket = self._buckets[(a.mode, a.region)]
+        others = bucket.nearest(a, 2 * team_size(a.mode) - 1, search_window(a, max_delta, time()))
+        if others is None:
+            return None
+        group = [a] + [self._by_id[uid] for uid in others]
+        for t in group:
+            self.dequeue(t.user_id)
+        return balance_groups([group])[0]
+
+    def match_all(self, max_delta: int = 50, now: float | None = None) -> list[list[Ticket]]:
+        """Form every feasible match across all partitions in one pass."""
+        now = time() if now is None else now
+        matches: list[list[Ticket]] = []
+        for (mode, _region), bucket in self._buckets.items():
+            groups = bucket.sweep(2 * team_size(mode), max_delta, now)
+            matches.extend(balance_groups([[self._by_id.pop(uid) for uid in g] for g in groups]))
+        self._compact()
+        return matches
@@ -0,0 +1,284 @@
+from __future__ import annotations
+
+import json
+from time import time
+from typing import Any
+
+from .queue import WIDEN_EVERY_S, WIDEN_STEP, Ticket, balance_groups
+from .teams import team_size
+
+# Layout under the key prefix (default "mm:"):
+#   {prefix}t              HASH  user_id -> JSON [mmr, enqueued_at, mode, region]
+#   {prefix}enq            ZSET  user_id scored by enqueued_at (oldest-first index)
+#   {prefix}q:{mode}:{region}  ZSET  user_id scored by MMR, one per partition
+#   {prefix}parts          SET   "mode:region" of partitions that may hold tickets
+# Scripts build partition keys from ARGV, so this layout targets a single Redis node.
+
+_ENQUEUE = """
+local prefix, uid = ARGV[1], ARGV[2]
+local old = redis.call('HGET', KEYS[1], uid)
+if old then
+  local o = cjson.decode(old)
+  redis.call('ZREM', prefix .. 'q:' .. o[3] .. ':' .. o[4], uid)
+end
+redis.call('HSET', KEYS[1], uid, cjson.encode({ARGV[3], ARGV[4], ARGV[5], ARGV[6]}))
+redis.call('ZADD', KEYS[2], ARGV[4], uid)
+redis.call('ZADD', prefix .. 'q:' .. ARGV[5] .. ':' .. ARGV[6], ARGV[3], uid)
+redis.call('SADD', KEYS[3], ARGV[5] .. ':' .. ARGV[6])
+return 1
+"""
+
+_DEQUEUE = """
+local prefix, uid = ARGV[1], ARGV[2]
+local old = redis.call('HGET', KEYS[1], uid)
+if not old then return 0 end
+local o = cjson.decode(old)
+redis.call('ZREM', prefix .. 'q:' .. o[3] .. ':' .. o[4], uid)
+redis.call('ZREM', KEYS[2], uid)
+redis.call('HDEL', KEYS[1], uid)
+return 1
+"""
+
+# Re-score queued tickets of one mode in place; ARGV = prefix, mode, uid1, mmr1, uid2, mmr2, ...
+_RESCORE = """
+local prefix, mode, n = ARGV[1], ARGV[2], 0
+for i = 3, #ARGV, 2 do
+  local raw = redis.call('HGET', KEYS[1], ARGV[i])
+  local o = raw and cjson.decode(raw)
+  if o and o[3] == mode then
+    o[1] = ARGV[i + 1]
+    redis.call('HSET', KEYS[1], ARGV[i], cjson.encode(o))
+    redis.call('ZADD', prefix .. 'q:' .. o[3] .. ':' .. o[4], ARGV[i + 1], ARGV[i])
+    n = n + 1
+  end
+end
+return n
+"""
+
+# Ticket ARGV[7] plus its (size - 1) nearest-MMR neighbours, all within its widened window.
+# The caller sized the group from the ticket's mode (ARGV[8]); returns 0 without matching
+# when that ticket has since been matched, dequeued or re-enqueued in another mode.
+_TRY_MATCH = """
+local prefix = ARGV[1]
+local now, max_delta = tonumber(ARGV[2]), tonumber(ARGV[3])
+local every, step, size = tonumber(ARGV[4]), tonumber(ARGV[5]), tonumber(ARGV[6])
+local uid = ARGV[7]
+local raw = redis.call('HGET', KEYS[1], uid)
+if not raw then return 0 end
+local t = cjson.decode(raw)
+if t[3] ~= ARGV[8] then return 0 end
+local mmr = tonumber(t[1])
+local window = max_delta + math.floor((now - tonumber(t[2])) / every) * step
+local part = prefix .. 'q:' .. t[3] .. ':' .. t[4]
+local need = size - 1
+local r = redis.call('ZRANK', part, uid)
+local lo_start = math.max(0, r - need)
+local span = redis.call('ZRANGE', part, lo_start, r + need, 'WITHSCORES')
+local uids, mmrs = {}, {}
+for i = 1, #span, 2 do
+  uids[#uids + 1] = span[i]
+  mmrs[#mmrs + 1] = tonumber(span[i + 1])
+end
+local self_i = r - lo_start + 1
+local lo, hi = self_i - 1, self_i + 1
+local group = {uid}
+while #group < size do
+  local d_lo = lo >= 1 and (mmr - mmrs[lo]) or nil
+  local d_hi = hi <= #uids and (mmrs[hi] - mmr) or nil
+  local pick, delta
+  if d_lo and (not d_hi or d_lo <= d_hi) then
+    pick, delta, lo = lo, d_lo, lo - 1
+  elseif d_hi then
+    pick, delta, hi = hi, d_hi, hi + 1
+  else
+    return {}
+  end
+  if delta > window then return {} end
+  group[#group + 1] = uids[pick]
+end
+local out = {}
+for _, g in ipairs(group) do
+  out[#out + 1] = g
+  out[#out + 1] = redis.call('HGET', KEYS[1], g)
+  redis.call('ZREM', part, g)
+  redis.call('ZREM', KEYS[2], g)
+  redis.call('HDEL', KEYS[1], g)
+end
+return out
+"""
+
+# Greedy sweep of one page of a partition: from MMR rank ARGV[6], take up to ARGV[7]
+# tickets and group `size` adjacent ones whose spread fits the window of the longest-waiting
+# member. Returns {next rank or -1 when the partition is done, uid, ticket, uid, ticket, ...};
+# tickets left unmatched at the end of a page are looked at again with the next one.
+_SWEEP = """
+local now, max_delta = tonumber(ARGV[1]), tonumber(ARGV[2])
+local every, step, size = tonumber(ARGV[3]), tonumber(ARGV[4]), tonumber(ARGV[5])
+local start, page = tonumber(ARGV[6]), tonumber(ARGV[7])
+local members = redis.call('ZRANGE', KEYS[3], start, start + page - 1, 'WITHSCORES')
+local n = #members / 2
+if n < size then return {-1} end
+local uids, mmrs, raws, enqs = {}, {}, {}, {}
+for i = 1, n do
+  uids[i] = members[2 * i - 1]
+  mmrs[i] = tonumber(members[2 * i])
+end
+local chunk = redis.call('HMGET', KEYS[1], unpack(uids))
+for j, raw in ipairs(chunk) do
+  raws[j] = raw
+  enqs[j] = tonumber(cjson.decode(raw)[2])
+end
+local out = {-1}
+local i, kept = 1, 0
+while i + size - 1 <= n do
+  local oldest = enqs[i]
+  for j = i + 1, i + size - 1 do
+    if enqs[j] < oldest then oldest = enqs[j] end
+  end
+  local window = max_delta + math.floor((now - oldest) / every) * step
+  if mmrs[i + size - 1] - mmrs[i] <= window then
+    for j = i, i + size - 1 do
+      out[#out + 1] = uids[j]
+      out[#out + 1] = raws[j]
+      redis.call('ZREM', KEYS[3], uids[j])
+      redis.call('ZREM', KEYS[2], uids[j])
+      redis.call('HDEL', KEYS[1], uids[j])
+    end
+    i = i + size
+  else
+    i = i + 1
+    kept = kept + 1
+  end
+end
+if n == page then out[1] = start + kept end
+return out
+"""
+
+
+def _s(v: Any) -> str:
+    return v.decode() if isinstance(v, bytes) else v
+
+
+def _ticket(uid: Any, raw: Any) -> Ticket:
+    mmr, enqueued_at, mode, region = json.loads(raw)
+    return Ticket(float(enqueued_at), _s(uid), int(mmr), region, mode)
+
+
+def _groups(flat: list, size: int) -> list[list[Ticket]]:
+    tickets = [_ticket(flat[i], flat[i + 1]) for i in range(0, len(flat), 2)]
+    return [tickets[i : i + size] for i in range(0, len(tickets), size)]
+
+
+class RedisMatchQueue:
+    """Matchmaking queue shared by every Game worker through Redis.
+
+    Mirrors ``MatchQueue`` (async): partitions are MMR-scored sorted sets, an enqueue-time
+    sorted set gives oldest-first order, and each mutation runs as one Lua script so
+    concurrent workers never hand the same ticket to two matches. Only the worker holding
+    the short sweep lock runs ``match_all`` in a given tick.
+    """
+
+    def __init__(
+        self, client, prefix: str = "mm:", sweep_lock_ms: int = 1000, sweep_page: int = 1000
+    ):
+        self._r = client
+        self.prefix = prefix
+        self.sweep_lock_ms = sweep_lock_ms
+        # Tickets one sweep script call looks at, bounding how long it holds Redis.
+        self.sweep_page = sweep_page
+        self._tickets = f"{prefix}t"
+        self._enq = f"{prefix}enq"
+        self._parts = f"{prefix}parts"
+        self._enqueue = client.register_script(_ENQUEUE)
+        self._dequeue = client.register_script(_DEQUEUE)
+        self._try_match = client.register_script(_TRY_MATCH)
+        self._sweep = client.register_script(_SWEEP)
+        self._rescore = client.register_script(_RESCORE)
+
+    def _part_key(self, partition: str) -> str:
+        return f"{self.prefix}q:{partition}"
+
+    async def enqueue(self, t: Ticket):
+        await self._enqueue(
+            keys=[self._tickets, self._enq, self._parts],
+            args=[self.prefix, t.user_id, t.mmr, repr(t.enqueued_at), t.mode, t.region],
+        )
+
+    async def dequeue(self, user_id: str) -> bool:
+        return bool(
+            await self._dequeue(keys=[self._tickets, self._enq], args=[self.prefix, user_id])
+        )
+
+    async def get(self, user_id: str) -> Ticket | None:
+        raw = await self._r.hget(self._tickets, user_id)
+        return _ticket(user_id, raw) if raw else None
+
+    async def update_mmr(self, ratings: dict[str, float], mode: str) -> int:
+        items = [(uid, round(r)) for uid, r in ratings.items()]
+        updated = 0
+        for i in range(0, len(items), 1000):
+            args: list = [self.prefix, mode]
+            for uid, mmr in items[i : i + 1000]:
+                args += [uid, mmr]
+            updated += int(await self._rescore(keys=[self._tickets], args=args))
+        return updated
+
+    async def depth(self) -> dict[str, int]:
+        parts = sorted(_s(p) for p in await self._r.smembers(self._parts))
+        async with self._r.pipeline(transaction=False) as pipe:
+            for p in parts:
+                pipe.zcard(self._part_key(p))
+            sizes = await pipe.execute()
+        return {p: int(n) for p, n in zip(parts, sizes, strict=True) if n}
+
+    async def try_match(self, max_delta: int = 50, attempts: int = 3) -> list[Ticket] | None:
+        for _ in range(attempts):
+            oldest = await self._r.zrange(self._enq, 0, 0)
+            if not oldest:
+                return None
+            t = await self.get(_s(oldest[0]))
+            if t is None:
+                continue
+            flat = await self._try_match(
+                keys=[self._tickets, self._enq],
+                args=[
+                    self.prefix,
+                    repr(time()),
+                    max_delta,
+                    WIDEN_EVERY_S,
+                    WIDEN_STEP,
+                    2 * team_size(t.mode),
+                    t.user_id,
+                    t.mode,
+                ],
+            )
+            if flat == 0:
+                continue  # another worker took or changed that ticket first
+            return balance_groups(_groups(flat, len(flat) // 2))[0] if flat else None
+        return None
+
+    async def match_all(self, max_delta: int = 50, now: float | None = None) -> list[list[Ticket]]:
+        now = time() if now is None else now
+        if not await self._r.set(f"{self.prefix}sweep-lock", "1", nx=True, px=self.sweep_lock_ms):
+            return []
+        matches: list[list[Ticket]] = []
+        for partition in sorted(_s(p) for p in await self._r.smembers(self._parts)):
+            mode = partition.split(":", 1)[0]
+            size = 2 * team_size(mode)
+            cursor = 0
+            while cursor >= 0:
+                cursor, *flat = await self._sweep(
+                    keys=[self._tickets, self._enq, self._part_key(partition)],
+                    args=[
+                        repr(now),
+                        max_delta,
+                        WIDEN_EVERY_S,
+                        WIDEN_STEP,
+                        size,
+                        cursor,
+                        max(self.sweep_page, 2 * size),
+                    ],
+                )
+                if flat:
+                    matches.extend(balance_groups(_groups(flat, size)))
+        return matches
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+import re
+from functools import cache
+from itertools import combinations
+
+import numpy as np
+
+# Largest team size balanced by exhaustive search: C(2n-1, n-1) splits, 462 at n=6.
+EXHAUSTIVE_MAX = 6
+
+_TEAM_MODE = re.compile(r"^(\d+)v(\d+)$")
+
+
+def team_size(mode: str) -> int:
+    """Players per team for a mode: ``"5v5"`` → 5; any other mode is a 1v1 duel."""
+    m = _TEAM_MODE.match(mode)
+    if m and m.group(1) == m.group(2) and int(m.group(1)) > 0:
+        return int(m.group(1))
+    return 1
+
+
+@cache
+def _splits(n: int) -> np.ndarray:
+    """All team-A membership masks of 2n players, shape (C, 2n); player 0 is always on A."""
+    rows = [(0, *rest) for rest in combinations(range(1, 2 * n), n - 1)]
+    masks = np.zeros((len(rows), 2 * n), dtype=bool)
+    for r, members in enumerate(rows):
+        masks[r, list(members)] = True
+    return masks
+
+
+@cache
+def _snake(n: int) -> np.ndarray:
+    """Snake-draft picks over players sorted by MMR descending: A B B A A B B A ..."""
+    pick_a = np.array([(i % 4) in (0, 3) for i in range(2 * n)])
+    return np.concatenate([np.flatnonzero(pick_a), np.flatnonzero(~pick_a)])
+
+
+def balance(mmrs: np.ndarray) -> np.ndarray:
+    """Split each row of an (M, 2n) MMR matrix into two teams with the closest MMR totals.
+
+    Returns an (M, 2n) array of column indices per row: team A in the first n slots,
+    team B in the last n. Small teams use an exhaustive search over every split, evaluated
+    for all M rows in one matrix product; larger teams fall back to a snake draft.
+    """
+    mmrs = np.asarray(mmrs, dtype=np.float64)
+    m, players = mmrs.shape
+    n = players // 2
+    if n == 1:
+        return np.tile(np.arange(2), (m, 1))
+    if n <= EXHAUSTIVE_MAX:
+        masks = _splits(n)
+        team_a = mmrs @ masks.T  # (M, C) team-A totals for every split
+        best = np.abs(2 * team_a - mmrs.sum(axis=1, keepdims=True)).argmin(axis=1)
+        # Stable sort on "not in A" puts team A's columns first, each in original order.
+        return np.argsort(~masks[best], axis=1, kind="stable")
+    by_mmr = np.argsort(-mmrs, axis=1, kind="stable")
+    return by_mmr[:, _snake(n)]
@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from fastapi import Response
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+
+
+# Services may be imported both as ``services.*`` and ``VEZEPyGame.services.*``; reuse
+# collectors that are already registered instead of failing on the duplicate name.
+def _existing(name: str, kind: type):
+    try:
+        existing = REGISTRY._names_to_collectors.get(name)
+        if isinstance(existing, kind):
+            return existing
+    except Exception:
+        pass
+    return None
+
+
+def get_or_create_counter(name: str, doc: str, labels: list[str] | None = None) -> Counter:
+    return _existing(name, Counter) or Counter(name, doc, labels or [])
+
+
+def get_or_create_gauge(name: str, doc: str, labels: list[str] | None = None) -> Gauge:
+    return _existing(name, Gauge) or Gauge(name, doc, labels or [])
+
+
+def get_or_create_histogram(
+    name: str, doc: str, buckets: tuple[float, ...], labels: list[str] | None = None
+) -> Histogram:
+    return _existing(name, Histogram) or Histogram(name, doc, labels or [], buckets=buckets)
+
+
+def metrics_response() -> Response:
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
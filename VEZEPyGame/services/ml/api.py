@@ -1,9 +1,68 @@
+"""ML service."""
+
+import os
+
 from fastapi import APIRouter, HTTPException
 from pydantic import BaseModel
-import math
+
+from ..redis_pool import get_redis
+from ..telemetry.ingest_worker import TelemetryConsumer
+from ..telemetry.stream import TelemetryStream
+from .batching import MicroBatcher
+from .bot_stream import BotDetector, UserWindows
+from .registry import from_env
+from .scoring import BOT_THRESHOLD
 
 router = APIRouter()
 
+# Warm-loaded from the app lifespan; models load lazily on first use otherwise.
+REGISTRY = from_env()
+
+# Single-item requests arriving within this window are scored in one vectorized call; 0 disables.
+MICROBATCH_WAIT_MS = float(os.getenv("ML_MICROBATCH_WAIT_MS", "2"))
+MICROBATCH_MAX = int(os.getenv("ML_MICROBATCH_MAX", "1024"))
+
+
+async def _skills(rows: list[list[float]]) -> list[float]:
+    return (await REGISTRY.predict_rows("skill", rows)).tolist()
+
+
+async def _bots(rows: list[list[float]]) -> list[float]:
+    return (await REGISTRY.predict_rows("bot", rows)).tolist()
+
+
+SKILL_BATCHER = MicroBatcher("skill", _skills, MICROBATCH_MAX, MICROBATCH_WAIT_MS)
+BOT_BATCHER = MicroBatcher("bot", _bots, MICROBATCH_MAX, MICROBATCH_WAIT_MS)
+
+_detector: tuple[BotDetector, TelemetryConsumer] | None = None
+
+
+def bot_detection() -> tuple[BotDetector, TelemetryConsumer] | None:
+    """Streaming bot detection when BOT_DETECT_ENABLED=1: the detector and the telemetry
+    consumer feeding it (own consumer group, so it sees every event). Both loops run from
+    the app lifespan; run one instance per deployment."""
+    global _detector
+    if _detector is None and os.getenv("BOT_DETECT_ENABLED", "0") in {"1", "true", "True"}:
+        windows = UserWindows(
+            window=int(os.getenv("BOT_WINDOW", "64")),
+            max_users=int(os.getenv("BOT_MAX_USERS", "50000")),
+            idle_s=float(os.getenv("BOT_IDLE_S", "600")),
+            value_field=os.getenv("TEL_VALUE_FIELD", "value"),
+        )
+        detector = BotDetector(
+            windows,
+            REGISTRY,
+            get_redis(),
+            channel=os.getenv("BOT_CHANNEL", "bot:flagged"),
+            interval_s=float(os.getenv("BOT_SCORE_INTERVAL_S", "5")),
+            min_events=int(os.getenv("BOT_MIN_EVENTS", "8")),
+        )
+        stream = TelemetryStream(
+            get_redis(), stream=os.getenv("TEL_STREAM", "telemetry"), group="bot-detect"
+        )
+        _detector = (detector, TelemetryConsumer(stream, windows, name="bot-detect"))
+    return _detector
+
 
 class SkillReq(BaseModel):
     features: list[float]
@@ -13,13 +72,29 @@ class SkillRes(BaseModel):
     skill: float
 
 
+class SkillBatchReq(BaseModel):
+    features: list[list[float]]
+
+
+class SkillBatchRes(BaseModel):
+    skills: list[float]
+
+
 @router.post("/predict_skill", response_model=SkillRes)
-def predict_skill(r: SkillReq):
+async def predict_skill(r: SkillReq):
     if not r.features:
         raise HTTPException(400, "features required")
-    # Dev stub: compute a normalized score
-    s = sum(max(0.0, x) for x in r.features) / (len(r.features) or 1)
-    return SkillRes(skill=float(s))
+    if MICROBATCH_WAIT_MS > 0:
+        return SkillRes(skill=await SKILL_BATCHER.submit(r.features))
+    return SkillRes(skill=(await _skills([r.features]))[0])
+
+
+@router.post("/predict_skill/batch", response_model=SkillBatchRes)
+async def predict_skill_batch(r: SkillBatchReq):
+    empty = next((i for i, row in enumerate(r.features) if not row), None)
+    if empty is not None:
+        raise HTTPException(400, f"features required (row {empty})")
+    return SkillBatchRes(skills=await _skills(r.features))
 
 
 class BotReq(BaseModel):
@@ -31,7 +106,70 @@ class BotRes(BaseModel):
     score: float
 
 
+class BotBatchReq(BaseModel):
+    signals: list[list[float]]
+
+
+class BotBatchRes(BaseModel):
+    is_bot: list[bool]
+    scores: list[float]
+
+
 @router.post("/detect_bot", response_model=BotRes)
-def detect_bot(r: BotReq):
-    score = float(min(1.0, max(0.0, (sum(r.signals) / (len(r.signals) or 1)) / 100.0)))
-    return BotRes(is_bot=score > 0.7, score=score)
+async def detect_bot(r: BotReq):
+    if MICROBATCH_WAIT_MS > 0:
+        score = await BOT_BATCHER.submit(r.signals)
+    else:
+        score = (await _bots([r.signals]))[0]
+    return BotRes(is_bot=score > BOT_THRESHOLD, score=score)
+
+
+@router.post("/detect_bot/batch", response_model=BotBatchRes)
+async def detect_bot_batch(r: BotBatchReq):
+    scores = await _bots(r.signals)
+    return BotBatchRes(is_bot=[s > BOT_THRESHOLD for s in scores], scores=scores)
+
+
+@router.get("/bots")
+async def bot_stats():
+    """Tracked users, window memory and the last scoring pass of streaming bot detection."""
+    bots = bot_detection()
+    if bots is None:
+        return {"enabled": False}
+    return {"enabled": True, **bots[0].stats()}
+
+
+class ReloadReq(BaseModel):
+    path: str | None = None
+    version: str | None = None
+
+
+@router.get("/models")
+async def models_status():
+    """Active version, load time and inference latency histogram of each resident model."""
+    return REGISTRY.status()
+
+
+@router.post("/models/{name}/reload")
+async def reload_model(name: str, r: ReloadReq | None = None):
+    """Load a new version (default: ``{ML_MODEL_DIR}/{name}/latest.*``) and swap it in."""
+    r = r or ReloadReq()
+    path = None
+    if r.path is not None:
+        path = (REGISTRY.root / r.path).resolve()
+        if not path.is_relative_to(REGISTRY.root.resolve()):
+            raise HTTPException(400, "model path must be inside ML_MODEL_DIR")
+        if not path.exists():
+            raise HTTPException(404, f"no model file {r.path}")
+    try:
+        loaded = await REGISTRY.load(name, path, r.version)
+    except KeyError as e:
+        raise HTTPException(404, str(e)) from e
+    except ValueError as e:
+        raise HTTPException(400, str(e)) from e
+    return {
+        "name": name,
+        "version": loaded.version,
+        "source": loaded.source,
+        "load_ms": loaded.load_ms,
+    }
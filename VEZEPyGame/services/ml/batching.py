@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable, Sequence
+from typing import Any, Generic, TypeVar
+
+from ..metrics import get_or_create_histogram
+
+T = TypeVar("T")
+
+BATCH_SIZE = get_or_create_histogram(
+    "veze_game_ml_microbatch_size",
+    "Single-item ML requests coalesced into one vectorized call",
+    buckets=(1, 2, 4, 8, 16, 32, 64, 128, 256, 512, 1024),
+    labels=["model"],
+)
+
+
+class MicroBatcher(Generic[T]):
+    """Coalesces concurrent single-item calls into one ``await fn(items) -> results``.
+
+    The first item of a batch waits at most ``max_wait_ms`` for company; a batch reaching
+    ``max_batch`` items is run at once. Must be used from a single event loop.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[[list[T]], Awaitable[Sequence[Any]]],
+        max_batch: int = 1024,
+        max_wait_ms: float = 2.0,
+    ):
+        self.name = name
+        self.fn = fn
+        self.max_batch = max_batch
+        self.max_wait_s = max_wait_ms / 1000.0
+        self._items: list[tuple[T, asyncio.Future]] = []
+        self._timer: asyncio.TimerHandle | None = None
+        self._running: set[asyncio.Task] = set()
+
+    async def submit(self, item: T) -> Any:
+        loop = asyncio.get_running_loop()
+        fut = loop.create_future()
+        self._items.append((item, fut))
+        if len(self._items) >= self.max_batch:
+            self._run()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_wait_s, self._run)
+        return await fut
+
+    def _run(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._items = self._items, []
+        if not batch:
+            return
+        task = asyncio.get_running_loop().create_task(self._call(batch))
+        self._running.add(task)
+        task.add_done_callback(self._running.discard)
+
+    async def _call(self, batch: list[tuple[T, asyncio.Future]]):
+        BATCH_SIZE.labels(self.name).observe(len(batch))
+        try:
+            results = await self.fn([item for item, _ in batch])
+            if len(results) != len(batch):
+                raise ValueError(f"{self.name}: {len(results)} results for {len(batch)} items")
+        except Exception as e:
+            for _, fut in batch:
+                if not fut.done():
+                    fut.set_exception(e)
+            return
+        for (_, fut), res in zip(batch, results, strict=True):
+            if not fut.done():
+                fut.set_result(res)
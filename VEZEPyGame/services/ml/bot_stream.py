@@ -0,0 +1,279 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import warnings
+from collections.abc import Iterable
+from time import time
+from typing import Any
+
+import numpy as np
+from loguru import logger
+
+from ..metrics import get_or_create_counter, get_or_create_gauge
+from .registry import ModelRegistry
+from .scoring import BOT_THRESHOLD
+
+TRACKED = get_or_create_gauge(
+    "veze_game_bot_tracked_users", "Users with a live bot-detection window"
+)
+WINDOW_BYTES = get_or_create_gauge(
+    "veze_game_bot_window_bytes", "Memory held by bot-detection windows"
+)
+FLAGGED = get_or_create_counter(
+    "veze_game_bot_flagged_total", "Users flagged by streaming bot detection"
+)
+
+# Per-user signals in [0, 100], higher reads as more bot-like; scored by the "bot_stream" model.
+SIGNALS = ("rate", "regularity", "consistency")
+
+
+class UserWindows:
+    """Last ``window`` (ts, value) samples per user in preallocated ring arrays.
+
+    Rows are slots handed out from a free list and grown by doubling up to ``max_users``;
+    when full, users idle for ``idle_s`` and then the least recently seen are evicted, so
+    memory stays at ``max_users * bytes_per_user`` plus the id index.
+    """
+
+    def __init__(
+        self,
+        window: int = 64,
+        max_users: int = 50_000,
+        idle_s: float = 600.0,
+        value_field: str = "value",
+    ):
+        self.window = window
+        self.max_users = max_users
+        self.idle_s = idle_s
+        self.value_field = value_field
+        self._slot: dict[str, int] = {}
+        self._ids: list[str | None] = []
+        self._free: list[int] = []
+        self.ts = np.zeros((0, window), dtype=np.float64)
+        self.values = np.zeros((0, window), dtype=np.float32)
+        self.head = np.zeros(0, dtype=np.int32)
+        self.count = np.zeros(0, dtype=np.int32)
+        self.last_seen = np.zeros(0, dtype=np.float64)
+        self.flagged_at = np.zeros(0, dtype=np.float64)
+
+    @property
+    def users(self) -> int:
+        return len(self._slot)
+
+    @property
+    def bytes_per_user(self) -> int:
+        return self.window * (self.ts.itemsize + self.values.itemsize) + 4 + 4 + 8 + 8
+
+    def memory_bytes(self) -> int:
+        arrays = sum(
+            a.nbytes
+            for a in (self.ts, self.values, self.head, self.count, self.last_seen, self.flagged_at)
+        )
+        # Rough cost of the user-id index: dict entry, list entry and a short str per user.
+        return arrays + len(self._slot) * 120
+
+    def _grow(self):
+        old = len(self.head)
+        new = min(self.max_users, max(1024, old * 2))
+        if new == old:
+            return
+        for name in ("ts", "values", "head", "count", "last_seen", "flagged_at"):
+            a = getattr(self, name)
+            grown = np.zeros((new, *a.shape[1:]), dtype=a.dtype)
+            grown[:old] = a
+            setattr(self, name, grown)
+        self._ids += [None] * (new - old)
+        self._free += range(new - 1, old - 1, -1)
+
+    def _release(self, slots: np.ndarray):
+        for s in slots.tolist():
+            user = self._ids[s]
+            if user is not None:
+                del self._slot[user]
+                self._ids[s] = None
+                self._free.append(s)
+        self.head[slots] = 0
+        self.count[slots] = 0
+        self.flagged_at[slots] = 0.0
+
+    def _evict(self, now: float):
+        live = np.flatnonzero(self.count > 0)
+        if not len(live):
+            return
+        idle = live[self.last_seen[live] < now - self.idle_s]
+        if not len(idle):
+            # Nobody idle: drop the least recently seen 1%, never a slot this batch already uses.
+            live = live[self.last_seen[live] < now]
+            if not len(live):
+                return
+            k = max(1, len(live) // 100)
+            idle = live[np.argpartition(self.last_seen[live], k - 1)[:k]]
+        self._release(idle)
+
+    def _slot_of(self, user_id: str, now: float) -> int:
+        """The user's slot, allocating one if needed; -1 when every slot is taken by this batch."""
+        s = self._slot.get(user_id)
+        if s is None:
+            if not self._free:
+                self._grow()
+            if not self._free:
+                self._evict(now)
+            if not self._free:
+                return -1
+            s = self._free.pop()
+            self._slot[user_id] = s
+            self._ids[s] = user_id
+        # Marks the slot as in use by this batch so eviction passes over it.
+        self.last_seen[s] = now
+        return s
+
+    def add(self, events: Iterable[dict[str, Any]]):
+        """Append telemetry events to their users' windows; events without a user are ignored."""
+        now = time()
+        slots: list[int] = []
+        ts: list[float] = []
+        values: list[float] = []
+        for ev in events:
+            user = ev.get("user_id")
+            if not user:
+                continue
+            slot = self._slot_of(user, now)
+            if slot < 0:
+                continue
+            payload = ev.get("payload")
+            v = payload.get(self.value_field) if isinstance(payload, dict) else None
+            slots.append(slot)
+            ts.append(ev["ts"])
+            values.append(
+                float(v) if isinstance(v, (int, float)) and not isinstance(v, bool) else np.nan
+            )
+        if not slots:
+            return
+        s = np.asarray(slots)
+        order = np.argsort(s, kind="stable")
+        s = s[order]
+        starts = np.flatnonzero(np.r_[True, s[1:] != s[:-1]])
+        sizes = np.diff(np.r_[starts, len(s)])
+        rank = np.arange(len(s)) - np.repeat(starts, sizes)
+        # Only the newest ``window`` events of a user in this batch can survive.
+        keep = rank >= np.repeat(sizes, sizes) - self.window
+        users = s[starts]
+        pos = (self.head[s] + rank) % self.window
+        self.ts[s[keep], pos[keep]] = np.asarray(ts)[order][keep]
+        self.values[s[keep], pos[keep]] = np.asarray(values, dtype=np.float32)[order][keep]
+        self.head[users] = (self.head[users] + sizes) % self.window
+        self.count[users] = np.minimum(self.count[users] + sizes, self.window)
+
+    def signals(self, min_events: int = 8) -> tuple[np.ndarray, np.ndarray]:
+        """``(slots, signals)`` for every user with at least ``min_events`` samples."""
+        slots = np.flatnonzero(self.count >= max(2, min_events))
+        if not len(slots):
+            return slots, np.zeros((0, len(SIGNALS)))
+        filled = np.arange(self.window) < self.count[slots, None]
+        ts = np.sort(np.where(filled, self.ts[slots], np.nan), axis=1)
+        gaps = np.diff(ts, axis=1)
+        span = np.nanmax(ts, axis=1) - np.nanmin(ts, axis=1)
+        rate = (self.count[slots] - 1) / np.maximum(span, 1e-3)
+        with np.errstate(invalid="ignore", divide="ignore"), warnings.catch_warnings():
+            # All-NaN rows (users without numeric values) are expected here.
+            warnings.simplefilter("ignore", RuntimeWarning)
+            gap_cv = np.nanstd(gaps, axis=1) / np.nanmean(gaps, axis=1)
+            values = np.where(filled, self.values[slots], np.nan)
+            value_cv = np.nanstd(values, axis=1) / np.abs(np.nanmean(values, axis=1))
+        signals = np.column_stack(
+            [
+                np.minimum(100.0, rate * 10.0),  # 10 events/s and faster saturates
+                100.0 * (1.0 - np.clip(np.nan_to_num(gap_cv, nan=1.0), 0.0, 1.0)),
+                100.0 * (1.0 - np.clip(np.nan_to_num(value_cv, nan=1.0), 0.0, 1.0)),
+            ]
+        )
+        return slots, signals
+
+    def user(self, slot: int) -> str | None:
+        return self._ids[slot]
+
+
+class BotDetector:
+    """Scores every active user's window with the registry's ``model`` on an interval and
+    publishes newly flagged users to the Redis channel ``channel`` (JSON per user).
+
+    A user is re-published at most once per ``cooldown_s``.
+    """
+
+    def __init__(
+        self,
+        windows: UserWindows,
+        registry: ModelRegistry,
+        client=None,
+        *,
+        channel: str = "bot:flagged",
+        interval_s: float = 5.0,
+        min_events: int = 8,
+        threshold: float = BOT_THRESHOLD,
+        cooldown_s: float = 300.0,
+        model: str = "bot_stream",
+    ):
+        self.windows = windows
+        self.registry = registry
+        self._r = client
+        self.channel = channel
+        self.interval_s = interval_s
+        self.min_events = min_events
+        self.threshold = threshold
+        self.cooldown_s = cooldown_s
+        self.model = model
+        self.last: dict = {"scored": 0, "flagged": 0, "at": 0.0}
+
+    async def score(self, now: float | None = None) -> list[dict[str, Any]]:
+        """One vectorized pass; returns the users flagged (and published) by it."""
+        now = time() if now is None else now
+        w = self.windows
+        slots, signals = w.signals(self.min_events)
+        flagged: list[dict[str, Any]] = []
+        if len(slots):
+            scores = await self.registry.predict(
+                self.model, signals, np.full(len(slots), len(SIGNALS))
+            )
+            hit = (scores > self.threshold) & (w.flagged_at[slots] < now - self.cooldown_s)
+            for i in np.flatnonzero(hit).tolist():
+                flagged.append(
+                    {
+                        "user_id": w.user(int(slots[i])),
+                        "score": float(scores[i]),
+                        "signals": dict(zip(SIGNALS, signals[i].round(2).tolist(), strict=True)),
+                        "ts": now,
+                    }
+                )
+            w.flagged_at[slots[hit]] = now
+        if flagged and self._r is not None:
+            async with self._r.pipeline(transaction=False) as pipe:
+                for f in flagged:
+                    pipe.publish(self.channel, json.dumps(f))
+                await pipe.execute()
+        FLAGGED.inc(len(flagged))
+        TRACKED.set(w.users)
+        WINDOW_BYTES.set(w.memory_bytes())
+        self.last = {"scored": len(slots), "flagged": len(flagged), "at": now}
+        return flagged
+
+    def stats(self) -> dict[str, Any]:
+        w = self.windows
+        return {
+            "tracked_users": w.users,
+            "max_users": w.max_users,
+            "window": w.window,
+            "bytes_per_user": w.bytes_per_user,
+            "memory_bytes": w.memory_bytes(),
+            "model": self.model,
+            "channel": self.channel,
+            "last_pass": self.last,
+        }
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.interval_s)
+            try:
+                await self.score()
+            except Exception:
+                logger.exception("bot detection pass failed")
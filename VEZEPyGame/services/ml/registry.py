@@ -0,0 +1,260 @@
+from __future__ import annotations
+
+import asyncio
+import bisect
+import os
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from time import perf_counter, time
+from typing import Any, Protocol
+
+import joblib
+import numpy as np
+from loguru import logger
+
+from ..metrics import get_or_create_gauge, get_or_create_histogram
+from .scoring import as_matrix, bot_scores, skill_scores
+
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+
+INFERENCE_SECONDS = get_or_create_histogram(
+    "veze_game_ml_inference_seconds",
+    "Latency of one model inference call",
+    LATENCY_BUCKETS,
+    ["model"],
+)
+LOAD_SECONDS = get_or_create_gauge(
+    "veze_game_ml_model_load_seconds", "Load time of the active model version", ["model"]
+)
+
+
+class Model(Protocol):
+    def predict(self, features: np.ndarray, lengths: np.ndarray) -> np.ndarray: ...
+
+
+class FormulaModel:
+    """Built-in heuristic used when no trained model file exists."""
+
+    def __init__(self, fn: Callable[[np.ndarray, np.ndarray], np.ndarray]):
+        self.fn = fn
+
+    def predict(self, features: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+        return self.fn(features, lengths)
+
+
+class LinearModel:
+    """``.npz`` weights: ``coef`` (d,), optional ``intercept`` and ``link`` ("identity" | "sigmoid")."""
+
+    def __init__(self, coef: np.ndarray, intercept: float = 0.0, link: str = "identity"):
+        self.coef = np.asarray(coef, dtype=np.float64)
+        self.intercept = float(intercept)
+        self.link = link
+
+    @classmethod
+    def load(cls, path: Path) -> LinearModel:
+        with np.load(path) as w:
+            link = str(w["link"]) if "link" in w else "identity"
+            return cls(w["coef"], float(w["intercept"]) if "intercept" in w else 0.0, link)
+
+    def predict(self, features: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+        x = _fit_width(features, len(self.coef))
+        z = x @ self.coef + self.intercept
+        return 1.0 / (1.0 + np.exp(-z)) if self.link == "sigmoid" else z
+
+
+class SklearnModel:
+    """A joblib-pickled scikit-learn estimator; classifiers score with P(class 1)."""
+
+    def __init__(self, estimator: Any):
+        self.estimator = estimator
+        self.width = getattr(estimator, "n_features_in_", None)
+
+    @classmethod
+    def load(cls, path: Path) -> SklearnModel:
+        return cls(joblib.load(path))
+
+    def predict(self, features: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+        x = features if self.width is None else _fit_width(features, self.width)
+        if hasattr(self.estimator, "predict_proba"):
+            return self.estimator.predict_proba(x)[:, 1]
+        return np.asarray(self.estimator.predict(x), dtype=np.float64)
+
+
+def _fit_width(features: np.ndarray, width: int) -> np.ndarray:
+    """Zero-pad or truncate columns to the width a trained model expects."""
+    if features.shape[1] == width:
+        return features
+    out = np.zeros((features.shape[0], width), dtype=features.dtype)
+    n = min(width, features.shape[1])
+    out[:, :n] = features[:, :n]
+    return out
+
+
+# "bot" scores /ml/detect_bot signals; "bot_stream" scores the streaming detector's
+# (rate, regularity, consistency) windows, so each can be retrained without the other.
+BUILTIN: dict[str, Callable[[np.ndarray, np.ndarray], np.ndarray]] = {
+    "skill": skill_scores,
+    "bot": bot_scores,
+    "bot_stream": bot_scores,
+}
+LOADERS: dict[str, Callable[[Path], Model]] = {
+    ".npz": LinearModel.load,
+    ".joblib": SklearnModel.load,
+    ".pkl": SklearnModel.load,
+}
+
+
+class _Latency:
+    """Cumulative per-model latency histogram for the status endpoint."""
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS) + 1)
+        self.total = 0.0
+        self.n = 0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.total += seconds
+        self.n += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        cumulative = np.cumsum(self.counts).tolist()
+        buckets = {
+            f"le_{b * 1000:g}ms": c for b, c in zip(LATENCY_BUCKETS, cumulative, strict=False)
+        }
+        buckets["le_inf"] = cumulative[-1]
+        return {
+            "count": self.n,
+            "mean_ms": self.total / self.n * 1000 if self.n else 0.0,
+            "buckets": buckets,
+        }
+
+
+@dataclass
+class LoadedModel:
+    name: str
+    version: str
+    source: str
+    model: Model
+    loaded_at: float
+    load_ms: float
+    latency: _Latency = field(default_factory=_Latency)
+
+
+class ModelRegistry:
+    """Resident models by name, loaded once and swapped atomically.
+
+    A model resolves to ``{root}/{name}/latest.{npz,joblib,pkl}`` or falls back to the
+    built-in formula. ``load`` builds the new version off the event loop and then replaces
+    the registry entry in one assignment, so calls already running finish on the old
+    version and no request is dropped. Inference runs on a thread pool (NumPy and
+    scikit-learn release the GIL for the heavy parts).
+    """
+
+    def __init__(self, root: str | Path = "models", workers: int = 4):
+        self.root = Path(root)
+        self._models: dict[str, LoadedModel] = {}
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="ml")
+        self._lock = asyncio.Lock()
+
+    def _resolve(self, name: str) -> Path | None:
+        for ext in LOADERS:
+            p = self.root / name / f"latest{ext}"
+            if p.exists():
+                return p
+        return None
+
+    def _build(self, name: str, path: Path | None, version: str | None) -> LoadedModel:
+        started = perf_counter()
+        if path is None:
+            if name not in BUILTIN:
+                raise KeyError(f"no model file for {name!r} and no built-in fallback")
+            model: Model = FormulaModel(BUILTIN[name])
+            source, default_version = "builtin", "builtin"
+        else:
+            loader = LOADERS.get(path.suffix)
+            if loader is None:
+                raise ValueError(f"unsupported model format {path.suffix!r}")
+            model = loader(path)
+            source, default_version = str(path), f"{path.stem}@{int(path.stat().st_mtime)}"
+        load_ms = (perf_counter() - started) * 1000
+        return LoadedModel(name, version or default_version, source, model, time(), load_ms)
+
+    async def load(
+        self, name: str, path: str | Path | None = None, version: str | None = None
+    ) -> LoadedModel:
+        """Load (or reload) ``name`` and make it the active version."""
+        resolved = (
+            Path(path)
+            if path is not None
+            else (self._resolve(name) if version != "builtin" else None)
+        )
+        loaded = await asyncio.get_running_loop().run_in_executor(
+            self._pool, self._build, name, resolved, version
+        )
+        self._models[name] = loaded
+        LOAD_SECONDS.labels(name).set(loaded.load_ms / 1000)
+        return loaded
+
+    async def warm(self, names: list[str] | None = None):
+        """Load every model up front; a broken model file falls back to the built-in formula."""
+        for name in names or list(BUILTIN):
+            try:
+                await self.load(name)
+            except Exception:
+                logger.exception(f"loading model {name} failed; using the built-in formula")
+                await self.load(name, path=None, version="builtin")
+
+    async def get(self, name: str) -> LoadedModel:
+        loaded = self._models.get(name)
+        if loaded is None:
+            async with self._lock:
+                loaded = self._models.get(name) or await self.load(name)
+        return loaded
+
+    def _run(self, loaded: LoadedModel, features: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+        started = perf_counter()
+        out = loaded.model.predict(features, lengths)
+        elapsed = perf_counter() - started
+        INFERENCE_SECONDS.labels(loaded.name).observe(elapsed)
+        loaded.latency.observe(elapsed)
+        return out
+
+    def _run_rows(self, loaded: LoadedModel, rows: list[list[float]]) -> np.ndarray:
+        return self._run(loaded, *as_matrix(rows))
+
+    async def predict(self, name: str, features: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+        loaded = await self.get(name)
+        return await asyncio.get_running_loop().run_in_executor(
+            self._pool, self._run, loaded, features, lengths
+        )
+
+    async def predict_rows(self, name: str, rows: list[list[float]]) -> np.ndarray:
+        """Like ``predict`` for possibly ragged rows; the matrix is built on the pool too."""
+        loaded = await self.get(name)
+        return await asyncio.get_running_loop().run_in_executor(
+            self._pool, self._run_rows, loaded, rows
+        )
+
+    def status(self) -> dict[str, Any]:
+        return {
+            name: {
+                "version": m.version,
+                "source": m.source,
+                "loaded_at": m.loaded_at,
+                "load_ms": m.load_ms,
+                "latency": m.latency.snapshot(),
+            }
+            for name, m in self._models.items()
+        }
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def from_env() -> ModelRegistry:
+    return ModelRegistry(
+        os.getenv("ML_MODEL_DIR", "models"), workers=int(os.getenv("ML_WORKERS", "4"))
+    )
@@ -0,0 +1,29 @@
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+import numpy as np
+
+BOT_THRESHOLD = 0.7
+
+
+def as_matrix(rows: Sequence[Sequence[float]]) -> tuple[np.ndarray, np.ndarray]:
+    """``(matrix, lengths)`` for possibly ragged rows; short rows are zero-padded."""
+    lengths = np.fromiter((len(r) for r in rows), dtype=np.int64, count=len(rows))
+    width = int(lengths.max()) if len(rows) else 0
+    if len(rows) and (lengths == width).all():
+        return np.asarray(rows, dtype=np.float64).reshape(len(rows), width), lengths
+    m = np.zeros((len(rows), width), dtype=np.float64)
+    for i, r in enumerate(rows):
+        m[i, : len(r)] = r
+    return m, lengths
+
+
+def skill_scores(features: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Mean of the non-negative features of each row."""
+    return np.clip(features, 0.0, None).sum(axis=1) / np.maximum(lengths, 1)
+
+
+def bot_scores(signals: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+    """Mean signal of each row scaled to [0, 1]; above ``BOT_THRESHOLD`` reads as a bot."""
+    return np.clip(signals.sum(axis=1) / np.maximum(lengths, 1) / 100.0, 0.0, 1.0)
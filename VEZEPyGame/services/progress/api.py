@@ -1,67 +1,156 @@
-from fastapi import APIRouter, HTTPException
+import os
+
+from fastapi import APIRouter, Depends, HTTPException
 from pydantic import BaseModel
-from typing import Any, Dict, List, Optional
-import json, os
+
+from ..redis_pool import get_redis
+from .store import Codec, ProgressStore
+from .writebehind import BufferFull, ProgressWriteBehind
 
 router = APIRouter()
 
+
 class QuestState(BaseModel):
     id: int
-    have: Optional[float] = None
-    need: Optional[float] = None
-    done: Optional[bool] = None
-    rewarded: Optional[bool] = None
+    have: float | None = None
+    need: float | None = None
+    done: bool | None = None
+    rewarded: bool | None = None
+
 
 class ProgressPayload(BaseModel):
     user_id: str
     xp: float
     level: int
-    quests: List[QuestState]
+    quests: list[QuestState]
+
+
+class ProgressDelta(BaseModel):
+    """Partial save: only the given fields change; quests merge field by field."""
+
+    xp: float | None = None
+    xp_delta: float | None = None
+    level: int | None = None
+    quests: list[QuestState] = []
+
 
 # Storage: Redis if available, else in-memory
-_mem: Dict[str, Dict[str, Any]] = {}
-_redis = None
+_codec = Codec(os.getenv("PROGRESS_CODEC", "json"))
+_mem = ProgressStore(None, _codec)
+_store: ProgressStore | None = None
+
+_write_behind: ProgressWriteBehind | None = None
+
+
+async def _progress() -> ProgressStore:
+    global _store
+    if _store is None:
+        _store = ProgressStore(get_redis(), _codec) if get_redis() is not None else _mem
+    return _store
+
+
+async def write_behind() -> ProgressWriteBehind | None:
+    """The write-behind cache when PROGRESS_WRITE_BEHIND=1; its flush loop runs from the app lifespan."""
+    global _write_behind
+    if _write_behind is None and os.getenv("PROGRESS_WRITE_BEHIND", "0") in {"1", "true", "True"}:
+        _write_behind = ProgressWriteBehind(
+            await _progress(),
+            flush_interval_s=float(os.getenv("PROGRESS_FLUSH_INTERVAL_S", "1.0")),
+            max_dirty=int(os.getenv("PROGRESS_MAX_DIRTY", "10000")),
+            max_buffered=int(os.getenv("PROGRESS_MAX_BUFFERED", "0")) or None,
+        )
+    return _write_behind
+
 
-def _get_redis():
-    global _redis
-    if _redis is not None:
-        return _redis
+@router.get("/buffer")
+async def buffer_stats(wb: ProgressWriteBehind | None = Depends(write_behind)):
+    if wb is None:
+        return {"enabled": False}
+    return {
+        "enabled": True,
+        "dirty": wb.dirty,
+        "max_buffered": wb.max_buffered,
+        "interval_s": wb.flush_interval_s,
+        "last_flush": wb.last,
+    }
+
+
+def _buffer(wb: ProgressWriteBehind, write) -> dict:
+    """Run a buffered save; a full buffer flushes in the background, never in the request."""
     try:
-        import redis  # type: ignore
-        url = os.getenv("REDIS_URL") or "redis://localhost:6379/0"
-        _redis = redis.Redis.from_url(url, decode_responses=True)
-    except Exception:
-        _redis = None
-    return _redis
+        if write():
+            wb.flush_soon()
+    except BufferFull as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"}) from e
+    return {"status": "ok", "persisted": "buffered"}
 
-def _key(user_id: str) -> str:
-    return f"game:progress:{user_id}"
 
 @router.get("/{user_id}")
-def get_progress(user_id: str):
-    r = _get_redis()
-    if r is not None:
+async def get_progress(
+    user_id: str,
+    store: ProgressStore = Depends(_progress),
+    wb: ProgressWriteBehind | None = Depends(write_behind),
+):
+    if wb is not None:
+        # Buffered saves never went to the memory store: without the stored record their
+        # deltas have nothing to apply to, so answer 503 rather than stale progress.
         try:
-            data = r.get(_key(user_id))
-            if not data:
-                return {"user_id": user_id, "xp": 0, "level": 1, "quests": []}
-            return json.loads(data)
-        except Exception:
-            pass
-    # memory fallback
-    return _mem.get(user_id, {"user_id": user_id, "xp": 0, "level": 1, "quests": []})
+            return await wb.get(user_id)
+        except Exception as exc:
+            raise HTTPException(
+                status_code=503, detail="progress store unavailable", headers={"Retry-After": "1"}
+            ) from exc
+    try:
+        return await store.get(user_id)
+    except Exception:
+        # memory fallback
+        return await _mem.get(user_id)
+
 
 @router.post("/{user_id}")
-def save_progress(user_id: str, payload: ProgressPayload):
+async def save_progress(
+    user_id: str,
+    payload: ProgressPayload,
+    store: ProgressStore = Depends(_progress),
+    wb: ProgressWriteBehind | None = Depends(write_behind),
+):
     if payload.user_id != user_id:
         raise HTTPException(status_code=400, detail="user_id mismatch")
-    record = payload.dict()
-    r = _get_redis()
-    if r is not None:
+    quests = [q.model_dump() for q in payload.quests]
+    if wb is not None:
+        return _buffer(wb, lambda: wb.save(user_id, payload.xp, payload.level, quests))
+    if store is not _mem:
+        try:
+            written = await store.save(user_id, payload.xp, payload.level, quests)
+            return {"status": "ok", "persisted": "redis", "bytes": written}
+        except Exception:
+            pass
+    written = await _mem.save(user_id, payload.xp, payload.level, quests)
+    return {"status": "ok", "persisted": "memory", "bytes": written}
+
+
+@router.patch("/{user_id}")
+async def patch_progress(
+    user_id: str,
+    delta: ProgressDelta,
+    store: ProgressStore = Depends(_progress),
+    wb: ProgressWriteBehind | None = Depends(write_behind),
+):
+    if delta.xp is not None and delta.xp_delta is not None:
+        raise HTTPException(status_code=400, detail="send xp or xp_delta, not both")
+    xp, xp_delta, level = delta.xp, delta.xp_delta, delta.level
+    quests = [q.model_dump() for q in delta.quests]
+    if wb is not None:
+        return _buffer(
+            wb, lambda: wb.patch(user_id, xp=xp, xp_delta=xp_delta, level=level, quests=quests)
+        )
+    if store is not _mem:
         try:
-            r.set(_key(user_id), json.dumps(record))
-            return {"status": "ok", "persisted": "redis"}
+            written = await store.patch(
+                user_id, xp=xp, xp_delta=xp_delta, level=level, quests=quests
+            )
+            return {"status": "ok", "persisted": "redis", "bytes": written}
         except Exception:
             pass
-    _mem[user_id] = record
-    return {"status": "ok", "persisted": "memory"}
+    written = await _mem.patch(user_id, xp=xp, xp_delta=xp_delta, level=level, quests=quests)
+    return {"status": "ok", "persisted": "memory", "bytes": written}
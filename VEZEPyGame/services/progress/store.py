@@ -0,0 +1,278 @@
+from __future__ import annotations
+
+import json
+from collections.abc import Iterable
+from typing import Any
+
+try:
+    import msgpack
+except Exception:
+    msgpack = None
+
+QUEST_FIELDS = ("have", "need", "done", "rewarded")
+
+# Keys:  prog:{user_id}    hash  xp, level
+#        prog:{user_id}:q  hash  quest id -> encoded {have, need, done, rewarded} (set fields only)
+# Records saved before this layout live as JSON strings under game:progress:{user_id}
+# and are still readable until the user's next save.
+
+
+def _legacy_key(user_id: str) -> str:
+    return f"game:progress:{user_id}"
+
+
+def empty(user_id: str) -> dict[str, Any]:
+    return {"user_id": user_id, "xp": 0, "level": 1, "quests": []}
+
+
+class Codec:
+    """Quest value encoding; decoding accepts both formats, so the setting can change live."""
+
+    NAMES = ("json", "msgpack")
+
+    def __init__(self, name: str = "json"):
+        if name not in self.NAMES:
+            raise ValueError(
+                f"unknown progress codec {name!r}; expected one of {', '.join(self.NAMES)}"
+            )
+        if name == "msgpack" and msgpack is None:
+            raise RuntimeError("PROGRESS_CODEC=msgpack needs the msgpack package")
+        self.name = name
+
+    def encode(self, quest: dict[str, Any]) -> bytes:
+        if self.name == "msgpack":
+            return msgpack.packb(quest)
+        return json.dumps(quest, separators=(",", ":")).encode()
+
+    @staticmethod
+    def decode(raw: bytes) -> dict[str, Any]:
+        # A JSON object starts with "{"; a msgpack map never does (0x80-0x8f, 0xde, 0xdf).
+        if raw[:1] == b"{":
+            return json.loads(raw)
+        if msgpack is None:
+            raise RuntimeError(
+                "progress record holds msgpack-encoded quests; install the msgpack package"
+            )
+        return msgpack.unpackb(raw)
+
+
+def _quest(q: dict[str, Any]) -> dict[str, Any]:
+    return {k: q[k] for k in QUEST_FIELDS if q.get(k) is not None}
+
+
+def _fold(quests: Iterable[dict[str, Any]]) -> list[dict[str, Any]]:
+    """One entry per quest id, merging the set fields of repeated ids in order."""
+    by_id: dict[Any, dict[str, Any]] = {}
+    for q in quests:
+        if q.get("id") is not None:
+            by_id.setdefault(q["id"], {"id": q["id"]}).update(_quest(q))
+    return list(by_id.values())
+
+
+def apply_delta(record: dict[str, Any], delta: dict[str, Any]) -> dict[str, Any]:
+    """``record`` (as returned by ``ProgressStore.get``) with a delta applied: ``xp`` sets,
+    ``xp_delta`` adds, ``level`` sets and each of ``quests`` merges its non-null fields."""
+    out = {**record, "quests": [dict(q) for q in record.get("quests", [])]}
+    if delta.get("xp") is not None:
+        out["xp"] = float(delta["xp"])
+    if delta.get("xp_delta"):
+        out["xp"] = float(out.get("xp", 0)) + delta["xp_delta"]
+    if delta.get("level") is not None:
+        out["level"] = int(delta["level"])
+    by_id = {q["id"]: q for q in out["quests"]}
+    for q in delta.get("quests") or ():
+        if q.get("id") is None:
+            continue
+        target = by_id.setdefault(q["id"], {"id": q["id"], **{f: None for f in QUEST_FIELDS}})
+        target.update(_quest(q))
+    out["quests"] = sorted(by_id.values(), key=lambda q: q["id"])
+    return out
+
+
+class ProgressStore:
+    """Game progress with XP/level and each quest stored separately, so a delta save only
+    writes what changed.
+
+    Without a Redis client (redis-py missing) records live in process memory. Writes
+    return the bytes of hash field names and values they sent.
+    """
+
+    def __init__(self, client=None, codec: Codec | None = None):
+        self._r = client
+        self.codec = codec or Codec()
+        self._mem: dict[str, dict[str, Any]] = {}
+
+    @staticmethod
+    def key(user_id: str) -> str:
+        return f"prog:{user_id}"
+
+    def _record(self, user_id: str, head: dict, quests: dict) -> dict[str, Any]:
+        out = empty(user_id)
+        for raw, v in head.items():
+            k = raw.decode() if isinstance(raw, bytes) else raw
+            out[k] = int(v) if k == "level" else float(v)
+        items = []
+        for qid, raw in quests.items():
+            q = {"id": int(qid), **{f: None for f in QUEST_FIELDS}}
+            q.update(self.codec.decode(raw) if isinstance(raw, bytes) else raw)
+            items.append(q)
+        out["quests"] = sorted(items, key=lambda q: q["id"])
+        return out
+
+    async def get(self, user_id: str) -> dict[str, Any]:
+        if self._r is None:
+            rec = self._mem.get(user_id)
+            return self._record(user_id, rec["head"], rec["quests"]) if rec else empty(user_id)
+        key = self.key(user_id)
+        async with self._r.pipeline(transaction=False) as pipe:
+            pipe.hgetall(key)
+            pipe.hgetall(f"{key}:q")
+            head, quests = await pipe.execute()
+        if not head and not quests:
+            legacy = await self._r.get(_legacy_key(user_id))
+            return json.loads(legacy) if legacy else empty(user_id)
+        return self._record(user_id, head, quests)
+
+    def _head(self, xp: float | None, level: int | None) -> dict[str, str]:
+        head: dict[str, str] = {}
+        if xp is not None:
+            head["xp"] = repr(float(xp))
+        if level is not None:
+            head["level"] = str(int(level))
+        return head
+
+    async def save(
+        self, user_id: str, xp: float, level: int, quests: Iterable[dict[str, Any]]
+    ) -> int:
+        """Replace the whole record."""
+        return await self.save_many({user_id: (xp, level, list(quests))})
+
+    def _encode_full(
+        self, records: dict[str, tuple[float, int, list[dict[str, Any]]]]
+    ) -> dict[str, tuple[dict, dict]]:
+        return {
+            user_id: (
+                self._head(xp, level),
+                {str(q["id"]): self.codec.encode(_quest(q)) for q in quests},
+            )
+            for user_id, (xp, level, quests) in records.items()
+        }
+
+    def _queue_full(self, pipe, encoded: dict[str, tuple[dict, dict]]):
+        for user_id, (head, quests) in encoded.items():
+            key = self.key(user_id)
+            pipe.delete(f"{key}:q", _legacy_key(user_id))
+            pipe.hset(key, mapping=head)
+            if quests:
+                pipe.hset(f"{key}:q", mapping=quests)
+
+    async def save_many(self, records: dict[str, tuple[float, int, list[dict[str, Any]]]]) -> int:
+        """Replace ``{user_id: (xp, level, quests)}`` in one MULTI pipeline."""
+        encoded = self._encode_full(records)
+        if self._r is None:
+            for user_id, (head, quests) in encoded.items():
+                self._mem[user_id] = {"head": head, "quests": quests}
+        elif encoded:
+            async with self._r.pipeline(transaction=True) as pipe:
+                self._queue_full(pipe, encoded)
+                await pipe.execute()
+        return sum(_size(head) + _size(quests) for head, quests in encoded.values())
+
+    async def patch(
+        self,
+        user_id: str,
+        xp: float | None = None,
+        xp_delta: float | None = None,
+        level: int | None = None,
+        quests: Iterable[dict[str, Any]] = (),
+    ) -> int:
+        """Apply a delta: set or increment XP, set level and merge the given quest fields."""
+        return await self.patch_many(
+            {user_id: {"xp": xp, "xp_delta": xp_delta, "level": level, "quests": list(quests)}}
+        )
+
+    async def patch_many(self, deltas: dict[str, dict[str, Any]]) -> int:
+        """Apply ``{user_id: {xp, xp_delta, level, quests}}`` (see ``apply_delta``).
+
+        Only the touched hash fields are written: one pipelined round-trip reads the touched
+        quests, one MULTI pipeline writes every user (legacy records migrated included), so
+        a failed call changes nothing and can be retried. Two concurrent patches of the
+        *same* quest may race on the merge; patches of different quests never do.
+        """
+        deltas = {u: {**d, "quests": _fold(d.get("quests") or ())} for u, d in deltas.items()}
+        if self._r is None:
+            written = 0
+            for user_id, d in deltas.items():
+                rec = self._mem.setdefault(
+                    user_id, {"head": {"xp": "0", "level": "1"}, "quests": {}}
+                )
+                head = self._head(d.get("xp"), d.get("level"))
+                rec["head"].update(head)
+                if d.get("xp_delta"):
+                    rec["head"]["xp"] = repr(float(rec["head"]["xp"]) + d["xp_delta"])
+                merged = {
+                    str(q["id"]): self.codec.encode(
+                        {**self._old(rec["quests"].get(str(q["id"]))), **_quest(q)}
+                    )
+                    for q in d.get("quests") or ()
+                }
+                rec["quests"].update(merged)
+                written += _size(head) + _size(merged) + (8 if d.get("xp_delta") else 0)
+            return written
+        users = list(deltas)
+        ids = {u: [str(q["id"]) for q in deltas[u].get("quests") or ()] for u in users}
+        async with self._r.pipeline(transaction=False) as pipe:
+            for u in users:
+                pipe.exists(self.key(u))
+                pipe.hmget(f"{self.key(u)}:q", ids[u] or ["-"])
+            res = await pipe.execute()
+        exists = dict(zip(users, res[::2], strict=True))
+        old = dict(zip(users, res[1::2], strict=True))
+        fresh = [u for u in users if not exists[u]]
+        migrated: dict[str, tuple[dict, dict]] = {}
+        if fresh:
+            # First write in the hash layout: fold a legacy JSON record in, if there is one.
+            legacy = dict(
+                zip(fresh, await self._r.mget([_legacy_key(u) for u in fresh]), strict=True)
+            )
+            records = {
+                u: apply_delta(json.loads(raw), deltas[u]) for u, raw in legacy.items() if raw
+            }
+            migrated = self._encode_full(
+                {u: (r["xp"], r["level"], r["quests"]) for u, r in records.items()}
+            )
+            users = [u for u in users if u not in migrated]
+        written = sum(_size(head) + _size(quests) for head, quests in migrated.values())
+        writes = []
+        for u in users:
+            d = deltas[u]
+            head = self._head(d.get("xp"), d.get("level"))
+            merged = {
+                i: self.codec.encode({**self._old(o), **_quest(q)})
+                # Without quests old[u] holds the one "-" placeholder read; nothing to merge.
+                for i, o, q in zip(ids[u], old[u], d.get("quests") or (), strict=False)
+            }
+            writes.append((u, head, d.get("xp_delta"), merged))
+            written += _size(head) + _size(merged) + (8 if d.get("xp_delta") else 0)
+        if writes or migrated:
+            async with self._r.pipeline(transaction=True) as pipe:
+                self._queue_full(pipe, migrated)
+                for u, head, xp_delta, merged in writes:
+                    key = self.key(u)
+                    if head:
+                        pipe.hset(key, mapping=head)
+                    if xp_delta:
+                        pipe.hincrbyfloat(key, "xp", xp_delta)
+                    if not exists[u]:
+                        pipe.hsetnx(key, "level", "1")
+                    if merged:
+                        pipe.hset(f"{key}:q", mapping=merged)
+                await pipe.execute()
+        return written
+
+    def _old(self, raw: bytes | None) -> dict[str, Any]:
+        return self.codec.decode(raw) if raw else {}
+
+
+def _size(fields: dict[str, Any]) -> int:
+    return sum(len(k) + len(v) for k, v in fields.items())
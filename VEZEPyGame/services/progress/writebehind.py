@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Iterable
+from time import monotonic, perf_counter
+from typing import Any
+
+from loguru import logger
+
+from ..metrics import get_or_create_counter, get_or_create_gauge, get_or_create_histogram
+from .store import QUEST_FIELDS, ProgressStore, apply_delta, empty
+
+DIRTY_USERS = get_or_create_gauge(
+    "veze_game_progress_dirty_users", "Users with progress buffered but not yet flushed"
+)
+SHED_WRITES = get_or_create_counter(
+    "veze_game_progress_shed_total",
+    "Progress saves refused because the write-behind buffer was full",
+)
+FLUSH_SECONDS = get_or_create_histogram(
+    "veze_game_progress_flush_seconds",
+    "Latency of one write-behind progress flush",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1),
+)
+FLUSH_USERS = get_or_create_histogram(
+    "veze_game_progress_flush_users",
+    "Users written by one write-behind progress flush",
+    buckets=(1, 10, 50, 100, 500, 1000, 5000, 10000, 50000),
+)
+
+# A pending entry: {"full": bool, "xp": float | None, "xp_delta": float, "level": int | None,
+# "quests": {quest_id: {field: value}}}. "full" entries replace the stored record on flush.
+
+
+def _pending(full: bool = False) -> dict[str, Any]:
+    return {"full": full, "xp": None, "xp_delta": 0.0, "level": None, "quests": {}}
+
+
+def _merge(older: dict[str, Any] | None, newer: dict[str, Any]) -> dict[str, Any]:
+    """One pending entry equivalent to applying ``older`` and then ``newer``."""
+    if older is None or newer["full"]:
+        return newer
+    out = {**older, "quests": {qid: dict(f) for qid, f in older["quests"].items()}}
+    if newer["xp"] is not None:
+        out["xp"], out["xp_delta"] = newer["xp"], 0.0
+    if newer["xp_delta"]:
+        if out["xp"] is not None:
+            out["xp"] += newer["xp_delta"]
+        else:
+            out["xp_delta"] += newer["xp_delta"]
+    if newer["level"] is not None:
+        out["level"] = newer["level"]
+    for qid, fields in newer["quests"].items():
+        out["quests"].setdefault(qid, {}).update(fields)
+    return out
+
+
+class BufferFull(RuntimeError):
+    """The dirty map is at ``max_buffered`` (flushes keep failing); the write was not taken."""
+
+
+def _as_delta(p: dict[str, Any]) -> dict[str, Any]:
+    return {
+        "xp": p["xp"],
+        "xp_delta": p["xp_delta"],
+        "level": p["level"],
+        "quests": [{"id": qid, **fields} for qid, fields in p["quests"].items()],
+    }
+
+
+class ProgressWriteBehind:
+    """Absorbs progress saves into an in-process dirty map and writes them behind.
+
+    Repeated saves of a user coalesce into one entry (a full save replaces it, deltas merge
+    into it). ``flush`` writes every dirty user with one ``save_many`` and one
+    ``patch_many``, on an interval from ``run`` and at shutdown. ``get`` overlays the
+    user's pending entry on the stored record, so a client reads its own writes; with
+    several workers that holds for the worker that took the write.
+
+    Reaching ``max_dirty`` starts a background flush (``flush_soon``). While the store is
+    down the map keeps absorbing saves of users already in it, but refuses new users
+    with ``BufferFull`` once it holds ``max_buffered``.
+    """
+
+    def __init__(
+        self,
+        store: ProgressStore,
+        flush_interval_s: float = 1.0,
+        max_dirty: int = 10_000,
+        max_buffered: int | None = None,
+    ):
+        self.store = store
+        self.flush_interval_s = flush_interval_s
+        self.max_dirty = max_dirty
+        self.max_buffered = max_buffered or 10 * max_dirty
+        self._dirty: dict[str, dict[str, Any]] = {}
+        self._flushing: dict[str, dict[str, Any]] = {}
+        # Held while a flush writes, so reads never see a batch both stored and pending.
+        self._lock = asyncio.Lock()
+        self._early: asyncio.Task | None = None
+        # After a failed flush, early flushes wait for the next interval instead of retrying per request.
+        self._retry_at = 0.0
+        self.last: dict = {"flushes": 0, "users": 0, "flush_ms": 0.0}
+
+    @property
+    def dirty(self) -> int:
+        return len(self._dirty)
+
+    def _add(self, user_id: str, entry: dict[str, Any]) -> bool:
+        if user_id not in self._dirty and len(self._dirty) >= self.max_buffered:
+            SHED_WRITES.inc()
+            raise BufferFull(f"{len(self._dirty)} users buffered; progress store unavailable")
+        self._dirty[user_id] = _merge(self._dirty.get(user_id), entry)
+        DIRTY_USERS.set(len(self._dirty))
+        return len(self._dirty) >= self.max_dirty
+
+    def save(self, user_id: str, xp: float, level: int, quests: Iterable[dict[str, Any]]) -> bool:
+        """Buffer a full save; returns True once ``max_dirty`` is reached and a flush is due.
+
+        Raises ``BufferFull`` instead when the buffer cannot take another user."""
+        entry = _pending(full=True)
+        entry.update(xp=float(xp), level=int(level))
+        entry["quests"] = {
+            q["id"]: {k: q[k] for k in QUEST_FIELDS if q.get(k) is not None} for q in quests
+        }
+        return self._add(user_id, entry)
+
+    def patch(
+        self,
+        user_id: str,
+        xp: float | None = None,
+        xp_delta: float | None = None,
+        level: int | None = None,
+        quests: Iterable[dict[str, Any]] = (),
+    ) -> bool:
+        entry = _pending()
+        entry.update(
+            xp=None if xp is None else float(xp), xp_delta=float(xp_delta or 0.0), level=level
+        )
+        for q in quests:
+            if q.get("id") is not None:
+                entry["quests"].setdefault(q["id"], {}).update(
+                    {k: q[k] for k in QUEST_FIELDS if q.get(k) is not None}
+                )
+        return self._add(user_id, entry)
+
+    def _overlay(self, user_id: str) -> dict[str, Any] | None:
+        flushing = self._flushing.get(user_id)
+        dirty = self._dirty.get(user_id)
+        return (
+            dirty if flushing is None else (flushing if dirty is None else _merge(flushing, dirty))
+        )
+
+    async def get(self, user_id: str) -> dict[str, Any]:
+        if self._overlay(user_id) is None:
+            return await self.store.get(user_id)
+        async with self._lock:
+            p = self._overlay(user_id)
+            if p is not None and p["full"]:
+                base = empty(user_id)
+            else:
+                base = await self.store.get(user_id)
+                p = self._overlay(user_id)
+        return base if p is None else apply_delta(base, _as_delta(p))
+
+    async def flush(self) -> int:
+        async with self._lock:
+            if not self._dirty:
+                return 0
+            batch, self._dirty = self._dirty, {}
+            self._flushing = batch
+            started = perf_counter()
+            try:
+                full = {
+                    u: (p["xp"], p["level"], _as_delta(p)["quests"])
+                    for u, p in batch.items()
+                    if p["full"]
+                }
+                partial = {u: _as_delta(p) for u, p in batch.items() if not p["full"]}
+                if full:
+                    await self.store.save_many(full)
+                if partial:
+                    await self.store.patch_many(partial)
+            except Exception:
+                # Put the batch back under anything buffered since, and retry next tick.
+                for u, p in batch.items():
+                    self._dirty[u] = _merge(p, self._dirty[u]) if u in self._dirty else p
+                raise
+            finally:
+                self._flushing = {}
+                DIRTY_USERS.set(len(self._dirty))
+        elapsed = perf_counter() - started
+        FLUSH_SECONDS.observe(elapsed)
+        FLUSH_USERS.observe(len(batch))
+        self.last = {
+            "flushes": self.last["flushes"] + 1,
+            "users": len(batch),
+            "flush_ms": elapsed * 1000,
+        }
+        return len(batch)
+
+    def flush_soon(self):
+        """Flush in the background, unless a flush started this way is still running or the
+        last one failed less than ``flush_interval_s`` ago."""
+        if (self._early is None or self._early.done()) and monotonic() >= self._retry_at:
+            self._early = asyncio.create_task(self._flush_logged())
+
+    async def _flush_logged(self):
+        try:
+            await self.flush()
+        except Exception:
+            self._retry_at = monotonic() + self.flush_interval_s
+            logger.exception("progress flush failed")
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.flush_interval_s)
+            await self._flush_logged()
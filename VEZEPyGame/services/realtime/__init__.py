@@ -0,0 +1 @@
+"""Realtime fan-out for the Game WebSocket."""
@@ -0,0 +1,208 @@
+from __future__ import annotations
+
+import asyncio
+import itertools
+import json
+import random
+from collections.abc import Callable, Iterable
+from typing import Any
+
+from ..metrics import get_or_create_counter, get_or_create_gauge
+
+CLIENTS = get_or_create_gauge("veze_game_ws_clients", "Connected Game WebSocket clients")
+MAX_DEPTH = get_or_create_gauge(
+    "veze_game_ws_queue_depth_max", "Deepest per-client send queue at the last publish"
+)
+DROPPED = get_or_create_counter(
+    "veze_game_ws_dropped_total",
+    "Events dropped or clients cut off by the slow-client policy",
+    ["policy"],
+)
+
+POLICIES = ("drop_oldest", "drop_newest", "disconnect")
+# Close code for clients cut off by the "disconnect" policy (1013: try again later).
+SLOW_CLIENT_CLOSE = 1013
+
+Message = str | bytes
+
+
+def client_room(client_id: int) -> str:
+    """The room only client ``client_id`` is in, for messages meant for one socket."""
+    return f"@{client_id}"
+
+
+class Client:
+    """One connected socket with its bounded send queue and writer task."""
+
+    def __init__(self, cid: int, ws: Any, queue_size: int, binary: bool = False):
+        self.id = cid
+        self.ws = ws
+        # Negotiated the binary input protocol: gets input frames as bytes.
+        self.binary = binary
+        self.queue: asyncio.Queue[Message] = asyncio.Queue(maxsize=queue_size)
+        self.rooms: set[str] = set()
+        self.sent = 0
+        self.dropped = 0
+        self.writer: asyncio.Task | None = None
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "id": self.id,
+            "rooms": sorted(self.rooms),
+            "binary": self.binary,
+            "depth": self.queue.qsize(),
+            "sent": self.sent,
+            "dropped": self.dropped,
+        }
+
+
+def encode(event: Any) -> Message:
+    """Serialize an event once for every recipient; str/bytes pass through untouched."""
+    if isinstance(event, (str, bytes)):
+        return event
+    return json.dumps(event, separators=(",", ":"))
+
+
+class Broadcaster:
+    """Fans each event out to every client through per-client bounded queues.
+
+    ``publish`` serializes once and only enqueues, so its cost does not depend on how fast
+    clients read. A client whose queue is full loses its oldest queued event
+    ("drop_oldest"), the new event ("drop_newest") or its connection ("disconnect").
+    Clients can join rooms (one per match id); an event published to a room only reaches
+    that room's members. Every client is also alone in its ``client_room``. Client ids
+    start at a random base so ids from different workers do not collide on the event bus.
+    """
+
+    def __init__(self, queue_size: int = 256, policy: str = "drop_oldest"):
+        if policy not in POLICIES:
+            raise ValueError(f"policy must be one of {POLICIES}")
+        self.queue_size = queue_size
+        self.policy = policy
+        self.clients: dict[int, Client] = {}
+        self.rooms: dict[str, set[Client]] = {}
+        self._ids = itertools.count(random.randrange(1, 1 << 31))
+        self.published = 0
+        self.cut_off = 0
+
+    def connect(self, ws: Any, rooms: Iterable[str] = (), binary: bool = False) -> Client:
+        client = Client(next(self._ids), ws, self.queue_size, binary)
+        client.writer = asyncio.get_running_loop().create_task(self._write(client))
+        self.clients[client.id] = client
+        CLIENTS.set(len(self.clients))
+        for room in (client_room(client.id), *rooms):
+            self.join(client, room)
+        return client
+
+    def join(self, client: Client, room: str):
+        client.rooms.add(room)
+        self.rooms.setdefault(room, set()).add(client)
+
+    def leave(self, client: Client, room: str):
+        client.rooms.discard(room)
+        members = self.rooms.get(room)
+        if members is not None:
+            members.discard(client)
+            if not members:
+                del self.rooms[room]
+
+    def disconnect(self, client: Client):
+        for room in list(client.rooms):
+            self.leave(client, room)
+        if self.clients.pop(client.id, None) is not None:
+            CLIENTS.set(len(self.clients))
+        if client.writer is not None and client.writer is not asyncio.current_task():
+            client.writer.cancel()
+
+    async def _write(self, client: Client):
+        ws = client.ws
+        try:
+            while True:
+                msg = await client.queue.get()
+                if isinstance(msg, bytes):
+                    await ws.send_bytes(msg)
+                else:
+                    await ws.send_text(msg)
+                client.sent += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            # The socket is gone; the /events handler notices on its next receive.
+            self.disconnect(client)
+
+    async def _cut_off(self, client: Client):
+        self.disconnect(client)
+        try:
+            await client.ws.close(code=SLOW_CLIENT_CLOSE)
+        except Exception:
+            pass
+
+    def _offer(self, client: Client, msg: Message) -> bool:
+        q = client.queue
+        try:
+            q.put_nowait(msg)
+            return True
+        except asyncio.QueueFull:
+            pass
+        DROPPED.labels(self.policy).inc()
+        if self.policy == "drop_newest":
+            client.dropped += 1
+            return False
+        if self.policy == "drop_oldest":
+            q.get_nowait()
+            q.put_nowait(msg)
+            client.dropped += 1
+            return True
+        self.cut_off += 1
+        asyncio.get_running_loop().create_task(self._cut_off(client))
+        return False
+
+    def _targets(self, room: str | None) -> list[Client]:
+        return list(self.clients.values()) if room is None else list(self.rooms.get(room, ()))
+
+    def _done(self, targets: list[Client]):
+        self.published += 1
+        MAX_DEPTH.set(max((c.queue.qsize() for c in targets), default=0))
+
+    def publish(self, event: Any, room: str | None = None) -> int:
+        """Queue ``event`` for ``room``'s members (default: everyone); returns how many accepted it."""
+        msg = encode(event)
+        targets = self._targets(room)
+        accepted = sum(self._offer(c, msg) for c in targets)
+        self._done(targets)
+        return accepted
+
+    def publish_frame(
+        self, frame: bytes, as_text: Callable[[bytes], str], room: str | None = None
+    ) -> int:
+        """Like ``publish`` for a binary frame: binary clients get ``frame`` as is, the rest
+        get ``as_text(frame)``, computed once and only if someone needs it."""
+        targets = self._targets(room)
+        text: str | None = None
+        accepted = 0
+        for c in targets:
+            if c.binary:
+                accepted += self._offer(c, frame)
+            else:
+                if text is None:
+                    text = as_text(frame)
+                accepted += self._offer(c, text)
+        self._done(targets)
+        return accepted
+
+    def stats(self, top: int = 20) -> dict[str, Any]:
+        depths = sorted((c.stats() for c in self.clients.values()), key=lambda s: -s["depth"])
+        return {
+            "clients": len(self.clients),
+            "rooms": sum(1 for r in self.rooms if not r.startswith("@")),
+            "policy": self.policy,
+            "queue_size": self.queue_size,
+            "published": self.published,
+            "cut_off": self.cut_off,
+            "dropped": sum(c.dropped for c in self.clients.values()),
+            "deepest": depths[:top],
+        }
+
+    def close(self):
+        for client in list(self.clients.values()):
+            self.disconnect(client)
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+from typing import Any
+
+from loguru import logger
+
+from ..metrics import get_or_create_counter
+from .broadcaster import Broadcaster, encode
+from .inputs import relay_json
+
+RELAYED = get_or_create_counter(
+    "veze_game_ws_bus_relayed_total", "Events received from the event bus and fanned out locally"
+)
+PUBLISH_ERRORS = get_or_create_counter(
+    "veze_game_ws_bus_publish_errors_total", "Bus publishes that fell back to local delivery"
+)
+
+
+class EventBus:
+    """Carries Game WebSocket events between workers over Redis pub/sub.
+
+    ``publish`` sends an event once, to ``{prefix}:all`` or ``{prefix}:room:{room}``; every
+    worker's ``run`` loop receives it through one pattern subscription and hands the
+    serialized message to its local ``Broadcaster``, which fans it out to that room's
+    sockets only. Binary input relay frames (``publish_frame``) travel as raw bytes under
+    ``{prefix}:bin:...``. Without a Redis client events are delivered locally straight away.
+    """
+
+    def __init__(
+        self,
+        broadcaster: Broadcaster,
+        client=None,
+        prefix: str = "game:events",
+        reconnect_s: float = 1.0,
+    ):
+        self.broadcaster = broadcaster
+        self._r = client
+        self.prefix = prefix
+        self.reconnect_s = reconnect_s
+        self.published = 0
+        self.relayed = 0
+        # Called with every binary input frame and its room, from whichever worker it came.
+        self.frame_listeners: list[Callable[[bytes, str | None], None]] = []
+
+    def channel(self, room: str | None = None, binary: bool = False) -> str:
+        base = f"{self.prefix}:bin" if binary else self.prefix
+        return f"{base}:all" if room is None else f"{base}:room:{room}"
+
+    def _local(self, msg: str | bytes, room: str | None, binary: bool):
+        if binary:
+            for listener in self.frame_listeners:
+                listener(msg, room)  # type: ignore[arg-type]
+            self.broadcaster.publish_frame(msg, relay_json, room)  # type: ignore[arg-type]
+        else:
+            self.broadcaster.publish(msg, room)
+
+    async def _send(self, msg: str | bytes, room: str | None, binary: bool):
+        self.published += 1
+        if self._r is None:
+            self._local(msg, room, binary)
+            return
+        try:
+            await self._r.publish(self.channel(room, binary), msg)
+        except Exception:
+            # Redis is down: at least this worker's sockets get the event.
+            PUBLISH_ERRORS.inc()
+            logger.exception("event bus publish failed; delivering locally")
+            self._local(msg, room, binary)
+
+    async def publish(self, event: Any, room: str | None = None):
+        await self._send(encode(event), room, False)
+
+    async def publish_many(self, events: list[tuple[Any, str | None]]):
+        """Publish ``(event, room)`` pairs in one pipelined round-trip."""
+        msgs = [(encode(event), room) for event, room in events]
+        self.published += len(msgs)
+        if self._r is not None and msgs:
+            try:
+                async with self._r.pipeline(transaction=False) as pipe:
+                    for msg, room in msgs:
+                        pipe.publish(self.channel(room), msg)
+                    await pipe.execute()
+                return
+            except Exception:
+                PUBLISH_ERRORS.inc()
+                logger.exception("event bus publish failed; delivering locally")
+        for msg, room in msgs:
+            self._local(msg, room, False)
+
+    async def publish_frame(self, frame: bytes, room: str | None = None):
+        """Relay a binary input frame (``inputs.relay``) without re-encoding it."""
+        await self._send(frame, room, True)
+
+    def _relay(self, channel: bytes | str, data: bytes | str):
+        channel = channel.decode() if isinstance(channel, bytes) else channel
+        rest = channel[len(self.prefix) + 1 :]  # all | room:{room} | bin:all | bin:room:{room}
+        binary = rest.startswith("bin:")
+        if binary:
+            rest = rest[len("bin:") :]
+        room = rest[len("room:") :] if rest.startswith("room:") else None
+        if binary:
+            self._local(data if isinstance(data, bytes) else data.encode(), room, True)
+        else:
+            # Browsers read the events as text frames.
+            self._local(data.decode() if isinstance(data, bytes) else data, room, False)
+        self.relayed += 1
+        RELAYED.inc()
+
+    async def run(self):
+        if self._r is None:
+            return
+        while True:
+            pubsub = self._r.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.psubscribe(f"{self.prefix}:*")
+                while True:
+                    msg = await pubsub.get_message(timeout=1.0)
+                    if msg is not None and msg["type"] == "pmessage":
+                        self._relay(msg["channel"], msg["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("event bus subscription failed; resubscribing")
+                await asyncio.sleep(self.reconnect_s)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    def stats(self) -> dict:
+        return {
+            "backend": "memory" if self._r is None else "redis",
+            "published": self.published,
+            "relayed": self.relayed,
+        }
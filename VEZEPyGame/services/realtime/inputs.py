@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import json
+import struct
+from functools import lru_cache
+
+# Binary input protocol, negotiated as the WebSocket subprotocol SUBPROTOCOL.
+#
+# Uplink (client -> server), one frame per binary message, little-endian:
+#   u8  flags     bit 0: delta (mask is XOR against the sender's previous frame)
+#                 bit 1: an impulse mask follows
+#   u16 seq       wrapping sequence number; stale or repeated frames are ignored
+#   u16 mask      pressed keys (bit i = KEYS[i]), or the changed keys for a delta
+#   u16 impulse   one-shot keys, only with flag bit 1
+#
+# Relay (server -> subscribers), fixed RELAY.size bytes:
+#   u32 sender, u16 seq, u16 mask, u16 changed, u16 impulse
+# It carries the absolute mask, so it needs no per-sender state to read or to turn into
+# the JSON {"type":"input","press":[...],"release":[...],"impulse":{...}} shape.
+
+SUBPROTOCOL = "veze.input.v1"
+KEYS = (
+    "w",
+    "a",
+    "s",
+    "d",
+    "shift",
+    " ",
+    "q",
+    "e",
+    "f",
+    "j",
+    "k",
+    "arrowup",
+    "arrowdown",
+    "arrowleft",
+    "arrowright",
+)
+KEY_BITS: dict[str, int] = {k: 1 << i for i, k in enumerate(KEYS)}
+
+DELTA = 0x01
+HAS_IMPULSE = 0x02
+_HEAD = struct.Struct("<BHH")
+_IMPULSE = struct.Struct("<H")
+# 16-bit sequence numbers wrap; a frame up to half the range ahead is newer.
+_SEQ_HALF = 0x8000
+RELAY = struct.Struct("<IHHHH")
+
+
+class InputError(ValueError):
+    """A malformed uplink frame."""
+
+
+class InputState:
+    """What the server remembers about one sending socket."""
+
+    __slots__ = ("mask", "seq")
+
+    def __init__(self):
+        self.mask = 0
+        self.seq: int | None = None
+
+
+def mask_of(keys) -> int:
+    """Bitmask of the known keys in ``keys``; unknown keys are ignored."""
+    m = 0
+    for k in keys:
+        m |= KEY_BITS.get(str(k).lower(), 0)
+    return m
+
+
+@lru_cache(maxsize=4096)
+def keys_of(mask: int) -> tuple[str, ...]:
+    return tuple(k for i, k in enumerate(KEYS) if mask >> i & 1)
+
+
+def encode(seq: int, mask: int, prev: int | None = None, impulse: int = 0) -> bytes:
+    """An uplink frame: a delta against ``prev`` when given, else a full frame."""
+    flags = (DELTA if prev is not None else 0) | (HAS_IMPULSE if impulse else 0)
+    frame = _HEAD.pack(flags, seq & 0xFFFF, mask ^ prev if prev is not None else mask)
+    return frame + _IMPULSE.pack(impulse) if impulse else frame
+
+
+def _newer(seq: int, last: int | None) -> bool:
+    return last is None or 0 < (seq - last) & 0xFFFF < _SEQ_HALF
+
+
+def relay(frame: bytes, state: InputState, sender: int) -> bytes | None:
+    """Apply an uplink frame to ``state`` and return its relay frame (None for stale frames)."""
+    size = _HEAD.size + (_IMPULSE.size if frame[:1] and frame[0] & HAS_IMPULSE else 0)
+    if len(frame) != size or frame[0] & ~(DELTA | HAS_IMPULSE):
+        raise InputError(f"bad input frame ({len(frame)} bytes)")
+    flags, seq, bits = _HEAD.unpack_from(frame)
+    if not _newer(seq, state.seq):
+        return None
+    impulse = _IMPULSE.unpack_from(frame, _HEAD.size)[0] if flags & HAS_IMPULSE else 0
+    mask = state.mask ^ bits if flags & DELTA else bits
+    changed = state.mask ^ mask
+    state.mask, state.seq = mask, seq
+    return RELAY.pack(sender & 0xFFFFFFFF, seq, mask, changed, impulse)
+
+
+def relay_json(frame: bytes) -> str:
+    """The JSON event for clients that did not negotiate SUBPROTOCOL."""
+    sender, seq, mask, changed, impulse = RELAY.unpack(frame)
+    event: dict[str, object] = {
+        "type": "input",
+        "sender": sender,
+        "seq": seq,
+        "press": list(keys_of(changed & mask)),
+        "release": list(keys_of(changed & ~mask)),
+    }
+    if impulse:
+        event["impulse"] = {k: True for k in keys_of(impulse)}
+    return json.dumps(event, separators=(",", ":"))
@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import os
+
+from .metrics import get_or_create_gauge
+
+try:
+    import redis.asyncio as redis
+except Exception:
+    redis = None  # type: ignore[assignment, unused-ignore]
+
+POOL_CONNECTIONS = get_or_create_gauge(
+    "veze_game_redis_pool_connections", "Connections in the shared Redis pool", ["state"]
+)
+POOL_MAX = get_or_create_gauge("veze_game_redis_pool_max", "Size limit of the shared Redis pool")
+
+_client = None
+
+
+def get_redis():
+    """Shared async Redis client for every Game router (``None`` when redis-py is missing).
+
+    The client sits on one ``BlockingConnectionPool`` sized by ``REDIS_MAX_CONNECTIONS``;
+    when all connections are busy, callers wait up to ``REDIS_POOL_TIMEOUT`` seconds for
+    one instead of opening more. Created on first use; ``close_pool`` runs at app shutdown.
+    """
+    global _client
+    if _client is None and redis is not None:
+        pool = redis.BlockingConnectionPool.from_url(
+            os.getenv("REDIS_URL", "redis://localhost:6379/0"),
+            max_connections=int(os.getenv("REDIS_MAX_CONNECTIONS", "64")),
+            timeout=float(os.getenv("REDIS_POOL_TIMEOUT", "5")),
+        )
+        _client = redis.Redis(connection_pool=pool)
+    return _client
+
+
+async def redis_client():
+    """FastAPI dependency form of ``get_redis`` (async, so it is not dispatched to a thread)."""
+    return get_redis()
+
+
+async def close_pool():
+    # Drop the sockets but keep the client, so objects holding it reconnect on next use.
+    if _client is not None:
+        await _client.connection_pool.disconnect()
+
+
+def _count(pool, attr: str) -> int | None:
+    # redis-py exposes no public pool counters; these internals exist in 4.x-8.x.
+    conns = getattr(pool, attr, None)
+    return None if conns is None else len(conns)
+
+
+def pool_stats() -> dict:
+    """Pool size and use; ``in_use``/``idle`` are ``None`` (and their gauges left alone)
+    when the installed redis-py keeps its connections elsewhere."""
+    if _client is None:
+        return {"enabled": redis is not None, "max": 0, "in_use": 0, "idle": 0}
+    pool = _client.connection_pool
+    counts = {
+        "in_use": _count(pool, "_in_use_connections"),
+        "idle": _count(pool, "_available_connections"),
+    }
+    for state, n in counts.items():
+        if n is not None:
+            POOL_CONNECTIONS.labels(state=state).set(n)
+    POOL_MAX.set(pool.max_connections)
+    return {"enabled": True, "max": pool.max_connections, **counts}
@@ -1,18 +1,138 @@
-from fastapi import APIRouter
-from pydantic import BaseModel
+import asyncio
+import os
 from typing import Any
 
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.exceptions import RequestValidationError
+from pydantic import BaseModel, ValidationError
+
+from ..redis_pool import get_redis
+from .decode import BodyError, Timestamp, decode_events, decompress, read_body
+from .ingest_worker import RollingAggregator, TelemetryConsumer
+from .sink import TelemetrySink
+from .store import ColumnStore
+from .stream import TelemetryStream
+
 router = APIRouter()
 
+# Reject batches (429) once the consumer group is this many entries behind the stream.
+MAX_LAG = int(os.getenv("TEL_MAX_LAG", "100000"))
+# Upper bound on an /ingest body, both as sent and decompressed.
+MAX_BODY_BYTES = int(os.getenv("TEL_MAX_BODY_BYTES", str(64 << 20)))
+
+STREAM = TelemetryStream(
+    get_redis(),
+    stream=os.getenv("TEL_STREAM", "telemetry"),
+    maxlen=int(os.getenv("TEL_STREAM_MAXLEN", "1000000")),
+    lag_scan_max=MAX_LAG + 1,
+)
+AGGREGATOR = RollingAggregator(
+    window_s=int(os.getenv("TEL_WINDOW_S", "60")), value_field=os.getenv("TEL_VALUE_FIELD", "value")
+)
+# Started from the app lifespan when TEL_CONSUMER_ENABLED is on; see app.main.
+CONSUMER = TelemetryConsumer(STREAM, AGGREGATOR)
+
+_sink: TelemetrySink | None = None
+
+
+def sink() -> TelemetrySink | None:
+    """Column-file sink under TEL_SINK_DIR when set; its flusher runs from the app lifespan."""
+    global _sink
+    root = os.getenv("TEL_SINK_DIR")
+    if _sink is None and root:
+        _sink = TelemetrySink(
+            ColumnStore(root),
+            flush_interval_s=float(os.getenv("TEL_SINK_FLUSH_S", "5")),
+            max_pending=int(os.getenv("TEL_SINK_MAX_PENDING", "100000")),
+        )
+    return _sink
+
 
 class Event(BaseModel):
     event: str
-    ts: float
+    ts: Timestamp
     user_id: str | None = None
     payload: dict[str, Any] | None = None
 
 
+async def _telemetry() -> TelemetryStream:
+    return STREAM
+
+
+async def _admit(stream: TelemetryStream):
+    """429 while the consumers are more than MAX_LAG entries behind; 503 when Redis is
+    unreachable, since accepted events must reach the stream (producers retry either way)."""
+    try:
+        lag = await stream.lag()
+    except Exception as exc:
+        raise HTTPException(503, "telemetry stream unavailable") from exc
+    if lag > MAX_LAG:
+        raise HTTPException(
+            429, f"telemetry backlog {lag} exceeds {MAX_LAG}", headers={"Retry-After": "1"}
+        )
+
+
+async def _append(stream: TelemetryStream, events: list[dict]) -> int:
+    try:
+        accepted = await stream.append(events)
+    except Exception as exc:
+        raise HTTPException(503, "telemetry stream unavailable") from exc
+    s = sink()
+    if s is not None and s.add(events):
+        s.flush_soon()
+    return accepted
+
+
 @router.post("/bulk")
-async def bulk(events: list[Event]):
-    # Minimal dev stub: simply count
-    return {"accepted": len(events)}
+async def bulk(events: list[Event], stream: TelemetryStream = Depends(_telemetry)):
+    await _admit(stream)
+    accepted = await _append(stream, [e.model_dump() for e in events])
+    return {"accepted": accepted}
+
+
+@router.post("/ingest")
+async def ingest(request: Request, stream: TelemetryStream = Depends(_telemetry)):
+    """Raw-body ingest: NDJSON, a JSON array of events or a columnar batch, optionally
+    gzip/zstd-compressed. Validated in one pass without building an ``Event`` per row."""
+    await _admit(stream)
+    try:
+        if int(request.headers.get("content-length") or 0) > MAX_BODY_BYTES:
+            raise BodyError(413, f"body exceeds {MAX_BODY_BYTES} bytes")
+        raw = await read_body(request.stream(), MAX_BODY_BYTES)
+        body = decompress(raw, request.headers.get("content-encoding"), MAX_BODY_BYTES)
+        events = decode_events(body, request.headers.get("content-type"))
+    except BodyError as e:
+        raise HTTPException(e.status, e.detail) from e
+    except ValidationError as e:
+        raise RequestValidationError(e.errors(include_url=False)) from e
+    accepted = await _append(stream, events)
+    return {"accepted": accepted}
+
+
+@router.get("/stats")
+async def stats():
+    try:
+        lag: int | None = await STREAM.lag()
+    except Exception:
+        lag = None
+    return {
+        "window_s": AGGREGATOR.window_s,
+        "consumed": CONSUMER.consumed,
+        "lag": lag,
+        "events": AGGREGATOR.snapshot(),
+    }
+
+
+@router.get("/query")
+async def query(
+    event: str | None = None,
+    user_id: str | None = None,
+    ts_from: float | None = None,
+    ts_to: float | None = None,
+    limit: int = Query(1000, ge=1, le=100_000),
+):
+    """Stored events with ``ts_from <= ts < ts_to``, filtered by event and user."""
+    s = sink()
+    if s is None:
+        raise HTTPException(404, "telemetry sink disabled (set TEL_SINK_DIR)")
+    return await asyncio.to_thread(s.store.query, event, user_id, ts_from, ts_to, limit)
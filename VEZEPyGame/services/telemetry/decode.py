@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import zlib
+from collections.abc import AsyncIterable
+from typing import Annotated, Any, NotRequired
+
+from pydantic import Field, TypeAdapter
+from typing_extensions import TypedDict
+
+from .store import MAX_TS
+
+try:
+    import zstandard
+except Exception:
+    zstandard = None  # type: ignore[assignment, unused-ignore]
+
+
+# Unix seconds the column store can partition by hour: finite, 1970 up to year 9999.
+Timestamp = Annotated[float, Field(ge=0, le=MAX_TS, allow_inf_nan=False)]
+
+
+class EventRow(TypedDict):
+    event: str
+    ts: Timestamp
+    user_id: NotRequired[str | None]
+    payload: NotRequired[dict[str, Any] | None]
+
+
+class ColumnBatch(TypedDict):
+    """Column-per-field batch; ``event`` may be one string shared by every row."""
+
+    event: str | list[str]
+    ts: list[Timestamp]
+    user_id: NotRequired[list[str | None] | None]
+    payload: NotRequired[list[dict[str, Any] | None] | None]
+
+
+# TypedDicts validate straight into dicts in pydantic-core: one pass over the whole body and
+# no model instance per event.
+_ROWS = TypeAdapter(list[EventRow])
+_BATCH = TypeAdapter(list[EventRow] | ColumnBatch)
+
+
+class BodyError(ValueError):
+    """Unreadable body: ``status`` is the HTTP status to answer with."""
+
+    def __init__(self, status: int, detail: str):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+async def read_body(chunks: AsyncIterable[bytes], max_bytes: int) -> bytes:
+    """Collect a request body from its stream, refusing more than ``max_bytes`` on the wire."""
+    out = bytearray()
+    async for chunk in chunks:
+        out += chunk
+        if len(out) > max_bytes:
+            raise BodyError(413, f"body exceeds {max_bytes} bytes")
+    return bytes(out)
+
+
+def _inflate(body: bytes, encoding: str, max_bytes: int) -> bytes:
+    # gzip may hold several members back to back (RFC 1952 2.2); inflate each in turn.
+    gzip = encoding != "deflate"
+    out = bytearray()
+    while True:
+        d = zlib.decompressobj(wbits=47 if gzip else 15)
+        try:
+            out += d.decompress(body, max_bytes + 1 - len(out))
+        except zlib.error as exc:
+            raise BodyError(400, f"invalid {encoding} body") from exc
+        if len(out) > max_bytes:
+            return bytes(out)
+        if not d.eof:
+            raise BodyError(400, f"truncated {encoding} body")
+        body = d.unused_data
+        if not body:
+            return bytes(out)
+        if not gzip:
+            raise BodyError(400, f"trailing data after {encoding} body")
+
+
+def decompress(body: bytes, encoding: str | None, max_bytes: int) -> bytes:
+    """Undo ``Content-Encoding`` gzip/deflate/zstd, refusing output larger than ``max_bytes``."""
+    encoding = (encoding or "identity").strip().lower()
+    if encoding == "identity":
+        out = body
+    elif encoding in {"gzip", "x-gzip", "deflate"}:
+        out = _inflate(body, encoding, max_bytes)
+    elif encoding == "zstd":
+        if zstandard is None:
+            raise BodyError(415, "zstd bodies need the zstandard package")
+        try:
+            with zstandard.ZstdDecompressor().stream_reader(body) as r:
+                out = r.read(max_bytes + 1)
+        except zstandard.ZstdError as exc:
+            raise BodyError(400, "invalid zstd body") from exc
+    else:
+        raise BodyError(415, f"unsupported content-encoding {encoding}")
+    if len(out) > max_bytes:
+        raise BodyError(413, f"decoded body exceeds {max_bytes} bytes")
+    return out
+
+
+def _ndjson_array(body: bytes) -> bytes:
+    return b"[" + b",".join(line for line in body.splitlines() if line.strip()) + b"]"
+
+
+def _columns(batch: ColumnBatch) -> list[dict[str, Any]]:
+    ts = batch["ts"]
+    n = len(ts)
+    event = batch["event"]
+    events = [event] * n if isinstance(event, str) else event
+    user_ids = batch.get("user_id") or [None] * n
+    payloads = batch.get("payload") or [None] * n
+    if not len(events) == len(user_ids) == len(payloads) == n:
+        raise BodyError(422, "columns must have equal lengths")
+    return [
+        {"event": e, "ts": t, "user_id": u, "payload": p}
+        for e, t, u, p in zip(events, ts, user_ids, payloads, strict=True)
+    ]
+
+
+def decode_events(body: bytes, content_type: str | None) -> list[dict[str, Any]]:
+    """Events of an NDJSON body, a JSON array of events or a :class:`ColumnBatch`.
+
+    Raises ``pydantic.ValidationError`` for schema errors and :class:`BodyError` otherwise.
+    """
+    if "ndjson" in (content_type or ""):
+        return _ROWS.validate_json(_ndjson_array(body))  # type: ignore[return-value]
+    data = _BATCH.validate_json(body)
+    return data if isinstance(data, list) else _columns(data)  # type: ignore[return-value]
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import asyncio
+import os
+import random
+import socket
+from collections import deque
+from collections.abc import Iterable
+from time import time
+from typing import Any
+
+import numpy as np
+from loguru import logger
+
+from .stream import TelemetryStream
+
+
+class _Second:
+    __slots__ = ("at", "count", "seen", "values")
+
+    def __init__(self, at: int):
+        self.at = at
+        self.count = 0
+        self.values: list[float] = []
+        self.seen = 0
+
+
+class RollingAggregator:
+    """Per-event-type counts and value percentiles over a rolling window of 1-second buckets.
+
+    The value of an event is ``payload[value_field]`` when numeric. Each bucket keeps at
+    most ``max_samples`` values (reservoir sampling), which bounds memory per event type.
+    """
+
+    def __init__(self, window_s: int = 60, value_field: str = "value", max_samples: int = 1024):
+        self.window_s = window_s
+        self.value_field = value_field
+        self.max_samples = max_samples
+        self._buckets: dict[str, deque[_Second]] = {}
+        self._rnd = random.Random()
+
+    def _bucket(self, event: str, at: int) -> _Second:
+        ring = self._buckets.setdefault(event, deque())
+        if not ring or ring[-1].at < at:
+            ring.append(_Second(at))
+        return ring[-1]
+
+    def add(self, events: Iterable[dict[str, Any]], now: float | None = None):
+        at = int(time() if now is None else now)
+        for ev in events:
+            b = self._bucket(ev["event"], at)
+            b.count += 1
+            payload = ev.get("payload") or {}
+            v = payload.get(self.value_field) if isinstance(payload, dict) else None
+            if isinstance(v, (int, float)) and not isinstance(v, bool):
+                b.seen += 1
+                if len(b.values) < self.max_samples:
+                    b.values.append(float(v))
+                else:
+                    j = self._rnd.randrange(b.seen)
+                    if j < self.max_samples:
+                        b.values[j] = float(v)
+        self._expire(at)
+
+    def _expire(self, now: int):
+        horizon = now - self.window_s
+        for event in list(self._buckets):
+            ring = self._buckets[event]
+            while ring and ring[0].at <= horizon:
+                ring.popleft()
+            if not ring:
+                del self._buckets[event]
+
+    def snapshot(self, now: float | None = None) -> dict[str, dict[str, Any]]:
+        self._expire(int(time() if now is None else now))
+        out: dict[str, dict[str, Any]] = {}
+        for event, ring in self._buckets.items():
+            count = sum(b.count for b in ring)
+            stats: dict[str, Any] = {"count": count, "rate_per_s": count / self.window_s}
+            values = [v for b in ring for v in b.values]
+            if values:
+                p50, p95, p99 = np.percentile(np.asarray(values), [50, 95, 99]).tolist()
+                stats.update({"p50": p50, "p95": p95, "p99": p99})
+            out[event] = stats
+        return out
+
+
+class TelemetryConsumer:
+    """Reads the telemetry stream as one member of its consumer group and feeds the aggregator
+    (or anything else with ``add(events)``).
+
+    Each Game worker consumes a share of the stream, so its aggregates cover that share.
+    """
+
+    def __init__(
+        self,
+        stream: TelemetryStream,
+        aggregator: RollingAggregator | Any,
+        name: str | None = None,
+        batch: int = 512,
+    ):
+        self.stream = stream
+        self.aggregator = aggregator
+        self.name = name or f"{socket.gethostname()}-{os.getpid()}"
+        self.batch = batch
+        self.consumed = 0
+
+    async def run_once(self, block_ms: int = 1000) -> int:
+        msgs = await self.stream.read(self.name, count=self.batch, block_ms=block_ms)
+        if msgs:
+            self.aggregator.add(ev for _, ev in msgs)
+            await self.stream.ack([msg_id for msg_id, _ in msgs])
+            self.consumed += len(msgs)
+        return len(msgs)
+
+    async def run(self):
+        if self.stream._r is None:
+            return
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("telemetry consumer failed; retrying")
+                await asyncio.sleep(5)
@@ -0,0 +1,141 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Iterable
+from time import monotonic, perf_counter, time
+from typing import Any
+
+from loguru import logger
+
+from ..metrics import get_or_create_counter, get_or_create_histogram
+from .store import ColumnStore
+
+FLUSH_SECONDS = get_or_create_histogram(
+    "veze_game_tel_sink_flush_seconds",
+    "Latency of one telemetry sink flush to column files",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5),
+)
+DROPPED_ROWS = get_or_create_counter(
+    "veze_game_tel_sink_dropped_total",
+    "Telemetry rows the sink dropped because they have no valid hour partition",
+)
+FLUSH_ROWS = get_or_create_histogram(
+    "veze_game_tel_sink_flush_rows",
+    "Telemetry rows written by one sink flush",
+    buckets=(1, 10, 100, 1000, 10000, 50000, 100000, 500000),
+)
+
+
+class TelemetrySink:
+    """Buffers accepted telemetry per (event, hour) and writes it to a :class:`ColumnStore`.
+
+    ``run`` flushes every ``flush_interval_s`` and compacts closed hours every
+    ``compact_every_s``; file IO happens in a worker thread, off the event loop.
+    Rows with a ``ts`` that names no hour partition are dropped (and counted) rather
+    than kept for a retry that can never succeed.
+    """
+
+    def __init__(
+        self,
+        store: ColumnStore,
+        flush_interval_s: float = 5.0,
+        max_pending: int = 100_000,
+        compact_every_s: float = 300.0,
+    ):
+        self.store = store
+        self.flush_interval_s = flush_interval_s
+        self.max_pending = max_pending
+        self.compact_every_s = compact_every_s
+        self._pending: dict[tuple, list[dict[str, Any]]] = {}
+        self._size = 0
+        self._early: asyncio.Task | None = None
+        # After a failed flush, early flushes wait for the next interval instead of retrying per request.
+        self._retry_at = 0.0
+        self.last: dict = {"flushes": 0, "rows": 0, "parts": 0, "flush_ms": 0.0}
+
+    @property
+    def pending(self) -> int:
+        return self._size
+
+    def add(self, events: Iterable[dict[str, Any]]) -> bool:
+        """Buffer a batch; returns True once ``max_pending`` is reached and a flush is due."""
+        events = list(events)
+        kept = 0
+        for key, rows in ColumnStore.group(events).items():
+            self._pending.setdefault(key, []).extend(rows)
+            kept += len(rows)
+        if kept < len(events):
+            DROPPED_ROWS.inc(len(events) - kept)
+        self._size += kept
+        return self._size >= self.max_pending
+
+    def _write(self, batch: dict[tuple, list[dict[str, Any]]]) -> int:
+        """Write each partition as one part, removing it from ``batch`` once on disk."""
+        parts = 0
+        for event, hour in list(batch):
+            try:
+                self.store.partition(event, hour)
+            except (ValueError, OverflowError, OSError):
+                rows = batch.pop((event, hour))
+                DROPPED_ROWS.inc(len(rows))
+                logger.error(
+                    "dropping {} telemetry rows of {!r}: hour {} has no partition",
+                    len(rows),
+                    event,
+                    hour,
+                )
+                continue
+            self.store.write(event, hour, batch[(event, hour)])
+            del batch[(event, hour)]
+            parts += 1
+        return parts
+
+    async def flush(self) -> int:
+        if not self._pending:
+            return 0
+        batch, size = self._pending, self._size
+        self._pending, self._size = {}, 0
+        started = perf_counter()
+        try:
+            parts = await asyncio.to_thread(self._write, batch)
+        except Exception:
+            # Re-queue the partitions that did not reach disk ahead of newer rows.
+            for key, rows in batch.items():
+                self._pending.setdefault(key, [])[:0] = rows
+                self._size += len(rows)
+            raise
+        elapsed = perf_counter() - started
+        FLUSH_SECONDS.observe(elapsed)
+        FLUSH_ROWS.observe(size)
+        self.last = {
+            "flushes": self.last["flushes"] + 1,
+            "rows": size,
+            "parts": parts,
+            "flush_ms": elapsed * 1000,
+        }
+        return size
+
+    def flush_soon(self):
+        """Flush in the background, unless a flush started this way is still running or the
+        last one failed less than ``flush_interval_s`` ago."""
+        if (self._early is None or self._early.done()) and monotonic() >= self._retry_at:
+            self._early = asyncio.create_task(self._flush_logged())
+
+    async def _flush_logged(self):
+        try:
+            await self.flush()
+        except Exception:
+            self._retry_at = monotonic() + self.flush_interval_s
+            logger.exception("telemetry sink flush failed")
+
+    async def run(self):
+        next_compact = time() + self.compact_every_s
+        while True:
+            await asyncio.sleep(self.flush_interval_s)
+            try:
+                await self.flush()
+                if time() >= next_compact:
+                    next_compact = time() + self.compact_every_s
+                    await asyncio.to_thread(self.store.compact_closed)
+            except Exception:
+                logger.exception("telemetry sink flush failed")
@@ -0,0 +1,261 @@
+from __future__ import annotations
+
+import json
+import math
+import os
+import shutil
+import time
+from collections.abc import Iterable
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+from urllib.parse import quote, unquote
+
+import numpy as np
+
+# Layout:  {root}/event={event}/hour={YYYYMMDDHH}/{part}/
+#   ts.npy           float64, sorted ascending
+#   user_id.npy      fixed-width unicode ("" when absent)
+#   payload.off.npy  int64 offsets (n + 1) into payload.bin; an empty slice is a null payload
+#   payload.bin      concatenated compact JSON payloads
+# Parts are immutable. A flush adds a part named "{time_ns:020d}-{pid}"; compaction folds
+# an hour's parts into "all-{newest folded part}", which readers use in place of every
+# part it covers, so a partition settles to one file set per hour per event type.
+
+COMPACTED = "all-"
+_LOCK = ".compact.lock"
+_STALE_LOCK_S = 600
+# Latest timestamp an hour partition can be named for (9999-12-31T23:59:59Z).
+MAX_TS = 253402300799.0
+
+
+def hour_of(ts: float) -> int:
+    return int(ts // 3600)
+
+
+def valid_ts(ts: Any) -> bool:
+    return isinstance(ts, (int, float)) and math.isfinite(ts) and 0 <= ts <= MAX_TS
+
+
+def _hour_name(hour: int) -> str:
+    return datetime.fromtimestamp(hour * 3600, UTC).strftime("%Y%m%d%H")
+
+
+def _hour_index(name: str) -> int:
+    return hour_of(datetime.strptime(name, "%Y%m%d%H").replace(tzinfo=UTC).timestamp())
+
+
+class ColumnStore:
+    """Hour/event-partitioned column files on local disk, read back through memory maps.
+
+    Queries prune partitions by event and hour, binary-search the sorted ``ts`` column
+    of each part and compare ``user_id`` only inside that range; payload bytes are
+    touched (and JSON-decoded) for matching rows only.
+    """
+
+    def __init__(self, root: str | Path):
+        self.root = Path(root)
+
+    def partition(self, event: str, hour: int) -> Path:
+        return self.root / f"event={quote(event, safe='')}" / f"hour={_hour_name(hour)}"
+
+    # -- writes ---------------------------------------------------------------------
+
+    def write(self, event: str, hour: int, rows: list[dict[str, Any]]) -> Path | None:
+        """Write ``rows`` of one event type and hour as a new part; returns its directory."""
+        if not rows:
+            return None
+        rows = sorted(rows, key=lambda r: r["ts"])
+        payloads = [
+            (
+                b""
+                if r.get("payload") is None
+                else json.dumps(r["payload"], separators=(",", ":")).encode()
+            )
+            for r in rows
+        ]
+        return self._write_part(
+            self.partition(event, hour) / f"{time.time_ns():020d}-{os.getpid()}",
+            np.fromiter((r["ts"] for r in rows), dtype=np.float64, count=len(rows)),
+            np.array([r.get("user_id") or "" for r in rows], dtype=str),
+            np.cumsum([0] + [len(p) for p in payloads], dtype=np.int64),
+            b"".join(payloads),
+        )
+
+    @staticmethod
+    def _write_part(
+        final: Path, ts: np.ndarray, users: np.ndarray, offsets: np.ndarray, blob: bytes
+    ) -> Path:
+        tmp = final.with_name(f".tmp-{final.name}")
+        tmp.mkdir(parents=True, exist_ok=True)
+        np.save(tmp / "ts.npy", ts)
+        np.save(tmp / "user_id.npy", users)
+        np.save(tmp / "payload.off.npy", offsets)
+        (tmp / "payload.bin").write_bytes(blob)
+        os.rename(tmp, final)
+        return final
+
+    def compact(self, partition: Path) -> bool:
+        """Fold every readable part of ``partition`` into one; False when there was nothing to do."""
+        parts = self.parts(partition)
+        if len(parts) <= 1:
+            return False
+        lock = partition / _LOCK
+        try:
+            fd = os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            if time.time() - lock.stat().st_mtime < _STALE_LOCK_S:
+                return False
+            lock.unlink(missing_ok=True)
+            return self.compact(partition)
+        os.close(fd)
+        try:
+            parts = self.parts(partition)
+            cols = [self._load(p) for p in parts]
+            ts = np.concatenate([c[0] for c in cols])
+            order = np.argsort(ts, kind="stable")
+            users = np.concatenate([c[1] for c in cols])[order]
+            payloads = [
+                blob[a:b]
+                for _, _, off, blob in cols
+                for a, b in zip(off[:-1].tolist(), off[1:].tolist(), strict=True)
+            ]
+            payloads = [payloads[i] for i in order.tolist()]
+            offsets = np.cumsum([0] + [len(p) for p in payloads], dtype=np.int64)
+            newest = max(p.name.removeprefix(COMPACTED) for p in parts)
+            self._write_part(
+                partition / (COMPACTED + newest), ts[order], users, offsets, b"".join(payloads)
+            )
+            for p in parts:
+                shutil.rmtree(p, ignore_errors=True)
+        finally:
+            lock.unlink(missing_ok=True)
+        return True
+
+    def compact_closed(self, now: float | None = None, grace_s: float = 300) -> int:
+        """Compact every partition whose hour ended more than ``grace_s`` ago."""
+        cutoff = hour_of((time.time() if now is None else now) - grace_s)
+        done = 0
+        for partition in self.partitions():
+            if _hour_index(partition.name.removeprefix("hour=")) < cutoff:
+                done += self.compact(partition)
+        return done
+
+    # -- reads ----------------------------------------------------------------------
+
+    def partitions(
+        self, event: str | None = None, ts_from: float | None = None, ts_to: float | None = None
+    ) -> list[Path]:
+        """Partition directories that may hold matching rows, oldest hour first."""
+        if event is not None:
+            event_dirs = [self.root / f"event={quote(event, safe='')}"]
+        else:
+            event_dirs = sorted(self.root.glob("event=*")) if self.root.exists() else []
+        first = None if ts_from is None else hour_of(ts_from)
+        last = None if ts_to is None else hour_of(ts_to)
+        out = []
+        for d in event_dirs:
+            if not d.is_dir():
+                continue
+            for p in d.glob("hour=*"):
+                h = _hour_index(p.name.removeprefix("hour="))
+                if (first is None or h >= first) and (last is None or h <= last):
+                    out.append((h, p))
+        return [p for _, p in sorted(out)]
+
+    @staticmethod
+    def parts(partition: Path) -> list[Path]:
+        """Parts a reader should scan: the newest compacted part plus any written after it."""
+        try:
+            names = sorted(n for n in os.listdir(partition) if not n.startswith("."))
+        except FileNotFoundError:
+            return []
+        folded = [n.removeprefix(COMPACTED) for n in names if n.startswith(COMPACTED)]
+        cover = max(folded) if folded else ""
+        keep = [COMPACTED + cover] if folded else []
+        keep += [n for n in names if not n.startswith(COMPACTED) and n > cover]
+        return [partition / n for n in keep]
+
+    @staticmethod
+    def _load(part: Path):
+        return (
+            np.load(part / "ts.npy"),
+            np.load(part / "user_id.npy"),
+            np.load(part / "payload.off.npy"),
+            (part / "payload.bin").read_bytes(),
+        )
+
+    def query(
+        self,
+        event: str | None = None,
+        user_id: str | None = None,
+        ts_from: float | None = None,
+        ts_to: float | None = None,
+        limit: int = 1000,
+    ) -> dict[str, Any]:
+        """Rows with ``ts_from <= ts < ts_to`` (and matching event/user), oldest first."""
+        rows: list[dict[str, Any]] = []
+        scanned_parts = scanned_rows = 0
+        by_hour: dict[str, list[Path]] = {}
+        for p in self.partitions(event, ts_from, ts_to):
+            by_hour.setdefault(p.name, []).append(p)
+        for hour in sorted(by_hour):
+            found: list[dict[str, Any]] = []
+            for partition in by_hour[hour]:
+                name = unquote(partition.parent.name.removeprefix("event="))
+                for part in self.parts(partition):
+                    try:
+                        matched, scanned = self._scan(part, name, user_id, ts_from, ts_to)
+                    except FileNotFoundError:
+                        # Folded into a compacted part between listing and reading.
+                        continue
+                    found += matched
+                    scanned_parts += 1
+                    scanned_rows += scanned
+            found.sort(key=lambda r: r["ts"])
+            rows += found
+            if len(rows) >= limit:
+                break
+        return {"rows": rows[:limit], "parts": scanned_parts, "scanned": scanned_rows}
+
+    @staticmethod
+    def _scan(
+        part: Path, event: str, user_id: str | None, ts_from: float | None, ts_to: float | None
+    ) -> tuple[list[dict[str, Any]], int]:
+        """Matching rows of one part and the number of rows inside its ts range."""
+        ts = np.load(part / "ts.npy", mmap_mode="r")
+        lo = 0 if ts_from is None else int(np.searchsorted(ts, ts_from, "left"))
+        hi = len(ts) if ts_to is None else int(np.searchsorted(ts, ts_to, "left"))
+        if hi <= lo:
+            return [], 0
+        users = np.load(part / "user_id.npy", mmap_mode="r")
+        idx = np.arange(lo, hi) if user_id is None else lo + np.flatnonzero(users[lo:hi] == user_id)
+        if not len(idx):
+            return [], hi - lo
+        offsets = np.load(part / "payload.off.npy", mmap_mode="r")
+        blob = np.memmap(part / "payload.bin", dtype=np.uint8, mode="r") if offsets[-1] else None
+        out = []
+        for i in idx.tolist():
+            a, b = int(offsets[i]), int(offsets[i + 1])
+            out.append(
+                {
+                    "event": event,
+                    "ts": float(ts[i]),
+                    "user_id": str(users[i]) or None,
+                    "payload": (
+                        json.loads(blob[a:b].tobytes()) if blob is not None and b > a else None
+                    ),
+                }
+            )
+        return out, hi - lo
+
+    @staticmethod
+    def group(events: Iterable[dict[str, Any]]) -> dict[tuple, list[dict[str, Any]]]:
+        """``{(event, hour): rows}`` for a batch of events; rows whose ``ts`` falls outside
+        0..``MAX_TS`` have no hour partition and are left out."""
+        out: dict[tuple, list[dict[str, Any]]] = {}
+        for ev in events:
+            if not valid_ts(ev["ts"]):
+                continue
+            out.setdefault((ev["event"], hour_of(ev["ts"])), []).append(ev)
+        return out
@@ -0,0 +1,128 @@
+from __future__ import annotations
+
+import json
+from collections.abc import Iterable
+from time import monotonic
+from typing import Any
+
+# Stream entry fields: e=event, ts=timestamp, u=user_id (optional), p=JSON payload (optional).
+
+
+def encode(event: dict[str, Any]) -> dict[str, Any]:
+    fields: dict[str, Any] = {"e": event["event"], "ts": repr(float(event["ts"]))}
+    if event.get("user_id") is not None:
+        fields["u"] = event["user_id"]
+    if event.get("payload") is not None:
+        fields["p"] = json.dumps(event["payload"], separators=(",", ":"))
+    return fields
+
+
+def _s(v: Any) -> str:
+    return v.decode() if isinstance(v, bytes) else v
+
+
+def decode(fields: dict[Any, Any]) -> dict[str, Any]:
+    f = {_s(k): v for k, v in fields.items()}
+    return {
+        "event": _s(f["e"]),
+        "ts": float(f["ts"]),
+        "user_id": _s(f["u"]) if "u" in f else None,
+        "payload": json.loads(f["p"]) if "p" in f else None,
+    }
+
+
+class TelemetryStream:
+    """Appends validated telemetry events to a Redis Stream and reports consumer-group lag.
+
+    Without a Redis client (redis-py missing) events are counted and dropped.
+    """
+
+    def __init__(
+        self,
+        client=None,
+        stream: str = "telemetry",
+        group: str = "veze",
+        *,
+        maxlen: int = 1_000_000,
+        lag_cache_s: float = 0.5,
+        lag_scan_max: int = 100_000,
+    ):
+        self._r = client
+        self.stream = stream
+        self.group = group
+        self.maxlen = maxlen
+        self.lag_cache_s = lag_cache_s
+        # Redis < 7 reports no group lag; it is then counted with XRANGE, up to this many entries.
+        self.lag_scan_max = lag_scan_max
+        self._lag: tuple[float, int] = (0.0, 0)
+        self._group_ready = False
+
+    async def append(self, events: Iterable[dict[str, Any]]) -> int:
+        """XADD every event in one pipeline; returns the number appended."""
+        if self._r is None:
+            return sum(1 for _ in events)
+        n = 0
+        async with self._r.pipeline(transaction=False) as pipe:
+            for ev in events:
+                pipe.xadd(self.stream, encode(ev), maxlen=self.maxlen, approximate=True)
+                n += 1
+            if n:
+                await pipe.execute()
+        return n
+
+    async def lag(self) -> int:
+        """Entries appended but not yet delivered to the consumer group, cached for ``lag_cache_s``.
+
+        No stream or no group (nobody consuming) counts as no lag; Redis errors propagate.
+        """
+        if self._r is None:
+            return 0
+        at, value = self._lag
+        if monotonic() - at < self.lag_cache_s:
+            return value
+        try:
+            groups = await self._r.xinfo_groups(self.stream)
+        except Exception as e:
+            if "no such key" not in str(e):
+                raise
+            groups = []
+        value = 0
+        for raw in groups:
+            info = {_s(k): v for k, v in raw.items()}
+            if _s(info.get("name")) == self.group:
+                lag: int | None = info.get("lag")
+                value = (
+                    int(lag)
+                    if lag is not None
+                    else await self._undelivered(info["last-delivered-id"])
+                )
+        self._lag = (monotonic(), value)
+        return value
+
+    async def _undelivered(self, delivered: Any) -> int:
+        """Entries after the group's last-delivered-id, counted up to ``lag_scan_max``."""
+        info = await self._r.xinfo_stream(self.stream)
+        if _s(info["last-generated-id"]) == _s(delivered):
+            return 0
+        entries = await self._r.xrange(self.stream, min=delivered, count=self.lag_scan_max + 1)
+        return sum(1 for msg_id, _ in entries if _s(msg_id) != _s(delivered))
+
+    async def read(
+        self, consumer: str, count: int = 512, block_ms: int = 1000
+    ) -> list[tuple[Any, dict[str, Any]]]:
+        if not self._group_ready:
+            try:
+                # From the start, so events appended before the first consumer are not skipped.
+                await self._r.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+            except Exception as e:
+                if "BUSYGROUP" not in str(e):
+                    raise
+            self._group_ready = True
+        res = await self._r.xreadgroup(
+            self.group, consumer, {self.stream: ">"}, count=count, block=block_ms
+        )
+        return [(msg_id, decode(fields)) for _, msgs in res or [] for msg_id, fields in msgs]
+
+    async def ack(self, ids: list[Any]):
+        if ids:
+            await self._r.xack(self.stream, self.group, *ids)
@@ -0,0 +1 @@
+"""World simulation service."""
@@ -0,0 +1,65 @@
+"""World simulation service."""
+
+import os
+
+from fastapi import APIRouter, HTTPException, Query
+
+from .interest import InterestGrid
+from .loop import TickLoop
+from .state import NPC, World
+
+router = APIRouter()
+
+_loop: TickLoop | None = None
+
+
+def tick_loop() -> TickLoop | None:
+    """The authoritative world when WORLD_ENABLED=1. Its loop runs from the app lifespan and
+    reads player inputs off the event bus, so enable it on one worker per deployment."""
+    global _loop
+    if _loop is None and os.getenv("WORLD_ENABLED", "0") in {"1", "true", "True"}:
+        world = World(
+            width=float(os.getenv("WORLD_WIDTH", "960")),
+            height=float(os.getenv("WORLD_HEIGHT", "540")),
+            speed=float(os.getenv("WORLD_SPEED", "150")),
+            idle_s=float(os.getenv("WORLD_IDLE_S", "30")),
+        )
+        # WORLD_AOI_CELL > 0: players only get entities within WORLD_AOI_RADIUS cells of them.
+        cell = float(os.getenv("WORLD_AOI_CELL", "0"))
+        interest = (
+            InterestGrid(world, cell, int(os.getenv("WORLD_AOI_RADIUS", "1"))) if cell > 0 else None
+        )
+        _loop = TickLoop(world, hz=float(os.getenv("WORLD_TICK_HZ", "20")), interest=interest)
+    return _loop
+
+
+def _require() -> TickLoop:
+    loop = tick_loop()
+    if loop is None:
+        raise HTTPException(404, "world simulation disabled (WORLD_ENABLED=0)")
+    return loop
+
+
+@router.get("/stats")
+async def world_stats():
+    loop = tick_loop()
+    if loop is None:
+        return {"enabled": False}
+    async with loop.lock:
+        return {"enabled": True, **loop.stats()}
+
+
+@router.get("/rooms/{room}")
+async def room_snapshot(room: str):
+    """Every entity in the room; deltas on /events carry only what moved since."""
+    loop = _require()
+    async with loop.lock:
+        return loop.world.snapshot(room)
+
+
+@router.post("/rooms/{room}/npcs")
+async def spawn_npcs(room: str, count: int = Query(1, ge=1, le=10_000)):
+    loop = _require()
+    async with loop.lock:
+        ids = loop.world.spawn(room, NPC, count)
+    return {"room": room, "spawned": len(ids)}
@@ -0,0 +1,173 @@
+from __future__ import annotations
+
+import json
+import math
+from typing import Any
+
+import numpy as np
+
+from ..realtime.broadcaster import client_room
+from .state import FREE, World
+
+_SEP = (",", ":")
+
+
+class InterestGrid:
+    """Per-player areas of interest over a uniform grid of ``cell``-sized squares.
+
+    Every tick each (room, cell) with changes gets one fragment: entities that moved and
+    are now in the cell, plus ``gone`` ids that left it or despawned. A fragment is
+    encoded once and shared by every player whose view, the square of cells within
+    ``radius`` of their own, covers it. A player's message is a string join of those
+    fragments. Cells that newly come into view are sent in full (``"full": 1``).
+
+    Clients apply a message by dropping entities outside ``view``, then every ``gone``,
+    then the ids and positions.
+    """
+
+    def __init__(self, world: World, cell: float = 100.0, radius: int = 1):
+        self.world = world
+        self.cell = cell
+        self.radius = radius
+        self.nx = max(1, math.ceil(world.width / cell))
+        self.ny = max(1, math.ceil(world.height / cell))
+        self.ncells = self.nx * self.ny
+        self._prev = np.full(0, -1, dtype=np.int64)
+        self._views: dict[int, tuple[int, int]] = {}  # sender -> (room index, centre cell)
+        self._rects: dict[int, tuple[list[int], str]] = {}
+        self.last: dict = {"fragments": 0, "messages": 0, "bytes": 0}
+
+    def _cells(self) -> np.ndarray:
+        pos = self.world.pos
+        cx = np.minimum((pos[:, 0] / self.cell).astype(np.int64), self.nx - 1)
+        cy = np.minimum((pos[:, 1] / self.cell).astype(np.int64), self.ny - 1)
+        return cy * self.nx + cx
+
+    def _rect(self, centre: int) -> tuple[list[int], str]:
+        """Cells in view of ``centre`` and the view as JSON [x0, y0, x1, y1] in cell units."""
+        rect = self._rects.get(centre)
+        if rect is None:
+            cx, cy = centre % self.nx, centre // self.nx
+            r = self.radius
+            x0, x1 = max(0, cx - r), min(self.nx - 1, cx + r)
+            y0, y1 = max(0, cy - r), min(self.ny - 1, cy + r)
+            cells = [y * self.nx + x for y in range(y0, y1 + 1) for x in range(x0, x1 + 1)]
+            rect = self._rects[centre] = (cells, json.dumps([x0, y0, x1, y1], separators=_SEP))
+        return rect
+
+    def _message(self, head: str, centre: int, texts: list[str]) -> str:
+        return f'{head}"view":{self._rect(centre)[1]},"cells":[{",".join(texts)}]}}'
+
+    @staticmethod
+    def _runs(keys: np.ndarray) -> np.ndarray:
+        """Boundaries of the runs of equal values in sorted ``keys`` (first start .. end)."""
+        return (
+            np.flatnonzero(np.r_[True, keys[1:] != keys[:-1], True])
+            if len(keys)
+            else np.zeros(1, dtype=np.int64)
+        )
+
+    def messages(self) -> list[tuple[str, str]]:
+        """``(client room, JSON text)`` for every player with something to receive."""
+        w = self.world
+        moved, gone = w.changes()
+        cells = self._cells()
+        room = w.room.astype(np.int64)
+        live = room != FREE
+        if len(self._prev) < len(cells):
+            self._prev = np.r_[
+                self._prev, np.full(len(cells) - len(self._prev), -1, dtype=np.int64)
+            ]
+        prev = self._prev
+        keys = room * self.ncells + cells
+
+        # Every live entity sorted by (room, cell), once per tick: groups the moved ones and
+        # serves the full contents of cells coming into view.
+        alive = np.flatnonzero(live)
+        order = alive[np.argsort(keys[alive])]
+        sorted_keys = keys[order]
+        runs = self._runs(sorted_keys)
+        run_keys = sorted_keys[runs[:-1]]
+
+        is_moved = np.zeros(len(live), dtype=bool)
+        is_moved[moved] = True
+        pick = is_moved[order]
+        slots, k = order[pick], sorted_keys[pick]
+        bounds = self._runs(k)
+        ids, xy = slots.tolist(), w.quantize(slots).tolist()
+        frags: dict[int, dict[str, Any]] = {}
+        for a, b in zip(bounds[:-1].tolist(), bounds[1:].tolist(), strict=True):
+            key = int(k[a])
+            frags[key] = {"c": key % self.ncells, "ids": ids[a:b], "xy": xy[2 * a : 2 * b]}
+        crossed = np.flatnonzero(live & (prev >= 0) & (prev != cells))
+        left = [
+            (int(r) * self.ncells + int(c), s)
+            for r, c, s in zip(
+                room[crossed].tolist(), prev[crossed].tolist(), crossed.tolist(), strict=True
+            )
+        ]
+        for r, despawned in gone.items():
+            left += [(r * self.ncells + int(prev[s]), s) for s in despawned if prev[s] >= 0]
+        for key, s in left:
+            frags.setdefault(key, {"c": key % self.ncells, "ids": [], "xy": []}).setdefault(
+                "gone", []
+            ).append(s)
+        self._prev = np.where(live, cells, -1)
+
+        # Nearly every changed cell is in somebody's view, so encode them all up front.
+        encoded = {key: json.dumps(frag, separators=_SEP) for key, frag in frags.items()}
+        delta = encoded.get
+        full: dict[int, str] = {}
+
+        def whole(key: int) -> str | None:
+            text = full.get(key)
+            if text is None:
+                i = int(np.searchsorted(run_keys, key))
+                if i >= len(run_keys) or run_keys[i] != key:
+                    return None
+                members = order[runs[i] : runs[i + 1]]
+                frag = {
+                    "c": key % self.ncells,
+                    "full": 1,
+                    "ids": members.tolist(),
+                    "xy": w.quantize(members).tolist(),
+                }
+                text = full[key] = json.dumps(frag, separators=_SEP)
+            return text
+
+        out: list[tuple[str, str]] = []
+        views: dict[int, tuple[int, int]] = {}
+        # Players that stay in the same cell share one message text.
+        steady: dict[tuple[int, int], str | None] = {}
+        head = f'{{"type":"world","tick":{w.tick},"scale":{w.precision},"cell":{self.cell},'
+        players = w.players()
+        slots = np.fromiter(players.values(), dtype=np.int64, count=len(players))
+        for sender, r, centre in zip(
+            players, room[slots].tolist(), cells[slots].tolist(), strict=True
+        ):
+            view_key = views[sender] = (r, centre)
+            old = self._views.get(sender)
+            if old == view_key:
+                if view_key not in steady:
+                    base = r * self.ncells
+                    texts = [
+                        t for t in (delta(base + c) for c in self._rect(centre)[0]) if t is not None
+                    ]
+                    steady[view_key] = self._message(head, centre, texts) if texts else None
+                text = steady[view_key]
+            else:
+                base = r * self.ncells
+                seen = set(self._rect(old[1])[0]) if old is not None and old[0] == r else set()
+                parts = [
+                    delta(base + c) if c in seen else whole(base + c) for c in self._rect(centre)[0]
+                ]
+                text = self._message(head, centre, [p for p in parts if p is not None])
+            if text is not None:
+                out.append((client_room(sender), text))
+        self._views = views
+        self.last = {
+            "fragments": len(encoded) + len(full),
+            "messages": len(out),
+            "bytes": sum(len(t) for _, t in out),
+        }
+        return out
@@ -0,0 +1,282 @@
+from __future__ import annotations
+
+from time import time
+from typing import Any
+
+import numpy as np
+
+from ..realtime.inputs import KEY_BITS, RELAY
+
+PLAYER, NPC = 0, 1
+FREE = -1
+
+
+def _direction_table() -> tuple[np.ndarray, np.ndarray]:
+    """Unit move direction and speed factor for every 16-bit key mask."""
+    masks = np.arange(1 << 16)
+
+    def held(*keys: str) -> np.ndarray:
+        bits = sum(KEY_BITS[k] for k in keys)
+        return (masks & bits) != 0
+
+    dx = held("d", "arrowright").astype(np.float32) - held("a", "arrowleft")
+    dy = held("s", "arrowdown").astype(np.float32) - held("w", "arrowup")
+    norm = np.hypot(dx, dy)
+    dirs = np.stack([dx, dy], axis=1) / np.maximum(norm, 1)[:, None]
+    # Shift sprints, as in the browser client.
+    factor = np.where(held("shift"), 1.8, 1.0).astype(np.float32)
+    return dirs.astype(np.float32), factor
+
+
+DIRECTIONS, SPRINT = _direction_table()
+
+
+class World:
+    """Authoritative entity state in flat NumPy arrays, grouped into rooms (match ids).
+
+    Entity ids are array slots, handed out from a free list and grown by doubling. Players
+    move from their held keys (``on_frame`` takes input relay frames); NPCs wander. ``step``
+    integrates every entity in one vectorized pass over the whole arrays (free slots stand
+    still) and ``deltas`` reports, per room, the entities that moved at least ``precision``
+    since they were last reported. Positions go out as integers in units of ``precision``.
+    """
+
+    def __init__(
+        self,
+        *,
+        width: float = 960.0,
+        height: float = 540.0,
+        speed: float = 150.0,
+        idle_s: float = 30.0,
+        precision: float = 0.1,
+        seed: int | None = None,
+    ):
+        self.width = width
+        self.height = height
+        self.speed = speed
+        self.idle_s = idle_s
+        self.precision = precision
+        self.tick = 0
+        self._rng = np.random.default_rng(seed)
+        self._rooms: dict[str | None, int] = {}
+        self._room_names: list[str | None] = []
+        self._players: dict[int, int] = {}  # input sender -> slot
+        self._free: list[int] = []
+        self._gone: dict[int, list[int]] = {}  # room index -> slots despawned since the last deltas
+        self.pos = np.zeros((0, 2), dtype=np.float32)
+        self.vel = np.zeros((0, 2), dtype=np.float32)
+        self.sent = np.zeros((0, 2), dtype=np.float32)
+        self.mask = np.zeros(0, dtype=np.uint16)
+        self.kind = np.zeros(0, dtype=np.uint8)
+        self.room = np.zeros(0, dtype=np.int32)
+        self.last_input = np.zeros(0, dtype=np.float64)
+        self._live: np.ndarray | None = None
+        self._npc: np.ndarray | None = None
+
+    @property
+    def entities(self) -> int:
+        return len(self.room) - len(self._free)
+
+    def _masks(self) -> tuple[np.ndarray, np.ndarray]:
+        """Live slots and the NPC mask over all slots, cached until entities change."""
+        if self._live is None or self._npc is None:
+            used = self.room != FREE
+            self._live = np.flatnonzero(used)
+            self._npc = used & (self.kind == NPC)
+        return self._live, self._npc
+
+    def live(self) -> np.ndarray:
+        return self._masks()[0]
+
+    def _changed(self):
+        self._live = self._npc = None
+
+    def _grow(self, need: int):
+        old = len(self.room)
+        new = max(1024, old * 2, old + need)
+        for name, fill in (
+            ("pos", 0),
+            ("vel", 0),
+            ("sent", np.nan),
+            ("mask", 0),
+            ("kind", 0),
+            ("room", FREE),
+            ("last_input", 0),
+        ):
+            a = getattr(self, name)
+            grown = np.full((new, *a.shape[1:]), fill, dtype=a.dtype)
+            grown[:old] = a
+            setattr(self, name, grown)
+        self._free += range(new - 1, old - 1, -1)
+
+    def _room_index(self, room: str | None) -> int:
+        r = self._rooms.get(room)
+        if r is None:
+            r = self._rooms[room] = len(self._room_names)
+            self._room_names.append(room)
+        return r
+
+    def spawn(self, room: str | None, kind: int = NPC, count: int = 1) -> np.ndarray:
+        """Place ``count`` entities at random positions; NPCs start walking."""
+        if len(self._free) < count:
+            self._grow(count - len(self._free))
+        slots = np.array([self._free.pop() for _ in range(count)], dtype=np.int64)
+        self.pos[slots] = self._rng.random((count, 2), dtype=np.float32) * (self.width, self.height)
+        self.vel[slots] = 0
+        if kind == NPC:
+            self.vel[slots] = self._random_dirs(count) * self.speed * 0.5
+        self.sent[slots] = np.nan  # always in the next deltas
+        self.mask[slots] = 0
+        self.kind[slots] = kind
+        self.room[slots] = self._room_index(room)
+        self.last_input[slots] = time()
+        self._changed()
+        return slots
+
+    def despawn(self, slots: np.ndarray):
+        for s in slots.tolist():
+            self._gone.setdefault(int(self.room[s]), []).append(s)
+            self._free.append(s)
+        self.room[slots] = FREE
+        self.vel[slots] = 0
+        self._changed()
+
+    def _random_dirs(self, n: int) -> np.ndarray:
+        angle = self._rng.random(n, dtype=np.float32) * np.float32(2 * np.pi)
+        return np.stack([np.cos(angle), np.sin(angle)], axis=1)
+
+    def on_frame(self, frame: bytes, room: str | None):
+        """Take a player's held keys from an input relay frame (``realtime.inputs``).
+
+        A sender without a live player, or whose player is in another room, gets a new
+        one in ``room``; the old one is reported gone from its room."""
+        sender, _seq, mask, _changed, _impulse = RELAY.unpack(frame)
+        slot = self._players.get(sender)
+        if slot is None or self.room[slot] != self._room_index(room):
+            old = slot
+            # Spawn before despawning so the new player never reuses the old slot.
+            slot = self._players[sender] = int(self.spawn(room, PLAYER)[0])
+            if old is not None and self.room[old] != FREE:
+                self.despawn(np.array([old]))
+        self.mask[slot] = mask
+        self.last_input[slot] = time()
+
+    def step(self, dt: float):
+        """Advance every entity by ``dt`` seconds."""
+        live, npc = self._masks()
+        self.tick += 1
+        if not len(live):
+            return
+        players = live[self.kind[live] == PLAYER]
+        if len(players):
+            m = self.mask[players]
+            self.vel[players] = DIRECTIONS[m] * (SPRINT[m] * np.float32(self.speed))[:, None]
+        # About one turn every two seconds per NPC.
+        turn = np.flatnonzero(npc & (self._rng.random(len(npc), dtype=np.float32) < dt * 0.5))
+        if len(turn):
+            self.vel[turn] = self._random_dirs(len(turn)) * np.float32(self.speed * 0.5)
+        pos, vel = self.pos, self.vel
+        pos += vel * np.float32(dt)
+        bounds = np.array([self.width, self.height], dtype=np.float32)
+        out = (pos < 0) | (pos > bounds)
+        # Walls stop players and turn NPCs back.
+        out &= npc[:, None]
+        vel[out] = -vel[out]
+        np.maximum(pos, 0, out=pos)
+        np.minimum(pos, bounds, out=pos)
+
+    def expire(self, now: float | None = None) -> int:
+        """Despawn players without input for ``idle_s``."""
+        now = time() if now is None else now
+        live = self.live()
+        idle = live[(self.kind[live] == PLAYER) & (self.last_input[live] < now - self.idle_s)]
+        if len(idle):
+            self.despawn(idle)
+            idle_set = set(idle.tolist())
+            self._players = {k: s for k, s in self._players.items() if s not in idle_set}
+        return len(idle)
+
+    def changes(self) -> tuple[np.ndarray, dict[int, list[int]]]:
+        """Slots that moved at least ``precision`` since they were last reported (now marked
+        as reported) and the slots despawned since, by room index."""
+        # Whole-array, per-column passes: gathering live rows or reducing over the length-2
+        # axis costs several times more. NaN (never sent) compares as stale.
+        far = ~(np.abs(self.pos - self.sent) < self.precision)
+        stale = (far[:, 0] | far[:, 1]) & (self.room != FREE)
+        # Copy whole (x, y) rows at once through an 8-byte view.
+        np.copyto(self.sent.view(np.uint64).ravel(), self.pos.view(np.uint64).ravel(), where=stale)
+        gone, self._gone = self._gone, {}
+        return np.flatnonzero(stale), gone
+
+    def deltas(self) -> list[tuple[str | None, dict[str, Any]]]:
+        """``(room, event)`` per room with changes; marks the reported positions as sent."""
+        moved, gone = self.changes()
+        rooms = self.room[moved]
+        order = np.argsort(rooms, kind="stable")
+        moved, rooms = moved[order], rooms[order]
+        bounds = (
+            np.flatnonzero(np.r_[True, rooms[1:] != rooms[:-1], True])
+            if len(rooms)
+            else np.zeros(1, dtype=np.int64)
+        )
+        # One tolist for everything, then plain list slices per room.
+        ids = moved.tolist()
+        xy = self.quantize(moved).tolist()
+        out: dict[int, dict[str, Any]] = {}
+        for a, b in zip(bounds[:-1].tolist(), bounds[1:].tolist(), strict=True):
+            out[int(rooms[a])] = self._event(ids[a:b], xy[2 * a : 2 * b])
+        for r, slots in gone.items():
+            out.setdefault(r, self._event([], []))["gone"] = slots
+        return [(self._room_names[r], event) for r, event in out.items()]
+
+    def room_name(self, index: int) -> str | None:
+        return self._room_names[index]
+
+    def players(self) -> dict[int, int]:
+        """Input sender id -> the slot of its player."""
+        return self._players
+
+    def quantize(self, slots: np.ndarray) -> np.ndarray:
+        """Flat x0, y0, x1, y1, ... of ``slots`` as integers in units of ``precision``."""
+        return (
+            np.rint(np.take(self.pos, slots, axis=0) / np.float32(self.precision))
+            .astype(np.int32)
+            .ravel()
+        )
+
+    def _event(self, ids: list[int], xy: list[int]) -> dict[str, Any]:
+        # xy: flat x0, y0, x1, y1, ... in units of ``scale``.
+        return {"type": "world", "tick": self.tick, "scale": self.precision, "ids": ids, "xy": xy}
+
+    def snapshot(self, room: str | None) -> dict[str, Any]:
+        """Every entity of ``room``, for clients joining or resyncing."""
+        r = self._rooms.get(room)
+        live = self.live()
+        ids = live[self.room[live] == r] if r is not None else live[:0]
+        event = self._event(ids.tolist(), self.quantize(ids).tolist())
+        event["kind"] = self.kind[ids].tolist()
+        return event
+
+    def stats(self) -> dict[str, Any]:
+        live = self.live()
+        return {
+            "tick": self.tick,
+            "entities": len(live),
+            "players": len(self._players),
+            "rooms": {
+                str(name): int((self.room[live] == r).sum()) for name, r in self._rooms.items()
+            },
+            "capacity": len(self.room),
+            "bytes": sum(
+                a.nbytes
+                for a in (
+                    self.pos,
+                    self.vel,
+                    self.sent,
+                    self.mask,
+                    self.kind,
+                    self.room,
+                    self.last_input,
+                )
+            ),
+        }
@@ -0,0 +1,49 @@
+import fakeredis
+import pytest
+
+from VEZEPyGame.services.inventory.store import InventoryStore
+
+
+@pytest.mark.asyncio
+async def test_grant_seeds_the_starter_pack_once_and_increments():
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    store = InventoryStore(client)
+    assert await store.get("u1") == {"starter_pack": "1"}
+    assert await store.grant("u1", [("sword", 1), ("potion", 3)]) == {
+        "starter_pack": "1",
+        "sword": "1",
+        "potion": "3",
+    }
+    # Using up the starter pack leaves the hash in place: it is not seeded again.
+    await store.grant("u1", [("starter_pack", -1), ("potion", 2)])
+    assert await client.hgetall("inv:u1") == {"starter_pack": "0", "sword": "1", "potion": "5"}
+    await client.hset("inv:u2", "gem", 2)
+    assert await store.grant("u2", [("gem", 1)]) == {"gem": "3"}
+
+
+@pytest.mark.asyncio
+async def test_grant_many_sends_chunked_pipelines(monkeypatch):
+    client = fakeredis.FakeAsyncRedis(decode_responses=True)
+    pipelines = 0
+    make_pipeline = client.pipeline
+
+    def pipeline(*args, **kwargs):
+        nonlocal pipelines
+        pipelines += 1
+        return make_pipeline(*args, **kwargs)
+
+    monkeypatch.setattr(client, "pipeline", pipeline)
+    store = InventoryStore(client, bulk_chunk=2)
+    await client.hset("inv:u0", "gold", 10)
+    grants = {f"u{i}": {"gold": i, "gem": 1} for i in range(5)}
+    assert await store.grant_many(grants) == 3 and pipelines == 3
+    assert await client.hgetall("inv:u0") == {"gold": "10", "gem": "1"}
+    for i in range(1, 5):
+        assert await client.hgetall(f"inv:u{i}") == {
+            "starter_pack": "1",
+            "gold": str(i),
+            "gem": "1",
+        }
+    memory = InventoryStore(None)
+    await memory.grant_many(grants)
+    assert await memory.get("u3") == {"starter_pack": 1, "gold": 3, "gem": 1}
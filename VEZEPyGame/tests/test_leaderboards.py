@@ -0,0 +1,164 @@
+import fakeredis
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from VEZEPyGame.services.leaderboards import api as lb_api
+from VEZEPyGame.services.leaderboards.buffer import BufferFull, ScoreBuffer
+from VEZEPyGame.services.leaderboards.repo import LeaderboardRepo, ShardedLeaderboardRepo, TopCache
+
+# Many ties, including groups wider than an around() radius.
+TIED = [100, 90, 90, 90, 80, 80, 80, 80, 80, 70, 60, 60, 50, 40, 40, 40, 40, 40, 40, 30]
+
+
+def _competition_ranks(scores: dict[str, float]) -> dict[str, int]:
+    return {u: 1 + sum(1 for o in scores.values() if o > s) for u, s in scores.items()}
+
+
+class RecordingRepo(LeaderboardRepo):
+    def __init__(self):
+        super().__init__(None)
+        self.writes: list[tuple[dict, str]] = []
+
+    async def submit_many(self, boards, policy="last"):
+        self.writes.append(({k: dict(v) for k, v in boards.items()}, policy))
+        return len(boards)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("policy,expected", [("gt", 30.0), ("lt", 10.0), ("last", 20.0)])
+async def test_buffer_coalesces_per_user_by_policy(policy, expected):
+    repo = RecordingRepo()
+    buf = ScoreBuffer(repo, policy=policy)
+    for score in (10.0, 30.0, 20.0):
+        buf.add("s1", "story", "u1", score)
+    buf.add("s1", "endless", "u2", 5.0)
+    assert buf.pending == 2
+    assert await buf.flush() == 2
+    [(boards, used)] = repo.writes
+    assert used == policy
+    assert boards == {"lb:s1:story": {"u1": expected}, "lb:s1:endless": {"u2": 5.0}}
+    assert buf.pending == 0 and await buf.flush() == 0
+
+
+class DownRepo(LeaderboardRepo):
+    def __init__(self):
+        super().__init__(None)
+
+    async def submit_many(self, boards, policy="last"):
+        raise ConnectionError("redis down")
+
+
+@pytest.mark.asyncio
+async def test_buffer_flushes_in_the_background_and_sheds_new_scores_when_full(monkeypatch):
+    buf = ScoreBuffer(DownRepo(), flush_interval_s=60, max_pending=2, max_buffered=3)
+    buf.add("s1", "story", "u1", 1.0)
+    assert buf.add("s1", "story", "u2", 2.0)
+    buf.flush_soon()
+    assert buf._early is not None
+    await buf._early  # fails and is logged; the scores stay buffered
+    assert buf.pending == 2
+    buf.add("s1", "story", "u3", 3.0)
+    with pytest.raises(BufferFull):
+        buf.add("s1", "story", "u4", 4.0)
+    buf.add("s1", "story", "u1", 5.0)  # users already buffered still coalesce
+
+    monkeypatch.setattr(lb_api, "_buffer", buf)
+    app = FastAPI()
+    app.include_router(lb_api.router, prefix="/leaderboards")
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as http:
+        r = await http.post(
+            "/leaderboards/submit",
+            json={"user_id": "u5", "score": 1, "season": "s1", "mode": "story"},
+        )
+        assert r.status_code == 503 and r.headers["retry-after"] == "1"
+        r = await http.post(
+            "/leaderboards/submit/bulk",
+            json=[{"user_id": "u2", "score": 9, "season": "s1", "mode": "story"}],
+        )
+        assert r.status_code == 200
+    assert buf._pending["lb:s1:story"] == {"u1": 5.0, "u2": 9.0, "u3": 3.0}
+
+
+def test_top_cache_invalidate():
+    cache = TopCache(ttl_s=60)
+    cache.put("lb:s1:story", [("u1", 1.0)])
+    assert cache.get("lb:s1:story") == [("u1", 1.0)]
+    cache.invalidate("lb:s1:story")
+    assert cache.get("lb:s1:story") is None
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("shards", [1, 3, 8])
+async def test_tied_scores_share_one_rank_in_every_query(shards):
+    client = fakeredis.FakeAsyncRedis()
+    repo = LeaderboardRepo(client) if shards == 1 else ShardedLeaderboardRepo(client, shards=shards)
+    scores = {f"u{i}": float(s) for i, s in enumerate(TIED)}
+    await repo.submit_many({repo.key("s1", "story"): scores})
+    expected = _competition_ranks(scores)
+    users = [*scores, "missing"]
+    ranks = await repo.ranks("s1", "story", users)
+    assert ranks == [(expected[u], scores[u]) for u in scores] + [(None, None)]
+    for user, score in scores.items():
+        rank, window = await repo.around("s1", "story", user, radius=2)
+        assert rank == expected[user]
+        assert (rank, user, score) in window and len(window) <= 5
+        assert all(r == expected[u] for r, u, _ in window)
+        assert [s for _, _, s in window] == sorted((s for _, _, s in window), reverse=True)
+    assert await repo.around("s1", "story", "missing") == (None, [])
+
+
+@pytest.mark.asyncio
+async def test_rank_routes_share_ranks_between_ties():
+    repo = LeaderboardRepo(fakeredis.FakeAsyncRedis())
+    await repo.submit_many({repo.key("s1", "story"): {"a": 50, "b": 40, "c": 40, "d": 30}})
+    app = FastAPI()
+    app.include_router(lb_api.router, prefix="/leaderboards")
+    app.dependency_overrides[lb_api._leaderboards] = lambda: repo
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as http:
+        r = await http.get("/leaderboards/s1/story/rank/c")
+        assert r.json() == {"user_id": "c", "rank": 2, "score": 40.0}
+        assert (await http.get("/leaderboards/s1/story/rank/zz")).status_code == 404
+        r = await http.post("/leaderboards/s1/story/ranks", json={"user_ids": ["b", "d", "zz"]})
+        assert [(e["rank"], e["score"]) for e in r.json()] == [(2, 40.0), (4, 30.0), (None, None)]
+        r = await http.get("/leaderboards/s1/story/around/d", params={"radius": 1})
+        assert [(e["rank"], e["user_id"]) for e in r.json()["entries"]] == [(2, "b"), (4, "d")]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("shards", [1, 3])
+async def test_around_clips_at_the_ends_of_the_board(shards):
+    client = fakeredis.FakeAsyncRedis()
+    repo = LeaderboardRepo(client) if shards == 1 else ShardedLeaderboardRepo(client, shards=shards)
+    await repo.submit_many({repo.key("s1", "story"): {f"u{i}": float(100 - i) for i in range(10)}})
+    rank, window = await repo.around("s1", "story", "u0", radius=2)
+    assert rank == 1 and [u for _, u, _ in window] == ["u0", "u1", "u2"]
+    rank, window = await repo.around("s1", "story", "u9", radius=2)
+    assert rank == 10 and [(r, u) for r, u, _ in window] == [(8, "u7"), (9, "u8"), (10, "u9")]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("shards", [1, 3])
+async def test_cached_top_page_is_dropped_on_submit(shards):
+    client = fakeredis.FakeAsyncRedis()
+    repo = (
+        LeaderboardRepo(client, cache_ttl_s=60)
+        if shards == 1
+        else ShardedLeaderboardRepo(client, shards=shards, cache_ttl_s=60)
+    )
+    await repo.submit("s1", "story", "a", 10)
+    assert await repo.page("s1", "story") == [("a", 10.0)]
+    await client.zadd(
+        (
+            repo.shard_key(repo.key("s1", "story"), "b")
+            if isinstance(repo, ShardedLeaderboardRepo)
+            else repo.key("s1", "story")
+        ),
+        {"b": 20},
+    )
+    assert await repo.page("s1", "story") == [("a", 10.0)]  # served from the cache
+    await repo.submit("s1", "story", "c", 5)
+    assert await repo.page("s1", "story") == [("b", 20.0), ("a", 10.0), ("c", 5.0)]
+    await repo.submit_many({repo.key("s1", "story"): {"a": 30}})
+    assert (await repo.page("s1", "story", limit=1)) == [("a", 30.0)]
+    assert await repo.ranks("s1", "story", ["a", "b", "c"]) == [(1, 30.0), (2, 20.0), (3, 5.0)]
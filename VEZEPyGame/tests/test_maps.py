@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from VEZEPyGame.services.maps.api import DEFAULT_GRAPH
+from VEZEPyGame.services.maps.graph import WARP, Graph
+from VEZEPyGame.services.maps.landmarks import RoutingIndex
+from VEZEPyGame.services.maps.planner import RoutePlanner
+
+
+def _random_graph(seed: int = 4, n: int = 400, m: int = 1600) -> Graph:
+    """Directed roads costing 1-2x their length plus ten cheap one-way warps; some pairs
+    are unreachable."""
+    rng = np.random.default_rng(seed)
+    xy = rng.uniform(0, 1000, (n, 2))
+    src, dst = rng.integers(0, n, m), rng.integers(0, n, m)
+    weights = np.hypot(*(xy[src] - xy[dst]).T) * rng.uniform(1.0, 2.0, m)
+    kinds = np.zeros(m, dtype=np.uint8)
+    kinds[:10], weights[:10] = WARP, 3.0
+    return Graph([str(i) for i in range(n)], xy, src, dst, weights, kinds=kinds)
+
+
+def test_sample_world_takes_the_warp_and_caches_the_route():
+    planner = RoutePlanner(Graph.load(DEFAULT_GRAPH), cache_size=1)
+    cost, path = planner.route("A", "B")
+    assert path == ("A", "warp-gate", "warp-gate-east", "B")
+    assert round(cost, 1) == 68.2
+    assert planner.lookup("A", "B") == (cost, path)
+    planner.route("B", "A")  # evicts A -> B
+    assert planner.lookup("A", "B") is None and planner.searches == 2
+
+
+def test_astar_matches_dijkstra_with_warps():
+    graph = _random_graph()
+    planner = RoutePlanner(graph)
+    for s, t in np.random.default_rng(5).integers(0, graph.nodes, (50, 2)).tolist():
+        a, _, _ = planner.search(s, t)
+        d, _, _ = planner.search(s, t, heuristic=False)
+        assert a == d or abs(a - d) < 1e-9
+
+
+def test_mapped_landmark_index_matches_dijkstra_and_rejects_other_graphs(tmp_path):
+    graph = _random_graph()
+    RoutingIndex.build(graph, landmarks=8).save(tmp_path / "world.alt")
+    index = RoutingIndex.open(tmp_path / "world.alt", graph)
+    assert isinstance(index.dist, np.memmap) and not index.dist.flags.writeable
+    planner = RoutePlanner(graph, index=index, active=3)
+    for s, t in np.random.default_rng(6).integers(0, graph.nodes, (50, 2)).tolist():
+        a, path, _ = planner.search(s, t)
+        d, _, _ = planner.search(s, t, heuristic=False)
+        assert a == d or abs(a - d) < 1e-9
+        assert not path or (path[0], path[-1]) == (s, t)
+    with pytest.raises(ValueError):
+        RoutingIndex.open(tmp_path / "world.alt", _random_graph(seed=7))
@@ -0,0 +1,164 @@
+from time import time
+
+import fakeredis
+import numpy as np
+import pytest
+
+from VEZEPyGame.services.leaderboards.repo import ShardedLeaderboardRepo
+from VEZEPyGame.services.matchmaking.mmr import RatingStore, apply_results, elo_update
+from VEZEPyGame.services.matchmaking.queue import MatchQueue, Ticket
+from VEZEPyGame.services.matchmaking.redis_queue import RedisMatchQueue
+from VEZEPyGame.services.matchmaking.teams import balance, team_size
+
+
+def _t(uid: str, mmr: int, age: float = 0.0, mode: str = "story", region: str = "eu") -> Ticket:
+    return Ticket(time() - age, uid, mmr, region, mode)
+
+
+def test_pairs_closest_mmr_in_same_partition():
+    q = MatchQueue()
+    q.enqueue(_t("a", 1500, age=3))
+    q.enqueue(_t("far", 1540))
+    q.enqueue(_t("near", 1510))
+    q.enqueue(_t("other-region", 1500, region="us"))
+    pair = q.try_match()
+    assert pair is not None
+    assert [t.user_id for t in pair] == ["a", "near"]
+    assert len(q) == 2
+
+
+def test_no_match_outside_window_then_widens():
+    q = MatchQueue()
+    q.enqueue(_t("a", 1000))
+    q.enqueue(_t("b", 1100))
+    assert q.try_match() is None
+    assert len(q) == 2
+    q.enqueue(_t("a", 1000, age=25))  # re-enqueue replaces the ticket; window is now 50 + 5 * 25
+    pair = q.try_match()
+    assert pair is not None
+    assert [t.user_id for t in pair] == ["a", "b"]
+
+
+def test_dequeue_and_reenqueue():
+    q = MatchQueue()
+    q.enqueue(_t("a", 1500, age=10))
+    q.enqueue(_t("b", 1500))
+    assert q.dequeue("a") is True
+    assert q.dequeue("a") is False
+    assert q.try_match() is None
+    q.enqueue(_t("a", 1500))
+    pair = q.try_match()
+    assert pair is not None
+    assert {t.user_id for t in pair} == {"a", "b"}
+    assert len(q) == 0
+
+
+def test_match_all_forms_every_feasible_pair():
+    q = MatchQueue()
+    for i, mmr in enumerate([1000, 1010, 1500, 1520, 1530, 2400]):
+        q.enqueue(_t(f"p{i}", mmr))
+    q.enqueue(_t("us", 1000, region="us"))
+    groups = q.match_all()
+    assert sorted(sorted(t.user_id for t in g) for g in groups) == [["p0", "p1"], ["p2", "p3"]]
+    assert sorted(q.depth().items()) == [("story:eu", 2), ("story:us", 1)]
+    assert "p4" in q and "p0" not in q
+
+
+def test_balance_picks_most_even_split():
+    mmrs = np.array([[1000, 1100, 1200, 1300], [1500, 1500, 1600, 1600]])
+    order = balance(mmrs)
+    for row, idx in zip(mmrs, order, strict=True):
+        a, b = row[idx[:2]].sum(), row[idx[2:]].sum()
+        assert a == b
+    snake = balance(np.arange(16)[None, :] * 10)[0]
+    assert sorted(snake.tolist()) == list(range(16))
+    assert team_size("5v5") == 5 and team_size("story") == 1 and team_size("2v3") == 1
+
+
+def test_team_mode_matches_return_balanced_halves():
+    q = MatchQueue()
+    for uid, mmr in [("a", 1000), ("b", 1010), ("c", 1020), ("d", 1040), ("e", 1600)]:
+        q.enqueue(_t(uid, mmr, mode="2v2", age=1 if uid == "a" else 0))
+    group = q.try_match()
+    assert group is not None and len(group) == 4
+    team_a, team_b = group[:2], group[2:]
+    assert {t.user_id for t in team_a} == {"a", "d"}  # 2040 vs 2030 is the most even split
+    assert {t.user_id for t in team_b} == {"b", "c"}
+    assert q.match_all() == [] and "e" in q
+
+
+def test_batched_elo_matches_single_update():
+    new = apply_results(
+        np.array([1500.0, 1600.0]), np.array([0]), np.array([1]), np.array([1.0]), 32.0
+    )
+    assert np.allclose(new, elo_update(1500.0, 1600.0, 32.0, True))
+
+
+@pytest.mark.asyncio
+async def test_rating_store_applies_batch_and_rescores_queue():
+    store = RatingStore(None)
+    ratings, persisted = await store.apply(
+        "duel", ["a", "a"], ["b", "c"], np.array([1.0, 1.0]), 32.0
+    )
+    assert persisted == "memory"
+    assert ratings["a"] == 1532.0 and ratings["b"] == ratings["c"] == 1484.0
+    q = MatchQueue()
+    q.enqueue(_t("b", 1500, mode="duel"))
+    q.enqueue(_t("c", 1500, mode="5v5"))  # rated in "duel" only; its 5v5 MMR stays
+    assert q.update_mmr(ratings, "duel") == 1
+    b, c = q.get("b"), q.get("c")
+    assert b is not None and c is not None
+    assert b.mmr == 1484 and c.mmr == 1500
+    assert q.depth() == {"duel:eu": 1, "5v5:eu": 1}
+
+
+@pytest.mark.asyncio
+async def test_redis_rescore_and_season_board_follow_the_rated_mode():
+    client = fakeredis.FakeAsyncRedis()
+    boards = ShardedLeaderboardRepo(client, shards=4)
+    store = RatingStore(client, leaderboards=boards)
+    ratings, persisted = await store.apply("duel", ["a"], ["b"], np.array([1.0]), 32.0, season="s1")
+    assert persisted == "redis"
+    assert dict(await boards.page("s1", "duel")) == ratings
+    q = RedisMatchQueue(client)
+    await q.enqueue(_t("a", 1500, mode="duel"))
+    await q.enqueue(_t("b", 1500, mode="5v5"))
+    assert await q.update_mmr(ratings, "duel") == 1
+    a, b = await q.get("a"), await q.get("b")
+    assert a is not None and b is not None
+    assert a.mmr == 1516 and b.mmr == 1500
+
+
+@pytest.mark.asyncio
+async def test_redis_queue_sizes_group_from_the_ticket_it_matches():
+    q = RedisMatchQueue(fakeredis.FakeAsyncRedis())
+    await q.enqueue(_t("old", 1500, age=5, mode="2v2"))
+    for uid in ("b", "c", "d"):
+        await q.enqueue(_t(uid, 1500, age=1, mode="2v2"))
+    await q.enqueue(_t("duel", 1500, age=3, mode="duel"))
+    await q.enqueue(_t("duel2", 1500, mode="duel"))
+    # Another worker matches "old" between our read of the oldest ticket and the script.
+    raced = await q._try_match(
+        keys=[q._tickets, q._enq], args=[q.prefix, repr(time()), 50, 5, 5, 2, "old", "duel"]
+    )
+    assert raced == 0 and await q.get("old") is not None
+    group = await q.try_match()
+    assert group is not None
+    assert {t.user_id for t in group} == {"old", "b", "c", "d"}
+    group = await q.try_match()
+    assert group is not None
+    assert {t.user_id for t in group} == {"duel", "duel2"}
+    assert await q.try_match() is None and await q.depth() == {}
+
+
+@pytest.mark.asyncio
+async def test_redis_sweep_pages_through_a_partition():
+    q = RedisMatchQueue(fakeredis.FakeAsyncRedis(), sweep_page=5)
+    for i in range(23):
+        await q.enqueue(_t(f"p{i}", 1000 + 10 * i))
+    await q.enqueue(_t("far", 3000))
+    groups = await q.match_all()
+    assert len(groups) == 11 and all(len(g) == 2 for g in groups)
+    matched = [t.user_id for g in groups for t in g]
+    assert len(set(matched)) == 22 and "far" not in matched
+    assert await q.depth() == {"story:eu": 2}
@@ -0,0 +1,100 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from VEZEPyGame.services.ml.batching import MicroBatcher
+from VEZEPyGame.services.ml.bot_stream import BotDetector, UserWindows
+from VEZEPyGame.services.ml.registry import ModelRegistry
+from VEZEPyGame.services.ml.scoring import as_matrix, bot_scores, skill_scores
+
+
+def test_vectorized_scores_match_per_row_formulas():
+    rows = [[1.0, -2.0, 3.0], [50.0], [200.0, 200.0], []]
+    m, lengths = as_matrix(rows)
+    assert skill_scores(m, lengths).tolist() == [4.0 / 3.0, 50.0, 200.0, 0.0]
+    assert bot_scores(m, lengths).tolist() == pytest.approx([2.0 / 300.0, 0.5, 1.0, 0.0])
+
+
+@pytest.mark.asyncio
+async def test_microbatcher_coalesces_concurrent_calls():
+    calls: list[list[int]] = []
+
+    async def double(items):
+        calls.append(list(items))
+        return [2 * x for x in items]
+
+    batcher = MicroBatcher("test", double, max_batch=4, max_wait_ms=5)
+    results = await asyncio.gather(*(batcher.submit(i) for i in range(6)))
+    assert results == [0, 2, 4, 6, 8, 10]
+    assert calls == [[0, 1, 2, 3], [4, 5]]
+
+
+@pytest.mark.asyncio
+async def test_microbatcher_fails_every_caller_when_results_do_not_line_up():
+    async def short(items):
+        return items[:-1]
+
+    batcher = MicroBatcher("short", short, max_batch=2, max_wait_ms=5)
+    results = await asyncio.gather(*(batcher.submit(i) for i in range(2)), return_exceptions=True)
+    assert all(isinstance(r, ValueError) for r in results)
+
+
+@pytest.mark.asyncio
+async def test_registry_hot_swaps_to_npz_weights(tmp_path):
+    registry = ModelRegistry(tmp_path, workers=1)
+    m, lengths = as_matrix([[80.0, 90.0]])
+    assert (await registry.predict("bot", m, lengths)).tolist() == [0.85]
+    (tmp_path / "bot").mkdir()
+    np.savez(tmp_path / "bot" / "latest.npz", coef=np.array([0.01, 0.01]), intercept=0.0)
+    await registry.load("bot")
+    assert (await registry.predict("bot", m, lengths)).tolist() == pytest.approx([1.7])
+    status = registry.status()["bot"]
+    assert status["version"].startswith("latest@") and status["latency"]["count"] == 1
+    registry.close()
+
+
+@pytest.mark.asyncio
+async def test_streaming_bot_detection_flags_regular_fast_users_once(tmp_path):
+    rng = np.random.default_rng(1)
+    windows = UserWindows(window=32, max_users=4)
+    bot = [
+        {"event": "aim", "ts": 1000 + i * 0.05, "user_id": "bot", "payload": {"value": 0.99}}
+        for i in range(100)
+    ]
+    gaps = np.cumsum(rng.exponential(1.5, 100))
+    human = [
+        {
+            "event": "aim",
+            "ts": 1000 + g,
+            "user_id": "human",
+            "payload": {"value": float(rng.uniform(0.2, 0.9))},
+        }
+        for g in gaps
+    ]
+    windows.add(bot + human)
+    # A retrained /ml/detect_bot model has its own feature space; streaming scores ignore it.
+    (tmp_path / "bot").mkdir()
+    np.savez(tmp_path / "bot" / "latest.npz", coef=np.zeros(8), intercept=-10.0)
+    detector = BotDetector(windows, ModelRegistry(tmp_path, workers=1))
+    await detector.registry.load("bot")
+    assert [f["user_id"] for f in await detector.score(now=2000)] == ["bot"]
+    assert await detector.score(now=2001) == []
+    windows.add([{"event": "x", "ts": 1000, "user_id": f"u{i}"} for i in range(10)])
+    assert windows.users <= 4
+    detector.registry.close()
+
+
+def test_window_eviction_never_reuses_a_slot_of_the_same_batch():
+    def ev(users):
+        return [
+            {"event": "x", "ts": float(i), "user_id": u, "payload": {"value": 1.0}}
+            for i, u in enumerate(users)
+        ]
+
+    windows = UserWindows(window=8, max_users=2)
+    windows.add(ev("xy"))
+    # "x" is back, "a" evicts y; "c" then finds only x, already used by this batch, and is dropped.
+    windows.add(ev("xac"))
+    assert sorted(windows._slot) == ["a", "x"]
+    assert windows.count[windows._slot["x"]] == 2 and windows.count[windows._slot["a"]] == 1
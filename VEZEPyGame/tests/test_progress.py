@@ -0,0 +1,251 @@
+import asyncio
+import json
+from typing import Any
+
+import fakeredis
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from VEZEPyGame.services.progress import api as progress_api
+from VEZEPyGame.services.progress import store as progress_store
+from VEZEPyGame.services.progress.store import Codec, ProgressStore, apply_delta
+from VEZEPyGame.services.progress.writebehind import BufferFull, ProgressWriteBehind
+
+
+@pytest.mark.asyncio
+async def test_patch_merges_single_quest_fields_and_xp_delta():
+    store = ProgressStore(None)
+    quests = [
+        {"id": 1, "have": 0, "need": 5, "done": False},
+        {"id": 2, "have": 1, "need": 1, "done": True},
+    ]
+    full = await store.save("u1", 100, 3, quests)
+    delta = await store.patch("u1", xp_delta=2.5, quests=[{"id": 1, "have": 3}])
+    assert delta < full
+    rec = await store.get("u1")
+    assert rec["xp"] == 102.5 and rec["level"] == 3
+    assert rec["quests"][0] == {"id": 1, "have": 3, "need": 5, "done": False, "rewarded": None}
+    assert rec["quests"][1]["done"] is True
+
+
+def test_codec_rejects_unknown_names_and_reports_missing_msgpack(monkeypatch):
+    with pytest.raises(ValueError):
+        Codec("yaml")
+    assert Codec.decode(b'{"have":1}') == {"have": 1}
+    monkeypatch.setattr(progress_store, "msgpack", None)
+    with pytest.raises(RuntimeError, match="msgpack"):
+        Codec.decode(b"\x81\xa4have\x01")
+
+
+@pytest.mark.asyncio
+async def test_redis_reads_legacy_records_and_migrates_them_on_save():
+    client = fakeredis.FakeAsyncRedis()
+    legacy: dict[str, Any] = {
+        "user_id": "u1",
+        "xp": 7.0,
+        "level": 2,
+        "quests": [{"id": 3, "have": 1, "need": 4, "done": False, "rewarded": None}],
+    }
+    await client.set("game:progress:u1", json.dumps(legacy))
+    store = ProgressStore(client)
+    assert await store.get("u1") == legacy
+    await store.save("u1", 8, 2, legacy["quests"])
+    assert not await client.exists("game:progress:u1")
+    assert await client.hgetall("prog:u1") == {b"xp": b"8.0", b"level": b"2"}
+    assert (await store.get("u1"))["quests"] == legacy["quests"]
+
+
+@pytest.mark.asyncio
+async def test_redis_patch_sets_level_only_for_new_users():
+    client = fakeredis.FakeAsyncRedis()
+    store = ProgressStore(client)
+    await store.patch("new", xp_delta=3)
+    assert await client.hgetall("prog:new") == {b"xp": b"3", b"level": b"1"}
+    await store.save("old", 10, 5, [])
+    await store.patch("old", xp_delta=2)
+    rec = await store.get("old")
+    assert rec["xp"] == 12.0 and rec["level"] == 5
+
+
+@pytest.mark.asyncio
+async def test_redis_patch_many_merges_each_users_quests_from_one_read():
+    client = fakeredis.FakeAsyncRedis()
+    store = ProgressStore(client)
+    await store.save(
+        "a",
+        0,
+        1,
+        [
+            {"id": 1, "have": 0, "need": 5, "done": False},
+            {"id": 2, "have": 2, "need": 2, "done": True},
+        ],
+    )
+    await store.save("b", 0, 1, [{"id": 1, "have": 4, "need": 9, "done": False}])
+    await store.patch_many(
+        {
+            "a": {"quests": [{"id": 1, "have": 3}]},
+            "b": {"quests": [{"id": 1, "done": True}, {"id": 7, "need": 1}]},
+        }
+    )
+    a, b = await store.get("a"), await store.get("b")
+    assert a["quests"][0] == {"id": 1, "have": 3, "need": 5, "done": False, "rewarded": None}
+    assert a["quests"][1]["done"] is True
+    assert b["quests"] == [
+        {"id": 1, "have": 4, "need": 9, "done": True, "rewarded": None},
+        {"id": 7, "have": None, "need": 1, "done": None, "rewarded": None},
+    ]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("redis", [False, True])
+async def test_patch_merges_repeated_quest_ids_in_order(redis):
+    store = ProgressStore(fakeredis.FakeAsyncRedis() if redis else None)
+    await store.save("u1", 0, 1, [{"id": 1, "have": 0, "need": 5, "done": False}])
+    quests = [{"id": 1, "have": 2}, {"id": 1, "done": True}, {"id": 1, "have": 3}]
+    await store.patch("u1", quests=quests)
+    rec = await store.get("u1")
+    assert rec["quests"] == [{"id": 1, "have": 3, "need": 5, "done": True, "rewarded": None}]
+    assert rec == apply_delta(
+        {**rec, "quests": [{"id": 1, "have": 0, "need": 5, "done": False, "rewarded": None}]},
+        {"quests": quests},
+    )
+
+
+class FlakyStore(ProgressStore):
+    def __init__(self):
+        super().__init__(None)
+        self.fail = False
+        self.patches: list[dict] = []
+
+    async def patch_many(self, deltas):
+        if self.fail:
+            raise ConnectionError("redis down")
+        self.patches.append(deltas)
+        return await super().patch_many(deltas)
+
+
+@pytest.mark.asyncio
+async def test_write_behind_coalesces_and_reads_own_writes():
+    store = FlakyStore()
+    wb = ProgressWriteBehind(store)
+    for i in range(5):
+        wb.patch("u1", xp_delta=1, quests=[{"id": 1, "have": i}])
+    assert (await wb.get("u1"))["xp"] == 5.0
+    store.fail = True
+    with pytest.raises(ConnectionError):
+        await wb.flush()
+    wb.patch("u1", xp_delta=1)
+    store.fail = False
+    assert await wb.flush() == 1 and wb.dirty == 0
+    assert len(store.patches) == 1 and store.patches[0]["u1"]["xp_delta"] == 6.0
+    rec = await wb.get("u1")
+    assert rec["xp"] == 6.0 and rec["quests"][0]["have"] == 4
+
+
+@pytest.mark.asyncio
+async def test_write_behind_sheds_new_users_when_full_and_flushes_in_background():
+    store = FlakyStore()
+    store.fail = True
+    wb = ProgressWriteBehind(store, flush_interval_s=60, max_dirty=2, max_buffered=3)
+    wb.patch("u1", xp_delta=1)
+    assert wb.patch("u2", xp_delta=1)
+    wb.flush_soon()  # fails in the background, never in the caller
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    assert wb.dirty == 2
+    wb.patch("u3", xp_delta=1)
+    with pytest.raises(BufferFull):
+        wb.patch("u4", xp_delta=1)
+    wb.patch("u1", xp_delta=1)  # users already buffered still coalesce
+    wb.flush_soon()  # within the retry interval: no new attempt
+    assert wb._early is not None and wb._early.done()
+    store.fail = False
+    assert await wb.flush() == 3
+    assert store.patches[0]["u1"]["xp_delta"] == 2.0
+
+
+class FailOnce:
+    """Redis client whose first MULTI pipeline writing ``key`` is lost instead of executed."""
+
+    def __init__(self, client, key: str):
+        self._client = client
+        self.key = key.encode()
+        self.failed = False
+
+    def __getattr__(self, name):
+        return getattr(self._client, name)
+
+    def pipeline(self, transaction=True):
+        pipe = self._client.pipeline(transaction=transaction)
+        run = pipe.execute
+
+        async def execute(*args, **kwargs):
+            touched = any(
+                self.key in (a if isinstance(a, bytes) else str(a).encode())
+                for c in pipe.command_stack
+                for a in c[0]
+            )
+            if transaction and touched and not self.failed:
+                self.failed = True
+                await pipe.reset()
+                raise ConnectionError("connection lost")
+            return await run(*args, **kwargs)
+
+        pipe.execute = execute
+        return pipe
+
+
+@pytest.mark.asyncio
+async def test_patch_many_migrating_a_legacy_user_is_atomic_on_retry():
+    client = fakeredis.FakeAsyncRedis()
+    legacy = {
+        "user_id": "u1",
+        "xp": 10.0,
+        "level": 1,
+        "quests": [{"id": 1, "have": 0, "need": 5, "done": False}],
+    }
+    await client.set("game:progress:u1", json.dumps(legacy))
+    store = ProgressStore(FailOnce(client, "prog:u2"))
+    deltas: dict[str, dict[str, Any]] = {
+        "u1": {"xp_delta": 5.0, "quests": [{"id": 1, "have": 2}]},
+        "u2": {"xp_delta": 1.0},
+    }
+    with pytest.raises(ConnectionError):
+        await store.patch_many(deltas)
+    assert await client.exists("game:progress:u1")
+    await store.patch_many(deltas)
+    rec = await store.get("u1")
+    assert rec["xp"] == 15.0 and rec["quests"][0]["have"] == 2
+    assert (await store.get("u2"))["xp"] == 1.0
+    assert not await client.exists("game:progress:u1")
+
+
+class DownStore(ProgressStore):
+    def __init__(self):
+        super().__init__(None)
+
+    async def get(self, user_id):
+        raise ConnectionError("redis down")
+
+    async def patch_many(self, deltas):
+        raise ConnectionError("redis down")
+
+
+@pytest.mark.asyncio
+async def test_reads_never_hide_buffered_writes_while_the_store_is_down():
+    wb = ProgressWriteBehind(DownStore(), max_dirty=1)
+    app = FastAPI()
+    app.include_router(progress_api.router, prefix="/progress")
+    app.dependency_overrides[progress_api._progress] = lambda: wb.store
+    app.dependency_overrides[progress_api.write_behind] = lambda: wb
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as http:
+        r = await http.patch("/progress/u1", json={"xp_delta": 50})
+        assert r.json()["persisted"] == "buffered"
+        assert wb._early is not None
+        await wb._early  # the background flush fails
+        r = await http.get("/progress/u1")
+        assert r.status_code == 503 and r.headers["retry-after"] == "1"
+        await http.post("/progress/u2", json={"user_id": "u2", "xp": 7, "level": 2, "quests": []})
+        r = await http.get("/progress/u2")  # a full save needs no stored record
+        assert r.status_code == 200 and r.json()["xp"] == 7.0 and r.json()["level"] == 2
@@ -0,0 +1,94 @@
+import asyncio
+
+import pytest
+
+from VEZEPyGame.services.realtime import inputs
+from VEZEPyGame.services.realtime.broadcaster import Broadcaster
+from VEZEPyGame.services.realtime.bus import EventBus
+
+
+class FakeSocket:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.received: list = []
+        self.closed: int | None = None
+
+    async def send_text(self, msg: str):
+        await asyncio.sleep(self.delay)
+        self.received.append(msg)
+
+    async def send_bytes(self, msg: bytes):
+        await self.send_text(msg)  # type: ignore[arg-type]
+
+    async def close(self, code: int = 1000):
+        self.closed = code
+
+
+@pytest.mark.asyncio
+async def test_slow_client_drops_oldest_without_holding_back_others():
+    b = Broadcaster(queue_size=4, policy="drop_oldest")
+    fast, slow = FakeSocket(), FakeSocket(delay=10)
+    b.connect(fast)
+    slow_client = b.connect(slow)
+    for i in range(10):
+        assert b.publish({"i": i}) == 2
+        await asyncio.sleep(0)
+    await asyncio.sleep(0.01)
+    assert fast.received == [f'{{"i":{i}}}' for i in range(10)]
+    assert slow_client.dropped > 0 and slow_client.queue.qsize() <= 4
+    assert b.stats()["deepest"][0]["id"] == slow_client.id
+    b.close()
+
+
+@pytest.mark.asyncio
+async def test_disconnect_policy_cuts_off_slow_client():
+    b = Broadcaster(queue_size=2, policy="disconnect")
+    slow = FakeSocket(delay=10)
+    b.connect(slow)
+    for i in range(5):
+        b.publish({"i": i})
+    await asyncio.sleep(0.01)
+    assert slow.closed == 1013 and b.stats()["clients"] == 0
+
+
+@pytest.mark.asyncio
+async def test_bus_relays_room_events_only_to_members():
+    b = Broadcaster()
+    in_match, other = FakeSocket(), FakeSocket()
+    b.connect(in_match, rooms=["m1"])
+    b.connect(other, rooms=["m2"])
+    bus = EventBus(b)
+    await bus.publish({"type": "input", "match_id": "m1"}, room="m1")
+    # What a worker's subscriber does with a message published by another worker.
+    bus._relay(b"game:events:all", b'{"type":"match"}')
+    await asyncio.sleep(0.01)
+    assert in_match.received == ['{"type":"input","match_id":"m1"}', '{"type":"match"}']
+    assert other.received == ['{"type":"match"}']
+    b.close()
+
+
+@pytest.mark.asyncio
+async def test_binary_input_frames_relay_as_bytes_or_json():
+    w, shift, e = (inputs.KEY_BITS[k] for k in ("w", "shift", "e"))
+    state = inputs.InputState()
+    first = inputs.relay(inputs.encode(1, w | shift), state, sender=7)
+    second = inputs.relay(inputs.encode(2, w, prev=w | shift, impulse=e), state, sender=7)
+    assert first is not None and second is not None
+    assert inputs.relay(inputs.encode(1, 0), state, sender=7) is None  # stale
+    with pytest.raises(inputs.InputError):
+        inputs.relay(b"\x01\x00", state, sender=7)
+    assert inputs.RELAY.unpack(second) == (7, 2, w, shift, e)
+
+    b = Broadcaster()
+    binary, text = FakeSocket(), FakeSocket()
+    b.connect(binary, binary=True)
+    b.connect(text)
+    for frame in (first, second):
+        b.publish_frame(frame, inputs.relay_json)
+    await asyncio.sleep(0.01)
+    assert binary.received == [first, second]
+    assert (
+        text.received[1]
+        == '{"type":"input","sender":7,"seq":2,"press":[],"release":["shift"],"impulse":{"e":true}}'
+    )
+    b.close()
@@ -0,0 +1,30 @@
+from types import SimpleNamespace
+
+import pytest
+
+from VEZEPyGame.services import redis_pool
+
+
+@pytest.fixture
+def fresh_client(monkeypatch):
+    monkeypatch.setattr(redis_pool, "_client", None)
+    yield
+    monkeypatch.setattr(redis_pool, "_client", None)
+
+
+def test_get_redis_shares_one_blocking_pool_sized_from_env(monkeypatch, fresh_client):
+    monkeypatch.setenv("REDIS_MAX_CONNECTIONS", "7")
+    monkeypatch.setenv("REDIS_POOL_TIMEOUT", "0.5")
+    client = redis_pool.get_redis()
+    assert redis_pool.get_redis() is client
+    pool = client.connection_pool
+    assert isinstance(pool, redis_pool.redis.BlockingConnectionPool)
+    assert pool.max_connections == 7 and pool.timeout == 0.5
+    assert redis_pool.pool_stats() == {"enabled": True, "max": 7, "in_use": 0, "idle": 0}
+
+
+def test_pool_stats_without_pool_internals(monkeypatch, fresh_client):
+    monkeypatch.setattr(
+        redis_pool, "_client", SimpleNamespace(connection_pool=SimpleNamespace(max_connections=3))
+    )
+    assert redis_pool.pool_stats() == {"enabled": True, "max": 3, "in_use": None, "idle": None}
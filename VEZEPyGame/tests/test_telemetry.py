@@ -0,0 +1,177 @@
+import gzip
+import json
+import zlib
+
+import fakeredis
+import pytest
+from pydantic import ValidationError
+
+from VEZEPyGame.services.telemetry.api import Event
+from VEZEPyGame.services.telemetry.decode import BodyError, decode_events, decompress, read_body
+from VEZEPyGame.services.telemetry.ingest_worker import RollingAggregator, TelemetryConsumer
+from VEZEPyGame.services.telemetry.sink import TelemetrySink
+from VEZEPyGame.services.telemetry.store import ColumnStore, hour_of
+from VEZEPyGame.services.telemetry.stream import TelemetryStream, decode, encode
+
+
+def test_decode_ndjson_gzip_and_columns_agree():
+    rows = [{"event": "fps", "ts": float(i), "payload": {"value": i}} for i in range(3)]
+    ndjson = b"\n".join(json.dumps(r).encode() for r in rows) + b"\n"
+    body = decompress(gzip.compress(ndjson), "gzip", 1 << 20)
+    columns = {"event": "fps", "ts": [0, 1, 2], "payload": [{"value": i} for i in range(3)]}
+    from_columns = decode_events(json.dumps(columns).encode(), "application/json")
+    assert decode_events(body, "application/x-ndjson") == rows
+    assert [{k: v for k, v in r.items() if v is not None} for r in from_columns] == rows
+
+
+def test_decode_rejects_ragged_columns_and_oversized_bodies():
+    with pytest.raises(BodyError) as e:
+        decode_events(b'{"event": "fps", "ts": [1, 2], "user_id": ["a"]}', "application/json")
+    assert e.value.status == 422
+    with pytest.raises(BodyError) as e:
+        decompress(gzip.compress(b"x" * 100), "gzip", 10)
+    assert e.value.status == 413
+
+
+def test_decompress_reads_every_gzip_member_and_rejects_bad_framing():
+    assert decompress(gzip.compress(b"[1,") + gzip.compress(b"2]"), "gzip", 100) == b"[1,2]"
+    cases = [
+        (gzip.compress(b"x" * 60) + gzip.compress(b"y" * 60), "gzip", 413),
+        (gzip.compress(b"[1,2]")[:-4], "gzip", 400),
+        (gzip.compress(b"[1]") + b"junk", "gzip", 400),
+        (zlib.compress(b"[1]") + zlib.compress(b"[2]"), "deflate", 400),
+    ]
+    for body, encoding, status in cases:
+        with pytest.raises(BodyError) as e:
+            decompress(body, encoding, 100)
+        assert e.value.status == status
+
+
+@pytest.mark.asyncio
+async def test_read_body_stops_at_the_cap():
+    async def chunks(n):
+        for _ in range(n):
+            yield b"x" * 10
+
+    assert await read_body(chunks(3), 30) == b"x" * 30
+    with pytest.raises(BodyError) as e:
+        await read_body(chunks(1000), 30)
+    assert e.value.status == 413
+
+
+@pytest.mark.parametrize("ts", ["NaN", "Infinity", "1e18", "-1"])
+def test_timestamps_without_an_hour_partition_are_rejected(ts):
+    with pytest.raises(ValidationError):
+        decode_events(b'{"event": "a", "ts": ' + ts.encode() + b"}", "application/x-ndjson")
+    with pytest.raises(ValidationError):
+        decode_events(b'{"event": "a", "ts": [1, ' + ts.encode() + b"]}", "application/json")
+    with pytest.raises(ValidationError):
+        Event.model_validate_json(b'{"event": "a", "ts": ' + ts.encode() + b"}")
+
+
+class BrokenStore(ColumnStore):
+    def write(self, event, hour, rows):
+        raise OSError("disk full")
+
+
+@pytest.mark.asyncio
+async def test_sink_drops_unpartitionable_rows_and_flushes_in_the_background(tmp_path):
+    sink = TelemetrySink(ColumnStore(tmp_path), max_pending=2)
+    assert not sink.add([{"event": "a", "ts": 1e18}, {"event": "a", "ts": float("nan")}])
+    # Queued before validation existed.
+    sink._pending[("a", 10**15)] = [{"event": "a", "ts": 3.6e18}]
+    sink.add([{"event": "a", "ts": 100.0}])
+    assert await sink.flush() == 1 and sink.pending == 0
+    assert ColumnStore(tmp_path).query(event="a")["rows"][0]["ts"] == 100.0
+
+    broken = TelemetrySink(BrokenStore(tmp_path), flush_interval_s=60, max_pending=1)
+    assert broken.add([{"event": "a", "ts": 100.0}])
+    broken.flush_soon()
+    assert broken._early is not None
+    await broken._early
+    assert broken.pending == 1  # kept for the next interval; the caller never saw the error
+
+
+def test_column_store_query_survives_compaction(tmp_path):
+    store = ColumnStore(tmp_path)
+    base = 1_700_000_000.0
+    for k in range(3):
+        rows = [
+            {"event": "fps", "ts": base + k * 100 + i, "user_id": f"u{i % 2}", "payload": {"v": i}}
+            for i in range(4)
+        ]
+        store.write("fps", hour_of(base), rows)
+    before = store.query(event="fps", user_id="u1", ts_from=base + 50, ts_to=base + 250)
+    assert [r["ts"] - base for r in before["rows"]] == [101, 103, 201, 203]
+    assert store.compact_closed(now=base + 86400) == 1
+    after = store.query(event="fps", user_id="u1", ts_from=base + 50, ts_to=base + 250)
+    assert after["rows"] == before["rows"] and after["parts"] == 1
+    assert store.query(event="login")["rows"] == []
+
+
+def test_stream_fields_round_trip():
+    full = {"event": "fps", "ts": 1.5, "user_id": "u1", "payload": {"value": 60, "gpu": "x"}}
+    bare = {"event": "login", "ts": 2.0, "user_id": None, "payload": None}
+    for ev in (full, bare):
+        fields = {k.encode(): v.encode() for k, v in encode(ev).items()}  # as redis-py returns them
+        assert decode(fields) == ev
+    assert set(encode(bare)) == {"e", "ts"}
+
+
+def test_aggregator_reservoir_bounds_samples_but_counts_everything():
+    agg = RollingAggregator(window_s=10, max_samples=16)
+    agg.add(
+        ({"event": "fps", "ts": 0.0, "payload": {"value": float(i)}} for i in range(1000)), now=100
+    )
+    agg.add(
+        [{"event": "fps", "ts": 0.0, "payload": {"value": True}}, {"event": "login", "ts": 0.0}],
+        now=100,
+    )
+    [bucket] = agg._buckets["fps"]
+    assert bucket.count == 1001 and bucket.seen == 1000 and len(bucket.values) == 16
+    snap = agg.snapshot(now=100)
+    assert snap["fps"]["count"] == 1001 and 0 <= snap["fps"]["p50"] <= 999
+    assert snap["login"] == {"count": 1, "rate_per_s": 0.1}
+    assert agg.snapshot(now=111) == {}
+
+
+@pytest.mark.asyncio
+async def test_consumer_reads_events_appended_before_it_started_and_lag_drains():
+    client = fakeredis.FakeAsyncRedis()
+    stream = TelemetryStream(client, lag_cache_s=0)
+    assert await stream.lag() == 0  # no stream yet
+    await stream.append(
+        [{"event": "fps", "ts": float(i), "payload": {"value": i}} for i in range(5)]
+    )
+    agg = RollingAggregator()
+    consumer = TelemetryConsumer(stream, agg, name="c1", batch=3)
+    assert await consumer.run_once(block_ms=0) == 3
+    assert await stream.lag() == 2
+    assert await consumer.run_once(block_ms=0) == 2
+    assert await stream.lag() == 0 and consumer.consumed == 5
+    assert agg.snapshot()["fps"]["count"] == 5
+    assert (await client.xinfo_groups("telemetry"))[0]["pending"] == 0
+
+
+@pytest.mark.asyncio
+async def test_lag_without_group_lag_counts_undelivered_entries_and_redis_errors_propagate(
+    monkeypatch,
+):
+    client = fakeredis.FakeAsyncRedis()
+    stream = TelemetryStream(client, lag_cache_s=0, lag_scan_max=3)
+    await stream.append([{"event": "fps", "ts": float(i)} for i in range(6)])
+    await TelemetryConsumer(stream, RollingAggregator(), name="c1", batch=2).run_once(block_ms=0)
+    xinfo_groups = client.xinfo_groups
+
+    async def redis6_groups(name):  # Redis < 7 reports no "lag"
+        return [{k: v for k, v in g.items() if k != "lag"} for g in await xinfo_groups(name)]
+
+    monkeypatch.setattr(client, "xinfo_groups", redis6_groups)
+    assert await stream.lag() == 3  # 4 undelivered, counted up to lag_scan_max
+
+    async def down(name):
+        raise ConnectionError("redis down")
+
+    monkeypatch.setattr(client, "xinfo_groups", down)
+    with pytest.raises(ConnectionError):
+        await stream.lag()
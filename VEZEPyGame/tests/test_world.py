@@ -0,0 +1,108 @@
+import asyncio
+import json
+
+import pytest
+
+from VEZEPyGame.services.realtime import inputs
+from VEZEPyGame.services.world.interest import InterestGrid
+from VEZEPyGame.services.world.loop import TickLoop
+from VEZEPyGame.services.world.state import NPC, PLAYER, World
+
+
+def _relay(sender: int, seq: int, keys: tuple) -> bytes:
+    frame = inputs.relay(inputs.encode(seq, inputs.mask_of(keys)), inputs.InputState(), sender)
+    assert frame is not None
+    return frame
+
+
+def test_player_moves_from_held_keys_and_deltas_report_only_movers():
+    world = World(width=100, height=100, speed=10, seed=1)
+    world.spawn("m2", NPC, count=3)
+    world.on_frame(_relay(5, 1, ("d",)), "m1")
+    live = world.live()
+    player = int(live[world.kind[live] == PLAYER][0])
+    x0 = float(world.pos[player, 0])
+    world.deltas()  # first report: everything
+    world.step(0.5)
+    assert world.pos[player, 0] == min(100, x0 + 5)
+    by_room = dict(world.deltas())
+    assert player in by_room["m1"]["ids"] and len(by_room["m1"]["xy"]) == 2
+    world.on_frame(_relay(5, 2, ()), "m1")  # keys released
+    world.step(0.5)
+    assert player not in dict(world.deltas()).get("m1", {"ids": []})["ids"]
+
+
+def test_npcs_stay_in_bounds_and_idle_players_expire():
+    world = World(width=50, height=50, speed=100, idle_s=1, seed=2)
+    world.spawn(None, NPC, count=500)
+    for _ in range(100):
+        world.step(0.05)
+    live = world.live()
+    assert ((world.pos[live] >= 0) & (world.pos[live] <= 50)).all()
+    world.on_frame(_relay(9, 1, ("w",)), "m1")
+    assert world.expire(now=world.last_input.max() + 2) == 1
+    assert dict(world.deltas())["m1"]["gone"]
+
+
+def test_player_sending_from_another_room_moves_there():
+    world = World(seed=3)
+    world.on_frame(_relay(4, 1, ()), "m1")
+    old = world.players()[4]
+    world.deltas()
+    world.on_frame(_relay(4, 2, ("w",)), "m2")
+    new = world.players()[4]
+    assert new != old and world.room_name(int(world.room[new])) == "m2" and world.mask[new]
+    assert world.entities == 1
+    by_room = dict(world.deltas())
+    assert by_room["m1"]["gone"] == [old] and new in by_room["m2"]["ids"]
+
+
+def test_interest_grid_sends_players_only_nearby_cells():
+    world = World(width=1000, height=1000, speed=0, seed=4)
+    grid = InterestGrid(world, cell=100, radius=1)
+    near, far = world.spawn("m1", NPC, count=2)
+    world.on_frame(_relay(3, 1, ()), "m1")
+    player = world.players()[3]
+    world.pos[player] = (150, 150)
+    world.pos[near] = (260, 120)  # neighbouring cell
+    world.pos[far] = (900, 900)
+    world.step(0.05)
+    ((room, text),) = grid.messages()
+    msg = json.loads(text)
+    assert room == "@3" and msg["view"] == [0, 0, 2, 2]
+    seen = {i for c in msg["cells"] for i in c["ids"]}
+    assert near in seen and player in seen and far not in seen
+
+    world.pos[near] = (500, 500)  # leaves the view
+    world.step(0.05)
+    msg = json.loads(grid.messages()[0][1])
+    assert [c.get("gone") for c in msg["cells"]] == [[near]]
+
+
+@pytest.mark.asyncio
+async def test_tick_runs_off_the_event_loop_and_applies_queued_frames():
+    world = World(width=1000, height=1000, speed=10, seed=5)
+    loop = TickLoop(world, hz=20, interest=InterestGrid(world, cell=100))
+    published = []
+    heartbeats = 0
+
+    async def publish(messages):
+        published.extend(messages)
+
+    async def heartbeat():
+        nonlocal heartbeats
+        while True:
+            heartbeats += 1
+            await asyncio.sleep(0)
+
+    loop.on_frame(_relay(7, 1, ("d",)), "m1")
+    assert world.players() == {}  # queued until the tick
+    world.spawn("m1", NPC, count=20_000)
+    beat = asyncio.create_task(heartbeat())
+    await asyncio.sleep(0)
+    before = heartbeats
+    await loop.tick(publish)
+    beat.cancel()
+    assert heartbeats > before + 1  # the loop kept running while the tick worked
+    assert 7 in world.players()
+    assert [room for _, room in published] == ["@7"]